@@ -1,3 +1,3 @@
-from . import auth, chat, mood, users
+from . import auth, chat, metrics, mood, sync, users
 
-__all__ = ["auth", "chat", "mood", "users"]
+__all__ = ["auth", "chat", "metrics", "mood", "sync", "users"]
@@ -5,10 +5,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..core.security import create_access_token, get_password_hash, verify_password
+from ..core import database
+from ..core.security import create_access_token, get_password_hash_async, verify_password_async
 from ..models.user import User
 from ..schemas.user import UserCreate, UserPublic
-from .deps import get_db
+from .deps import cache_user, get_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -21,12 +22,15 @@ async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db))
 
     user = User(
         email=payload.email,
-        password_hash=get_password_hash(payload.password),
+        password_hash=await get_password_hash_async(payload.password),
         display_name=payload.display_name or payload.email.split("@")[0],
     )
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    # Replicas may not have the new row yet: the user's first reads go to the primary.
+    database.mark_written(user.id)
+    cache_user(user)
     return user
 
 
@@ -34,8 +38,10 @@ async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db))
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)) -> dict[str, str]:
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
-    if user is None or not verify_password(form_data.password, user.password_hash):
+    if user is None or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
+    database.mark_written(user.id)
+    cache_user(user)
     access_token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=60 * 12))
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,13 +1,36 @@
-from typing import List
+import json
+import logging
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
+from ..core import database
+from ..core.admission import AdmissionRejected, admission
+from ..core.config import settings
 from ..models.chat import ChatMessage
-from ..schemas.chat import ChatMessagePublic, ChatRequest, ChatResponse
-from ..services.conversation import handle_chat
-from .deps import get_current_user, get_db
+from ..models.user import User
+from ..schemas.chat import AnalyzeBatchRequest, ChatMessagePublic, ChatRequest, ChatResponse, ChatSearchHit, TextAnalysis
+from ..services.analysis import analyze_batch_async
+from ..services.conversation import (
+    ChatTurn,
+    analyze_chat_turn,
+    generate_reply,
+    handle_chat,
+    persist_chat_turn_in_new_session,
+    reply_chunks,
+)
+from ..services.search import search_messages
+from ..services.versions import HISTORY, etag, stored_versions
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..utils.serialization import RowsJSONResponse
+from .deps import admitted_user, cache_user, get_current_reader, get_db, get_read_db, not_modified, resolve_token
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -16,24 +39,201 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 async def create_reply(
     payload: ChatRequest,
     db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user),
+    current_user=Depends(admitted_user),
 ) -> ChatResponse:
     return await handle_chat(session=db, user=current_user, payload=payload)
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _reply_events(turn: ChatTurn) -> AsyncIterator[str]:
+    yield _sse(
+        "meta",
+        {"language": turn.language, "sentiment": turn.sentiment, "mood": turn.mood, "timestamp": turn.timestamp.isoformat()},
+    )
+    await generate_reply(turn)
+    for chunk in reply_chunks(turn.reply):
+        yield _sse("delta", {"text": chunk})
+    yield _sse("done", {"reply": turn.reply})
+
+
+@router.post("/respond/stream", response_class=StreamingResponse)
+async def stream_reply(
+    payload: ChatRequest,
+    current_user=Depends(admitted_user),
+) -> StreamingResponse:
+    """Server-sent events: ``meta`` (language, sentiment, mood), ``delta`` reply chunks, then ``done``.
+
+    The reply is generated after ``meta`` is flushed, and the turn is stored by a
+    background task once the response has been sent. The admission slot covers the
+    analysis only; reply generation is bounded by the reply backend's own limits.
+    """
+    turn = await analyze_chat_turn(payload)
+    return StreamingResponse(
+        _reply_events(turn),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist_chat_turn_in_new_session, current_user, turn),
+    )
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: Optional[str] = None) -> None:
+    """Persistent chat channel: authenticate once, then one JSON ``ChatRequest`` per frame.
+
+    Pass the bearer token as ``?token=`` (browsers cannot set headers on WebSockets)
+    or in an ``Authorization`` header. Frames are handled strictly in order on one
+    reused session, whose transaction ends with each frame so an idle socket holds
+    no connection; the next frame is not read until the previous reply is sent, so
+    a fast sender is throttled by the socket's flow control. Each frame is also
+    charged to the user's rate limit and needs an admission slot; a refused frame
+    gets ``{"error": "rate_limited" | "overloaded", "retry_after": seconds}``. The
+    stored profile version is checked before every frame, so a settings change made
+    elsewhere (e.g. turning history off) applies from the next frame. A frame that
+    fails gets ``{"error": "internal"}`` and the channel stays open.
+    """
+    header = websocket.headers.get("authorization", "")
+    token = token or (header[7:] if header.lower().startswith("bearer ") else None)
+    if not token:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        user_id = resolve_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    async with database.AsyncSessionLocal() as session:
+        user = await session.get(User, user_id)
+        if user is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        cache_user(user)
+        profile_version: Optional[int] = user.profile_version or 0
+        await session.commit()
+        await websocket.accept()
+        try:
+            while True:
+                frame = await websocket.receive_text()
+                try:
+                    payload = ChatRequest.parse_raw(frame)
+                except ValidationError as exc:
+                    await websocket.send_json({"error": "invalid_request", "detail": exc.errors()})
+                    continue
+                try:
+                    admission.check_rate(user_id)
+                    async with admission.slot():
+                        versions = await stored_versions(session, user_id)
+                        if versions.profile_version != profile_version:
+                            await session.refresh(user)
+                            cache_user(user)
+                            profile_version = versions.profile_version
+                        reply = await handle_chat(session=session, user=user, payload=payload)
+                    # A turn that stored nothing (history off, or queued for write-behind) leaves the
+                    # version read's transaction open; end it so an idle socket holds no connection.
+                    await session.commit()
+                    if user.history_enabled:
+                        # Before the reply goes out, so the client's next read sees the stored turn.
+                        database.mark_written(user_id)
+                except AdmissionRejected as exc:
+                    error = "rate_limited" if exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS else "overloaded"
+                    await websocket.send_json({"error": error, "retry_after": exc.retry_after})
+                    continue
+                except Exception:
+                    logger.exception("Chat frame failed for user %s", user_id)
+                    await session.rollback()
+                    profile_version = None  # the rollback expired ``user``; reload it before the next frame
+                    await websocket.send_json({"error": "internal"})
+                    continue
+                await websocket.send_text(reply.json())
+        except WebSocketDisconnect:
+            return
+
+
+@router.post("/analyze-batch", response_model=list[TextAnalysis])
+async def analyze_texts(
+    payload: AnalyzeBatchRequest,
+    current_user=Depends(admitted_user),
+) -> List[TextAnalysis]:
+    if len(payload.texts) > settings.analyze_batch_max_texts:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.analyze_batch_max_texts} texts per batch",
+        )
+    return [{"language": result.language, "sentiment": result.sentiment} for result in await analyze_batch_async(payload.texts)]
+
+
+HISTORY_FIELDS = tuple(ChatMessagePublic.__fields__)
+
+
+def history_query(user_id: int, limit: int, before: Optional[str] = None, after: Optional[str] = None) -> Select:
+    """Keyset page over ``(created_at, id)``; served by ``ix_chat_messages_user_created_id``."""
+    key = tuple_(ChatMessage.created_at, ChatMessage.id)
+    query = select(ChatMessage).where(ChatMessage.user_id == user_id)
+    if after is not None:
+        return query.where(key > decode_cursor(after)).order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(limit)
+    if before is not None:
+        query = query.where(key < decode_cursor(before))
+    return query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit)
+
+
 @router.get("/history", response_model=list[ChatMessagePublic])
 async def get_history(
-    limit: int = 50,
-    db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user),
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_reader),
 ) -> List[ChatMessagePublic]:
+    """Return messages oldest-first.
+
+    Without a cursor this is the latest page. Pass ``before`` to walk back into older
+    messages or ``after`` to fetch newer ones; when more rows may follow in the same
+    direction the ``X-Next-Cursor`` header carries the cursor for the next page.
+    Responses carry an ``ETag``; ``If-None-Match`` gets a 304 while nothing changed.
+    """
+    versions = await stored_versions(db, current_user.id)
+    cached = not_modified(request, response, etag(HISTORY, versions, request.url.query))
+    if cached is not None:
+        return cached
+    if not versions.history_enabled:
+        return []
+    if before is not None and after is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either 'before' or 'after', not both")
+    try:
+        query = history_query(current_user.id, limit, before=before, after=after)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    # Plain tuples encoded straight to JSON: no per-row ChatMessagePublic validation.
+    result = await db.execute(query.with_only_columns(*(getattr(ChatMessage, name) for name in HISTORY_FIELDS)))
+    messages = result.all()
+    if after is None:
+        messages.reverse()
+    if len(messages) == limit:
+        edge = messages[-1] if after is not None else messages[0]
+        response.headers["X-Next-Cursor"] = encode_cursor(edge.created_at, edge.id)
+    return RowsJSONResponse(HISTORY_FIELDS, messages, headers=response.headers)
+
+
+@router.get("/search", response_model=list[ChatSearchHit])
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(admitted_user),
+) -> List[ChatSearchHit]:
+    """Search the caller's messages, best match first.
+
+    Every word must appear (``word*`` matches a prefix). Snippets mark hits with
+    ``[`` and ``]``. ``score`` is higher for better matches and ``null`` when the
+    database has no full-text index, in which case matches come newest first.
+    """
     if not current_user.history_enabled:
         return []
-    result = await db.execute(
-        select(ChatMessage)
-        .where(ChatMessage.user_id == current_user.id)
-        .order_by(ChatMessage.created_at.desc())
-        .limit(limit)
-    )
-    messages = list(reversed(result.scalars().all()))
-    return messages
+    return await search_messages(db, current_user.id, q, limit=limit, offset=offset)
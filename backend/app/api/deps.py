@@ -1,31 +1,181 @@
-from typing import Annotated
+import math
+import time
+from typing import Annotated, AsyncIterator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from ..core import database, security
+from ..core.admission import AdmissionRejected, admission
+from ..core.config import settings
 from ..models.user import User
+from ..utils.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# token -> user id, so a repeat bearer token skips the JWT signature check.
+token_cache: TTLCache[int] = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+# user id -> detached ``User`` snapshot, merged into the request session without a query.
+user_cache: TTLCache[User] = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
 
-async def get_db() -> AsyncSession:
+
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def get_write_db(request: Request) -> AsyncSession:
+    """Session on the primary database.
+
+    An unsafe request (POST, PATCH, DELETE, ...) by an authenticated user makes that
+    user's reads stick to the primary for ``read_your_writes_seconds``. It is marked
+    up front, before the handler runs, so the mark is in place before the client
+    can see the response and issue its next read.
+    """
+    if request.method not in _SAFE_METHODS:
+        user_id = _bearer_user_id(request)
+        if user_id is not None:
+            database.mark_written(user_id)
     async for session in database.get_session():
         yield session
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_db)]) -> User:
+# Routes that write, or that have not been moved to a replica, keep using ``get_db``.
+get_db = get_write_db
+
+
+async def get_read_db(token: Annotated[str, Depends(oauth2_scheme)]) -> AsyncSession:
+    """Session for read-only routes: a read replica in rotation, or the primary (see ``database.read_engine_for``)."""
+    async for session in database.get_read_session(resolve_token(token)):
+        yield session
+
+
+def _snapshot(user: User) -> User:
+    columns = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    snapshot = User(**columns)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def cache_user(user: User) -> None:
+    user_cache.set(user.id, _snapshot(user))
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the cached snapshot after the user's profile changes."""
+    user_cache.pop(user_id)
+
+
+def clear_auth_caches() -> None:
+    token_cache.clear()
+    user_cache.clear()
+
+
+def resolve_token(token: str) -> int:
+    user_id: Optional[int] = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = security.decode_access_token(token)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials") from exc
 
-    user_id = payload.get("sub")
-    if user_id is None:
+    subject = payload.get("sub")
+    if subject is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = await db.get(User, int(user_id))
+    user_id = int(subject)
+    expires_at = payload.get("exp")
+    ttl = expires_at - time.time() if isinstance(expires_at, (int, float)) else None
+    token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+def _bearer_user_id(request: Request) -> Optional[int]:
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    try:
+        return resolve_token(header[7:])
+    except HTTPException:
+        return None
+
+
+async def _load_user(token: str, db: AsyncSession) -> User:
+    user_id = resolve_token(token)
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    user = await db.get(User, user_id)
+    if user is None and db.bind is not database.get_engine():
+        # A lagging replica may not have the user yet; only the primary can say they are gone.
+        async with database.AsyncSessionLocal() as primary:
+            user = await primary.get(User, user_id)
+        if user is not None:
+            database.mark_written(user_id)
+            cache_user(user)
+            return await db.merge(_snapshot(user), load=False)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    cache_user(user)
     return user
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_db)]) -> User:
+    return await _load_user(token, db)
+
+
+async def get_current_reader(token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_read_db)]) -> User:
+    """``get_current_user`` for read-only routes, attached to the ``get_read_db`` session."""
+    return await _load_user(token, db)
+
+
+def auth_cache_stats() -> dict[str, dict]:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
+def admission_error(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=exc.status_code, detail=exc.detail, headers={"Retry-After": str(math.ceil(exc.retry_after))})
+
+
+async def rate_limited_user(token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_db)]) -> User:
+    """``get_current_user``, after charging the user's rate limit (checked before any database work)."""
+    try:
+        admission.check_rate(resolve_token(token))
+    except AdmissionRejected as exc:
+        raise admission_error(exc) from exc
+    return await get_current_user(token, db)
+
+
+async def admitted_user(user: Annotated[User, Depends(rate_limited_user)]) -> AsyncIterator[User]:
+    """Rate-limited user who also holds one of the global slots for expensive routes while the handler runs."""
+    try:
+        await admission.acquire()
+    except AdmissionRejected as exc:
+        raise admission_error(exc) from exc
+    try:
+        yield user
+    finally:
+        admission.release()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" and "x" match.
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag``; return a 304 to send instead when the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    header = request.headers.get("if-none-match")
+    if header and _etag_matches(header, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
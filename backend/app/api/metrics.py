@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..core.admission import admission
+from ..core.executor import cpu_executor
+from ..core.metrics import metrics
+from ..services.mood_trends import mood_trends
+from ..services.reply_backends import reply_service
+from ..services.retention import retention_job
+from ..services.write_behind import chat_writer
+from .deps import token_cache, user_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+def component_gauges() -> dict:
+    executor = cpu_executor.stats()
+    writer = chat_writer.stats()
+    trends = mood_trends.stats()
+    gauges = {
+        ("cpu_executor_in_flight", ()): executor["in_flight"],
+        ("cpu_executor_queue_depth", ()): executor["queue_depth"],
+        ("cpu_executor_submitted", ()): executor["submitted"],
+        ("cpu_executor_wait_seconds_max", ()): executor["max_wait_seconds"],
+        ("cpu_executor_wait_seconds_avg", ()): executor["avg_wait_seconds"],
+        ("write_behind_pending_rows", ()): writer["pending_rows"],
+        ("write_behind_rows_written", ()): writer["rows_written"],
+        ("write_behind_rows_failed", ()): writer["rows_failed"],
+        ("write_behind_rows_discarded", ()): writer["rows_discarded"],
+        ("write_behind_retries", ()): writer["retries"],
+        ("mood_trends_users", ()): trends["users"],
+        ("mood_trends_rebuilds", ()): trends["rebuilds"],
+        ("mood_trends_snapshots_written", ()): trends["snapshots_written"],
+        ("admission_in_flight", ()): admission.concurrency.in_flight,
+        ("admission_waiting", ()): admission.concurrency.waiting,
+        ("admission_tracked_users", ()): len(admission.rate_limiter),
+        ("retention_runs", ()): retention_job.runs,
+        ("retention_pages_vacuumed", ()): retention_job.pages_vacuumed,
+        ("retention_last_run_seconds", ()): retention_job.last_run_seconds,
+        ("reply_backend_timeouts", (("backend", reply_service.backend.name),)): reply_service.timeouts,
+        ("reply_backend_failures", (("backend", reply_service.backend.name),)): reply_service.failures,
+        ("reply_backend_coalesced", (("backend", reply_service.backend.name),)): reply_service.coalesced,
+    }
+    for name, cache in (("tokens", token_cache), ("users", user_cache)):
+        gauges[("auth_cache_hits", (("cache", name),))] = cache.hits
+        gauges[("auth_cache_misses", (("cache", name),))] = cache.misses
+        gauges[("auth_cache_size", (("cache", name),))] = len(cache)
+    return gauges
+
+
+def component_histograms() -> dict:
+    return {
+        ("reply_backend_duration_seconds", (("backend", name),)): histogram for name, histogram in reply_service.histograms.items()
+    }
+
+
+metrics.gauge_sources.append(component_gauges)
+metrics.histogram_sources.append(component_histograms)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
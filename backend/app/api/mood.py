@@ -1,31 +1,77 @@
 from datetime import date
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models.mood import MoodEntry
-from ..schemas.mood import MoodEntryCreate, MoodEntryPublic
-from .deps import get_current_user, get_db
+from ..core.config import settings
+from ..models.mood import MoodEntry, MoodEntryTombstone
+from ..schemas.mood import MoodBulkImportResult, MoodEntryCreate, MoodEntryPublic, MoodSummaryBucket, MoodTrends
+from ..services.mood_import import (
+    BulkImportInvalid,
+    BulkImportTooLarge,
+    collect_ndjson_records,
+    import_mood_entries,
+    limit_body,
+    parse_json_records,
+    validate_entries,
+)
+from ..services.mood_summary import apply_mood_counts, summarize_moods
+from ..services.mood_trends import mood_trends
+from ..services.sync import allocate_changes, assign_change_seqs
+from ..services.versions import MOOD, etag, stored_versions
+from ..utils.serialization import RowsJSONResponse
+from .deps import admitted_user, get_current_reader, get_current_user, get_db, get_read_db, not_modified
 
 router = APIRouter(prefix="/mood", tags=["mood"])
 
+ENTRY_FIELDS = tuple(MoodEntryPublic.__fields__)
+
 
 @router.get("/entries", response_model=List[MoodEntryPublic])
 async def list_entries(
+    request: Request,
+    response: Response,
     start: date | None = None,
     end: date | None = None,
-    db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_reader),
 ) -> List[MoodEntryPublic]:
-    query = select(MoodEntry).where(MoodEntry.user_id == current_user.id)
+    cached = not_modified(request, response, etag(MOOD, await stored_versions(db, current_user.id), request.url.query))
+    if cached is not None:
+        return cached
+    # Plain tuples encoded straight to JSON: no per-row MoodEntryPublic validation.
+    query = select(*(getattr(MoodEntry, name) for name in ENTRY_FIELDS)).where(MoodEntry.user_id == current_user.id)
     if start is not None:
         query = query.where(MoodEntry.mood_date >= start)
     if end is not None:
         query = query.where(MoodEntry.mood_date <= end)
     result = await db.execute(query.order_by(MoodEntry.mood_date.asc()))
-    return result.scalars().all()
+    return RowsJSONResponse(ENTRY_FIELDS, result.all(), headers=response.headers)
+
+
+@router.get("/summary", response_model=List[MoodSummaryBucket])
+async def mood_summary(
+    start: date | None = None,
+    end: date | None = None,
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_reader),
+) -> List[MoodSummaryBucket]:
+    return await summarize_moods(db, current_user.id, start=start, end=end, bucket=bucket)
+
+
+@router.get("/trends", response_model=MoodTrends)
+async def read_trends(db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)) -> MoodTrends:
+    return await mood_trends.trends(db, current_user.id)
+
+
+@router.post("/trends/rebuild", response_model=MoodTrends)
+async def rebuild_trends(db: AsyncSession = Depends(get_db), current_user=Depends(admitted_user)) -> MoodTrends:
+    await mood_trends.rebuild(db, current_user.id)
+    return await mood_trends.trends(db, current_user.id)
 
 
 @router.post("/entries", response_model=MoodEntryPublic, status_code=status.HTTP_201_CREATED)
@@ -35,16 +81,67 @@ async def create_entry(
     current_user=Depends(get_current_user),
 ) -> MoodEntryPublic:
     entry = MoodEntry(user_id=current_user.id, mood=payload.mood, source=payload.source, mood_date=payload.mood_date)
+    await assign_change_seqs(db, [entry])
     db.add(entry)
+    await apply_mood_counts(db, [entry], 1)
     await db.commit()
     await db.refresh(entry)
+    mood_trends.record(current_user.id, [entry])
     return entry
 
 
+_BULK_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/MoodEntryCreate"}}},
+            "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/MoodEntryCreate"}},
+        },
+    }
+}
+
+
+@router.post("/entries/bulk", response_model=MoodBulkImportResult, status_code=status.HTTP_201_CREATED, openapi_extra=_BULK_BODY)
+async def bulk_create_entries(
+    request: Request,
+    dedupe: bool = Query(False, description="Skip entries whose (mood_date, source) already exists"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(admitted_user),
+) -> MoodBulkImportResult:
+    """Import many entries at once: a JSON array, or one entry per line with ``Content-Type: application/x-ndjson``."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    max_bytes = settings.mood_bulk_max_bytes
+    try:
+        declared = request.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise BulkImportTooLarge(f"At most {max_bytes} bytes per import")
+        # The declared length is only a hint: the body is counted as it arrives either way.
+        body = limit_body(request.stream(), max_bytes)
+        if content_type == "application/x-ndjson":
+            records = await collect_ndjson_records(body, settings.mood_bulk_max_entries, settings.mood_bulk_max_line_bytes)
+        else:
+            records = parse_json_records(b"".join([chunk async for chunk in body]))
+        entries = validate_entries(records, settings.mood_bulk_max_entries)
+    except BulkImportTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    except BulkImportInvalid as exc:
+        raise RequestValidationError(exc.errors) from exc
+
+    result = await import_mood_entries(db, current_user.id, entries, dedupe=dedupe)
+    if result["inserted"]:
+        # Imports are usually back-dated, which incremental streaks cannot absorb.
+        await mood_trends.invalidate(db, current_user.id)
+    await db.commit()
+    return result
+
+
 @router.delete("/entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_entry(entry_id: int, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)) -> None:
     entry = await db.get(MoodEntry, entry_id)
     if entry is None or entry.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mood entry not found")
     await db.delete(entry)
+    db.add(MoodEntryTombstone(user_id=current_user.id, entry_id=entry.id, change_seq=await allocate_changes(db, current_user.id, 1)))
+    await apply_mood_counts(db, [entry], -1)
+    await mood_trends.invalidate(db, current_user.id)
     await db.commit()
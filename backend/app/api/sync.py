@@ -0,0 +1,38 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..schemas.sync import SyncChanges
+from ..services.sync import SyncTokenAhead, changes_since, snapshot
+from .deps import get_current_user, get_db
+
+router = APIRouter(tags=["sync"])
+
+
+@router.get("/sync", response_model=SyncChanges)
+async def sync_changes(
+    since: Optional[int] = Query(None, ge=0, description="Token from the previous response; omit for a fresh snapshot"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+) -> SyncChanges:
+    """Chat messages and mood entries added, and mood entries deleted, since ``since``.
+
+    Without ``since`` the response is a snapshot: the latest ``limit`` messages and
+    every mood entry. Either way ``token`` is what to pass next time. A delta holds
+    at most ``limit`` changes in the order they happened; ``has_more`` means ask
+    again straight away. Messages removed by the retention job are not reported.
+    A token the server never issued (e.g. after a database reset) gets 410, and the
+    client should start over without ``since``.
+
+    Unlike the other list reads this stays on the primary: a lagging replica would
+    answer a token it has not caught up to with 410 and throw away the client's
+    cache, or hand out a token that no replica in rotation has reached yet.
+    """
+    if since is None:
+        return await snapshot(db, current_user, message_limit=limit)
+    try:
+        return await changes_since(db, current_user, since, limit)
+    except SyncTokenAhead as exc:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(exc)) from exc
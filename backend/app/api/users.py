@@ -1,16 +1,33 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.user import User
 from ..schemas.user import UserPublic, UserUpdateSettings
-from .deps import get_current_user, get_db
+from ..services.export import EXPORT_FORMATS, export_stream
+from ..services.versions import PROFILE, etag
+from .deps import get_current_reader, get_current_user, get_db, get_read_db, invalidate_user, not_modified
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserPublic)
-async def read_profile(current_user: User = Depends(get_current_user)) -> UserPublic:
-    return current_user
+async def read_profile(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader),
+) -> UserPublic:
+    # The cached snapshot may predate an update made on another worker; the ETag and
+    # the body both come from this fresh read.
+    user = await db.get(User, current_user.id, populate_existing=True)
+    cached = not_modified(request, response, etag(PROFILE, user))
+    if cached is not None:
+        return cached
+    return user
 
 
 @router.patch("/me", response_model=UserPublic)
@@ -23,7 +40,26 @@ async def update_profile(
         current_user.history_enabled = payload.history_enabled
     if payload.display_name is not None:
         current_user.display_name = payload.display_name
+    if "history_retention_days" in payload.__fields_set__:
+        current_user.history_retention_days = payload.history_retention_days
+    # Also part of the history ETag, since the history setting decides what /chat/history returns.
+    current_user.profile_version = func.coalesce(User.profile_version, 0) + 1
     db.add(current_user)
     await db.commit()
     await db.refresh(current_user)
+    invalidate_user(current_user.id)
     return current_user
+
+
+@router.get("/me/export", response_class=StreamingResponse)
+async def export_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    # The export opens its own session: request-scoped dependencies are closed before streaming starts.
+    filename = f"companionai-export-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        export_stream(current_user.id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
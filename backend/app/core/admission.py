@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Hashable
+
+from ..utils.cache import TTLCache
+from .config import settings
+from .metrics import metrics
+
+metrics.describe("admission_rejected_total", "Requests refused by admission control, by reason.")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Per-key token buckets: ``rate`` requests per second sustained, bursts of up to ``burst``.
+
+    A bucket left alone for ``burst / rate`` seconds is full again, so that is also its
+    cache TTL: an evicted or expired key simply starts over with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._buckets: TTLCache[_Bucket] = TTLCache(max_keys, self.burst / rate, clock=clock)
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; returns 0 on success, else the seconds until they would be available."""
+        now = self._clock()
+        bucket = self._buckets.get(key) or _Bucket(float(self.burst), now)
+        bucket.tokens = min(float(self.burst), bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            self._buckets.set(key, bucket)
+            return 0.0
+        self._buckets.set(key, bucket)
+        return (cost - bucket.tokens) / self.rate
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders at once; others wait up to ``max_wait`` seconds, in arrival order.
+
+    Unlike ``asyncio.Semaphore`` it refuses instead of queueing without bound, and it
+    is not tied to the event loop it was first used on.
+    """
+
+    def __init__(self, limit: int, max_wait: float) -> None:
+        self.limit = max(1, limit)
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        if self.max_wait <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # ``release`` hands its slot straight to the waiter, so ``in_flight`` is unchanged.
+            await asyncio.wait_for(waiter, self.max_wait)
+            return True
+        except (asyncio.CancelledError, asyncio.TimeoutError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before we gave up: pass it on rather than leak it.
+                self.release()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight = max(0, self.in_flight - 1)
+
+
+class AdmissionController:
+    """Per-user rate limits plus a global cap on concurrent expensive requests.
+
+    ``check_rate`` raises ``AdmissionRejected`` (429) when the user's bucket is empty.
+    ``slot`` raises it (503) when ``concurrency`` requests are already running and none
+    finishes within ``max_wait``. Either way the caller is refused at once with a
+    ``retry_after`` hint rather than queued behind the overload.
+    """
+
+    def __init__(self, enabled: bool, rate: float, burst: int, max_users: int, concurrency: int, max_wait: float) -> None:
+        self.enabled = enabled
+        self.rate_limiter = RateLimiter(rate, burst, max_users)
+        self.concurrency = ConcurrencyLimiter(concurrency, max_wait)
+        self.rejected: dict[str, int] = {"rate": 0, "overload": 0}
+
+    def check_rate(self, user_id: int, cost: float = 1.0) -> None:
+        if not self.enabled:
+            return
+        retry_after = self.rate_limiter.acquire(user_id, cost)
+        if retry_after:
+            self._reject("rate")
+            raise AdmissionRejected(429, "Too many requests", retry_after)
+
+    async def acquire(self) -> None:
+        if self.enabled and not await self.concurrency.acquire():
+            self._reject("overload")
+            raise AdmissionRejected(503, "Server is busy", max(1.0, self.concurrency.max_wait))
+
+    def release(self) -> None:
+        if self.enabled:
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _reject(self, reason: str) -> None:
+        self.rejected[reason] += 1
+        metrics.inc("admission_rejected_total", reason=reason)
+
+    def reset(self) -> None:
+        self.rate_limiter.clear()
+        self.rejected = {"rate": 0, "overload": 0}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.concurrency.in_flight,
+            "waiting": self.concurrency.waiting,
+            "tracked_users": len(self.rate_limiter),
+            "rejected_rate": self.rejected["rate"],
+            "rejected_overload": self.rejected["overload"],
+        }
+
+
+admission = AdmissionController(
+    enabled=settings.admission_enabled,
+    rate=settings.rate_limit_per_second,
+    burst=settings.rate_limit_burst,
+    max_users=settings.user_cache_size,
+    concurrency=settings.concurrency_limit,
+    max_wait=settings.concurrency_max_wait_ms / 1000,
+)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import gzip
+from typing import Any, Callable
+
+from .metrics import metrics
+
+metrics.describe("gzip_bytes_saved_total", "Response bytes saved by gzip-compressing JSON bodies.")
+
+
+class GZipJSONMiddleware:
+    """Pure ASGI middleware gzip-compressing complete JSON responses of at least ``minimum_size`` bytes.
+
+    Unlike Starlette's ``GZipMiddleware`` it leaves streamed bodies (server-sent
+    events, exports) alone, so their chunks are still delivered as they are produced.
+    """
+
+    def __init__(self, app: Any, minimum_size: int = 1024, level: int = 6) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0 or not _accepts_gzip(scope):
+            await self.app(scope, receive, send)
+            return
+
+        start: dict = {}
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start:
+                if message["type"] == "http.response.body" and not message.get("more_body") and _compressible(start, message, self.minimum_size):
+                    body = message.get("body", b"")
+                    compressed = gzip.compress(body, self.level, mtime=0)
+                    if len(compressed) < len(body):
+                        metrics.inc("gzip_bytes_saved_total", len(body) - len(compressed))
+                        headers = [(name, value) for name, value in start["headers"] if name.lower() != b"content-length"]
+                        headers += [(b"content-encoding", b"gzip"), (b"content-length", str(len(compressed)).encode()), (b"vary", b"Accept-Encoding")]
+                        start = {**start, "headers": headers}
+                        message = {**message, "body": compressed}
+                await send(start)
+                start = {}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _accepts_gzip(scope: dict) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"accept-encoding":
+            return b"gzip" in value
+    return False
+
+
+def _compressible(start: dict, message: dict, minimum_size: int) -> bool:
+    if len(message.get("body", b"")) < minimum_size:
+        return False
+    content_type = b""
+    for name, value in start["headers"]:
+        lowered = name.lower()
+        if lowered == b"content-encoding":
+            return False
+        if lowered == b"content-type":
+            content_type = value
+    return content_type.startswith(b"application/json")
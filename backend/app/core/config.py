@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings, Field
 
 
@@ -6,6 +8,59 @@ class Settings(BaseSettings):
     secret_key: str = Field("super-secret-key-change-me", env="COMPANIONAI_SECRET_KEY")
     access_token_expire_minutes: int = 60 * 12
     database_url: str = Field("sqlite+aiosqlite:///./companionai.db", env="COMPANIONAI_DATABASE_URL")
+    database_profile: str = Field("default", env="COMPANIONAI_DATABASE_PROFILE")  # default | performance
+    database_pool_size: int = Field(10, env="COMPANIONAI_DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(20, env="COMPANIONAI_DATABASE_MAX_OVERFLOW")
+    database_pool_pre_ping: bool = Field(True, env="COMPANIONAI_DATABASE_POOL_PRE_PING")
+    database_pool_recycle_seconds: int = Field(1800, env="COMPANIONAI_DATABASE_POOL_RECYCLE_SECONDS")
+    # Replicas (or read-only SQLite connections) for read-only routes; empty reads from database_url.
+    database_read_urls: list[str] = Field(default_factory=list, env="COMPANIONAI_DATABASE_READ_URLS")
+    read_your_writes_seconds: float = Field(5.0, env="COMPANIONAI_READ_YOUR_WRITES_SECONDS")
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_cache_size_kib: int = 64_000
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    analyze_batch_max_texts: int = Field(10_000, env="COMPANIONAI_ANALYZE_BATCH_MAX_TEXTS")
+    cpu_executor: str = Field("thread", env="COMPANIONAI_CPU_EXECUTOR")  # thread | process | inline
+    cpu_executor_workers: int = Field(4, env="COMPANIONAI_CPU_EXECUTOR_WORKERS")
+    analysis_offload_min_chars: int = Field(2_000, env="COMPANIONAI_ANALYSIS_OFFLOAD_MIN_CHARS")
+    user_cache_size: int = Field(10_000, env="COMPANIONAI_USER_CACHE_SIZE")
+    user_cache_ttl_seconds: float = Field(60.0, env="COMPANIONAI_USER_CACHE_TTL_SECONDS")
+    write_behind_enabled: bool = Field(False, env="COMPANIONAI_WRITE_BEHIND_ENABLED")
+    write_behind_interval_ms: int = Field(50, env="COMPANIONAI_WRITE_BEHIND_INTERVAL_MS")
+    write_behind_batch_rows: int = Field(500, env="COMPANIONAI_WRITE_BEHIND_BATCH_ROWS")
+    write_behind_queue_rows: int = Field(10_000, env="COMPANIONAI_WRITE_BEHIND_QUEUE_ROWS")
+    write_behind_max_retries: int = Field(5, env="COMPANIONAI_WRITE_BEHIND_MAX_RETRIES")
+    write_behind_retry_backoff_ms: int = Field(100, env="COMPANIONAI_WRITE_BEHIND_RETRY_BACKOFF_MS")
+    reply_templates_path: Optional[str] = Field(None, env="COMPANIONAI_REPLY_TEMPLATES_PATH")
+    reply_backend: str = Field("template", env="COMPANIONAI_REPLY_BACKEND")  # template | stub
+    reply_backend_concurrency: int = Field(8, env="COMPANIONAI_REPLY_BACKEND_CONCURRENCY")
+    reply_backend_timeout_ms: int = Field(2_000, env="COMPANIONAI_REPLY_BACKEND_TIMEOUT_MS")
+    stub_reply_latency_ms: int = Field(200, env="COMPANIONAI_STUB_REPLY_LATENCY_MS")
+    stub_reply_jitter_ms: int = Field(50, env="COMPANIONAI_STUB_REPLY_JITTER_MS")
+    metrics_enabled: bool = Field(True, env="COMPANIONAI_METRICS_ENABLED")
+    loop_lag_interval_ms: int = Field(500, env="COMPANIONAI_LOOP_LAG_INTERVAL_MS")
+    gzip_minimum_bytes: int = Field(1024, env="COMPANIONAI_GZIP_MINIMUM_BYTES")  # 0 disables response compression
+    admission_enabled: bool = Field(True, env="COMPANIONAI_ADMISSION_ENABLED")
+    rate_limit_per_second: float = Field(5.0, env="COMPANIONAI_RATE_LIMIT_PER_SECOND")  # per user, expensive routes
+    rate_limit_burst: int = Field(20, env="COMPANIONAI_RATE_LIMIT_BURST")
+    concurrency_limit: int = Field(64, env="COMPANIONAI_CONCURRENCY_LIMIT")  # expensive requests in flight, all users
+    concurrency_max_wait_ms: int = Field(100, env="COMPANIONAI_CONCURRENCY_MAX_WAIT_MS")
+    mood_bulk_max_entries: int = Field(100_000, env="COMPANIONAI_MOOD_BULK_MAX_ENTRIES")
+    mood_bulk_max_bytes: int = Field(16 * 1024 * 1024, env="COMPANIONAI_MOOD_BULK_MAX_BYTES")
+    mood_bulk_max_line_bytes: int = Field(4096, env="COMPANIONAI_MOOD_BULK_MAX_LINE_BYTES")
+    mood_trends_max_users: int = Field(10_000, env="COMPANIONAI_MOOD_TRENDS_MAX_USERS")
+    mood_trends_idle_seconds: float = Field(3_600.0, env="COMPANIONAI_MOOD_TRENDS_IDLE_SECONDS")
+    mood_trends_half_life_days: float = Field(7.0, env="COMPANIONAI_MOOD_TRENDS_HALF_LIFE_DAYS")
+    mood_trends_snapshot_interval_seconds: float = Field(60.0, env="COMPANIONAI_MOOD_TRENDS_SNAPSHOT_INTERVAL_SECONDS")
+    retention_enabled: bool = Field(True, env="COMPANIONAI_RETENTION_ENABLED")
+    retention_default_days: Optional[int] = Field(None, env="COMPANIONAI_RETENTION_DEFAULT_DAYS")  # None keeps history forever
+    retention_interval_seconds: float = Field(3_600.0, env="COMPANIONAI_RETENTION_INTERVAL_SECONDS")
+    retention_batch_rows: int = Field(500, env="COMPANIONAI_RETENTION_BATCH_ROWS")
+    retention_batch_pause_ms: int = Field(20, env="COMPANIONAI_RETENTION_BATCH_PAUSE_MS")
+    retention_archive: bool = Field(False, env="COMPANIONAI_RETENTION_ARCHIVE")  # compress expired turns into chat_archives
+    retention_vacuum_pages: int = Field(2_000, env="COMPANIONAI_RETENTION_VACUUM_PAGES")
     allowed_origins: list[str] = Field(default_factory=lambda: ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:5500"])
 
     class Config:
@@ -1,15 +1,201 @@
-from collections.abc import AsyncGenerator
+import itertools
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any, Callable, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import Column, Integer, Table, delete, event, inspect, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from .config import settings
+from ..utils.cache import TTLCache
+from .config import Settings, settings
+from .metrics import instrument_engine
 
-engine = create_async_engine(settings.database_url, future=True, echo=False)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 Base = declarative_base()
 
+# Bump whenever a model adds a table or index so existing databases get ``create_all`` once more.
+SCHEMA_VERSION = 7
+
+schema_info = Table("schema_info", Base.metadata, Column("version", Integer, nullable=False))
+
+# Extra DDL that SQLAlchemy metadata cannot express (e.g. SQLite FTS tables), run by ``ensure_schema``.
+schema_hooks: list[Callable[[Any], None]] = []
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def sqlite_pragmas(config: Settings) -> dict[str, Any]:
+    """Connect-time pragmas for the ``performance`` profile.
+
+    WAL lets readers proceed while a writer commits, ``synchronous=NORMAL`` is
+    durable under WAL except for power loss, and ``busy_timeout`` turns lock
+    contention into a short wait instead of ``database is locked`` errors.
+    """
+    return {
+        "journal_mode": config.sqlite_journal_mode,
+        "synchronous": config.sqlite_synchronous,
+        "busy_timeout": config.sqlite_busy_timeout_ms,
+        "cache_size": -config.sqlite_cache_size_kib,
+        "mmap_size": config.sqlite_mmap_size_bytes,
+        "temp_store": "MEMORY",
+    }
+
+
+def engine_options(config: Settings) -> dict[str, Any]:
+    options: dict[str, Any] = {"future": True, "echo": False}
+    if config.database_profile != "performance":
+        return options
+    if _is_sqlite(config.database_url) and _is_memory_sqlite(config.database_url):
+        # In-memory SQLite uses a single static connection; pool sizing does not apply.
+        return options
+    if _is_sqlite(config.database_url):
+        # aiosqlite defaults to NullPool (a new connection, and new pragmas, per checkout).
+        options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_pre_ping=config.database_pool_pre_ping,
+        pool_recycle=config.database_pool_recycle_seconds,
+    )
+    return options
+
+
+def build_engine(config: Settings = settings, url: Optional[str] = None, read_only: bool = False) -> AsyncEngine:
+    """Engine for ``url`` (default ``config.database_url``).
+
+    ``read_only`` SQLite engines get ``query_only`` and never try to change the
+    journal mode, so they also work on ``?mode=ro`` connections.
+    """
+    if config.database_profile not in ("default", "performance"):
+        raise ValueError(f"Unknown database profile {config.database_profile!r}")
+    url = url or config.database_url
+    new_engine = create_async_engine(url, **engine_options(config.copy(update={"database_url": url})))
+    if _is_sqlite(url) and (read_only or config.database_profile == "performance"):
+        pragmas = sqlite_pragmas(config) if config.database_profile == "performance" else {}
+        if read_only:
+            pragmas.pop("journal_mode", None)
+            pragmas["query_only"] = "ON"
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    instrument_engine(new_engine)
+    return new_engine
+
+
+def create_missing_indexes(connection) -> None:
+    """Add indexes declared after a table was first created (``create_all`` skips existing tables)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_missing_columns(connection) -> None:
+    """Add nullable columns declared after a table was first created (``create_all`` skips existing tables)."""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable and column.server_default is None:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+
+
+def stored_schema_version(connection) -> Optional[int]:
+    if not inspect(connection).has_table(schema_info.name):
+        return None
+    return connection.execute(select(schema_info.c.version)).scalar()
+
+
+def ensure_schema(connection) -> bool:
+    """Create tables and indexes unless the database is already at ``SCHEMA_VERSION``.
+
+    Returns whether the schema was (re)applied, so one-off backfills can run only then.
+    """
+    version = stored_schema_version(connection)
+    if version == SCHEMA_VERSION:
+        return False
+    if version is None and _is_sqlite(str(connection.engine.url)) and not inspect(connection).get_table_names():
+        # Only possible before the first table exists; lets the retention job return freed pages to the OS.
+        connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+    add_missing_columns(connection)
+    Base.metadata.create_all(connection)
+    create_missing_indexes(connection)
+    for hook in schema_hooks:
+        hook(connection)
+    connection.execute(delete(schema_info))
+    connection.execute(insert(schema_info).values(version=SCHEMA_VERSION))
+    return True
+
+
+# The engine is created on first use (normally by the app lifespan), not at import time,
+# so importing the app stays cheap and scripts can adjust settings first.
+engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False)
+# Engines for ``settings.database_read_urls``, created alongside the primary one.
+read_engines: list[AsyncEngine] = []
+_next_read_engine: Optional[Iterator[AsyncEngine]] = None
+
+# user id -> True while that user's reads must see their own recent writes (see ``mark_written``).
+recent_writers: TTLCache[bool] = TTLCache(settings.user_cache_size, settings.read_your_writes_seconds)
+
+
+def get_engine() -> AsyncEngine:
+    global engine, _next_read_engine
+    if engine is None:
+        engine = build_engine(settings)
+        AsyncSessionLocal.configure(bind=engine)
+        read_engines[:] = [build_engine(settings, url, read_only=True) for url in settings.database_read_urls]
+        _next_read_engine = itertools.cycle(read_engines) if read_engines else None
+    return engine
+
+
+async def dispose_engine() -> None:
+    global engine, _next_read_engine
+    for read_engine in read_engines:
+        await read_engine.dispose()
+    read_engines.clear()
+    _next_read_engine = None
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+        AsyncSessionLocal.configure(bind=None)
+
+
+def mark_written(user_id: int) -> None:
+    """Route the user's reads to the primary for ``read_your_writes_seconds``, so replica lag never hides their own writes."""
+    if read_engines:
+        recent_writers.set(user_id, True)
+
+
+def read_engine_for(user_id: Optional[int]) -> AsyncEngine:
+    """Next read engine in rotation; the primary when none are configured or the user wrote recently."""
+    primary = get_engine()
+    if _next_read_engine is None or (user_id is not None and recent_writers.get(user_id)):
+        return primary
+    return next(_next_read_engine)
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    get_engine()
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session(user_id: Optional[int] = None) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal(bind=read_engine_for(user_id)) as session:
+        yield session
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+def _timed_call(func: Callable[..., T], args: tuple[Any, ...]) -> tuple[float, T]:
+    # Runs inside the worker; ``time.monotonic`` is system-wide so it is comparable across processes.
+    started_at = time.monotonic()
+    return started_at, func(*args)
+
+
+class CPUExecutor:
+    """Runs CPU-heavy callables (bcrypt, text analysis) off the event loop.
+
+    ``kind`` selects a thread pool, a process pool, or ``inline`` execution on the
+    loop (useful as a benchmark baseline).  The pool is created on first use so
+    importing the app stays cheap, and callables must be module-level functions
+    when the process pool is selected.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4) -> None:
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind {kind!r}; expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[Executor] = None
+        self.submitted = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="companionai-cpu")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a free worker (the pools serve submissions in FIFO order)."""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        self.submitted += 1
+        if self.kind == "inline":
+            try:
+                return func(*args)
+            finally:
+                self.completed += 1
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            started_at, result = await loop.run_in_executor(self._get_pool(), _timed_call, func, args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+        wait = max(0.0, started_at - submitted_at)
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+cpu_executor = CPUExecutor(settings.cpu_executor, settings.cpu_executor_workers)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any) -> T:
+    return await cpu_executor.run(func, *args)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+
+from ..utils.histogram import Histogram
+from .config import settings
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Per-request mutable query counter; SQLAlchemy's greenlets inherit the request's context.
+_query_counter: ContextVar[Optional[list[int]]] = ContextVar("companionai_query_counter", default=None)
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.enabled = settings.metrics_enabled
+        self.counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self.histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self.help: dict[str, str] = {}
+        # Gauges and component-owned histograms are collected at scrape time.
+        self.gauge_sources: list[Callable[[], dict[tuple[str, tuple[tuple[str, str], ...]], float]]] = []
+        self.histogram_sources: list[Callable[[], dict[tuple[str, tuple[tuple[str, str], ...]], Histogram]]] = []
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, buckets: Optional[tuple[float, ...]] = None, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets) if buckets else Histogram()
+        histogram.observe(value)
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.histograms.clear()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        seen: set[str] = set()
+
+        def header(name: str, kind: str) -> None:
+            if name not in seen:
+                seen.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        gauges: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        for source in self.gauge_sources:
+            gauges.update(source())
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        histograms = dict(self.histograms)
+        for source in self.histogram_sources:
+            histograms.update(source())
+        for (name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            header(name, "histogram")
+            for bound, count in histogram.cumulative():
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:g}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "HTTP requests by route, method and status.")
+metrics.describe("http_request_duration_seconds", "HTTP request latency by route.")
+metrics.describe("http_request_db_queries", "Database statements executed per HTTP request.")
+metrics.describe("chat_stage_duration_seconds", "Time spent in each handle_chat stage.")
+metrics.describe("event_loop_lag_seconds", "Delay between when the loop-lag probe should wake and when it ran.")
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    if not metrics.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("chat_stage_duration_seconds", time.perf_counter() - started, stage=stage)
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count statements against the current request (see ``MetricsMiddleware``)."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        counter = _query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts, latency and DB query counts."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        counter = [0]
+        token = _query_counter.set(counter)
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_counter.reset(token)
+            route = scope.get("route")
+            # Label by route template, never the raw path, to keep cardinality bounded.
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.inc("http_requests_total", route=path, method=scope["method"], status=str(status_code))
+            metrics.observe("http_request_duration_seconds", elapsed, route=path, method=scope["method"])
+            metrics.observe("http_request_db_queries", counter[0], QUERY_COUNT_BUCKETS, route=path)
+
+
+class LoopLagMonitor:
+    """Samples event-loop responsiveness by timing how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="companionai-loop-lag")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            metrics.observe("event_loop_lag_seconds", self.last_lag, LOOP_LAG_BUCKETS)
+
+
+loop_lag_monitor = LoopLagMonitor(settings.loop_lag_interval_ms / 1000)
+metrics.gauge_sources.append(lambda: {("event_loop_lag_last_seconds", ()): loop_lag_monitor.last_lag})
@@ -1,15 +1,26 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
 
 from .config import settings
+from .executor import run_cpu_bound
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# passlib/bcrypt and python-jose are imported on first use to keep app start-up fast.
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=1)
+def pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
@@ -18,14 +29,24 @@ def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta]
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_cpu_bound(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_cpu_bound(get_password_hash, password)
 
 
 def decode_access_token(token: str) -> dict[str, Any]:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
     except JWTError as exc:
@@ -4,32 +4,59 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api import auth, chat, mood, users
+from .api import auth, chat, metrics, mood, sync, users
+from .core.compression import GZipJSONMiddleware
 from .core.config import settings
-from .core.database import Base, engine
+from .core.database import AsyncSessionLocal, dispose_engine, ensure_schema, get_engine
+from .core.executor import cpu_executor
+from .core.metrics import MetricsMiddleware, loop_lag_monitor
+from .services.mood_summary import rebuild_if_missing
+from .services.mood_trends import mood_trends
+from .services.retention import retention_job
+from .services.write_behind import chat_writer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    async with get_engine().begin() as conn:
+        schema_applied = await conn.run_sync(ensure_schema)
+    if schema_applied:
+        async with AsyncSessionLocal() as session:
+            await rebuild_if_missing(session)
+    if settings.write_behind_enabled:
+        chat_writer.start()
+    if settings.metrics_enabled:
+        loop_lag_monitor.start()
+    mood_trends.start()
+    if settings.retention_enabled:
+        retention_job.start()
     yield
-    # Databases are auto-closed by SQLAlchemy when engine is garbage collected.
+    await retention_job.stop()
+    await loop_lag_monitor.stop()
+    await mood_trends.stop()
+    await chat_writer.stop()
+    cpu_executor.shutdown()
+    await dispose_engine()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app.add_middleware(GZipJSONMiddleware, minimum_size=settings.gzip_minimum_bytes)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins + ["http://localhost:8000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(chat.router)
 app.include_router(mood.router)
+app.include_router(sync.router)
+app.include_router(metrics.router)
 
 
 @app.get("/health")
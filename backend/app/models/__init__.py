@@ -1,5 +1,5 @@
 from .user import User
-from .chat import ChatMessage
-from .mood import MoodEntry
+from .chat import ChatArchive, ChatMessage
+from .mood import MoodDailyCount, MoodEntry, MoodEntryTombstone, MoodTrendSnapshot
 
-__all__ = ["User", "ChatMessage", "MoodEntry"]
+__all__ = ["User", "ChatMessage", "ChatArchive", "MoodEntry", "MoodEntryTombstone", "MoodDailyCount", "MoodTrendSnapshot"]
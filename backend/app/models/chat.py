@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -8,6 +8,10 @@ from ..core.database import Base
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_chat_messages_user_change", "user_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -16,5 +20,22 @@ class ChatMessage(Base):
     sentiment = Column(String, default="neutral")
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Position in the owner's change sequence; NULL for rows stored before /sync existed.
+    change_seq = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="messages")
+
+
+class ChatArchive(Base):
+    """A batch of expired chat messages compacted into one zlib-compressed JSON blob."""
+
+    __tablename__ = "chat_archives"
+    __table_args__ = (Index("ix_chat_archives_user_first", "user_id", "first_created_at"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
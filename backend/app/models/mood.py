@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -8,6 +8,10 @@ from ..core.database import Base
 
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
+    __table_args__ = (
+        Index("ix_mood_entries_user_date", "user_id", "mood_date"),
+        Index("ix_mood_entries_user_change", "user_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -15,5 +19,44 @@ class MoodEntry(Base):
     source = Column(String, default="chat")
     created_at = Column(DateTime, default=datetime.utcnow)
     mood_date = Column(Date, default=date.today, index=True)
+    # Position in the owner's change sequence; NULL for rows stored before /sync existed.
+    change_seq = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="mood_entries")
+
+
+class MoodEntryTombstone(Base):
+    """Records a deleted ``MoodEntry`` so ``/sync`` clients can drop their copy."""
+
+    __tablename__ = "mood_entry_tombstones"
+    __table_args__ = (Index("ix_mood_entry_tombstones_user_change", "user_id", "change_seq"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entry_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MoodDailyCount(Base):
+    """Per-user, per-day rollup of ``MoodEntry`` rows, kept in step on insert and delete."""
+
+    __tablename__ = "mood_daily_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    mood_date = Column(Date, primary_key=True)
+    mood = Column(String, primary_key=True)
+    source = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class MoodTrendSnapshot(Base):
+    """Periodic copy of a user's in-memory trend statistics (see ``services.mood_trends``)."""
+
+    __tablename__ = "mood_trend_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    state = Column(Text, nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    # The user's change sequence position the state covers; NULL for snapshots taken before it was tracked.
+    change_seq = Column(Integer, nullable=True)
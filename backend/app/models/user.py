@@ -14,6 +14,12 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     display_name = Column(String, default="Companion User")
     history_enabled = Column(Boolean, default=True)
+    # Days of chat history to keep; NULL falls back to ``settings.retention_default_days``.
+    history_retention_days = Column(Integer, nullable=True)
+    # Last value handed out from this user's change sequence (see ``services.sync``); NULL means 0.
+    change_seq = Column(Integer, nullable=True, default=0)
+    # Incremented by every profile update; part of the profile and history ETags. NULL means 0.
+    profile_version = Column(Integer, nullable=True, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     messages = relationship("ChatMessage", back_populates="user", cascade="all, delete-orphan")
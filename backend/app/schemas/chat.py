@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -28,3 +28,20 @@ class ChatMessagePublic(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ChatSearchHit(BaseModel):
+    id: int
+    sender: str
+    created_at: datetime
+    snippet: str
+    score: Optional[float] = None
+
+
+class AnalyzeBatchRequest(BaseModel):
+    texts: List[str]
+
+
+class TextAnalysis(BaseModel):
+    language: str
+    sentiment: str
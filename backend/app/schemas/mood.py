@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -21,5 +21,36 @@ class MoodEntryPublic(BaseModel):
         orm_mode = True
 
 
+class MoodBulkImportResult(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int
+
+
 class MoodSeries(BaseModel):
     entries: List[MoodEntryPublic]
+
+
+class MoodSummaryBucket(BaseModel):
+    period_start: date
+    total: int
+    moods: Dict[str, int]
+    sources: Dict[str, int]
+
+
+class MoodTrendWindow(BaseModel):
+    days: int
+    total: int
+    moods: Dict[str, int]
+
+
+class MoodTrends(BaseModel):
+    as_of: Optional[datetime]
+    windows: List[MoodTrendWindow]
+    sentiment_score: float
+    sentiment_weight: float
+    sentiment_samples: int
+    half_life_days: float
+    current_streak_days: int
+    longest_streak_days: int
+    last_active_date: Optional[date]
@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from .chat import ChatMessagePublic
+from .mood import MoodEntryPublic
+
+
+class SyncChanges(BaseModel):
+    token: int
+    messages: List[ChatMessagePublic]
+    mood_entries: List[MoodEntryPublic]
+    deleted_mood_entries: List[int]
+    has_more: bool
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, constr
+from pydantic import BaseModel, conint, constr
 
 
 # Pydantic's ``EmailStr`` type depends on the optional ``email_validator`` package.
@@ -29,6 +29,7 @@ class UserPublic(BaseModel):
     email: EmailStr
     display_name: str
     history_enabled: bool
+    history_retention_days: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -38,3 +39,5 @@ class UserPublic(BaseModel):
 class UserUpdateSettings(BaseModel):
     history_enabled: Optional[bool] = None
     display_name: Optional[str] = None
+    # Sending null explicitly restores the server-wide default.
+    history_retention_days: Optional[conint(ge=1)] = None
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from ..core.config import settings
+from ..core.executor import run_cpu_bound
+from ..utils.matcher import MultiPatternMatcher
+from .lexicons import COMMON_LANGUAGE_MARKERS, NEGATIVE_WORDS, POSITIVE_WORDS
+
+POSITIVE = "sentiment:positive"
+NEGATIVE = "sentiment:negative"
+
+
+@dataclass(frozen=True)
+class Analysis:
+    language: str
+    sentiment: str
+
+
+def build_matcher() -> MultiPatternMatcher:
+    lexicons: dict[str, set[str]] = {lang: markers for lang, markers in COMMON_LANGUAGE_MARKERS.items()}
+    lexicons[POSITIVE] = POSITIVE_WORDS
+    lexicons[NEGATIVE] = NEGATIVE_WORDS
+    return MultiPatternMatcher(lexicons)
+
+
+# Compiled once at import; rebuild with ``build_matcher`` after mutating the lexicons.
+matcher = build_matcher()
+
+
+def language_from_scores(scores: dict[str, int], lowered: str) -> str:
+    best_lang, best_score = None, 0
+    # Ties resolve to the first language in marker order, as ``Counter.most_common`` did.
+    for lang in COMMON_LANGUAGE_MARKERS:
+        if scores.get(lang, 0) > best_score:
+            best_lang, best_score = lang, scores[lang]
+    if best_lang is not None:
+        return best_lang
+    if any(ch in lowered for ch in {"¿", "¡", "ñ"}):
+        return "es"
+    if any(ch in lowered for ch in {"é", "è", "ç", "à"}):
+        return "fr"
+    if any(ord(ch) > 127 for ch in lowered):
+        return "hi"
+    return "en"
+
+
+def sentiment_from_scores(scores: dict[str, int]) -> str:
+    positive_hits = scores.get(POSITIVE, 0)
+    negative_hits = scores.get(NEGATIVE, 0)
+    if positive_hits > negative_hits:
+        return "positive"
+    if negative_hits > positive_hits:
+        return "negative"
+    return "neutral"
+
+
+def analyze_text(text: str) -> Analysis:
+    """Detect language and sentiment with a single pass of the shared matcher."""
+    return _analyze_lowered(text.lower())
+
+
+async def analyze_text_async(text: str) -> Analysis:
+    """Like ``analyze_text`` but moves long messages to the CPU executor."""
+    if len(text) < settings.analysis_offload_min_chars:
+        return analyze_text(text)
+    return await run_cpu_bound(analyze_text, text)
+
+
+def _analyze_lowered(lowered: str) -> Analysis:
+    scores = matcher.count(lowered)
+    return Analysis(language=language_from_scores(scores, lowered), sentiment=sentiment_from_scores(scores))
+
+
+def analyze_batch(texts: Iterable[str]) -> list[Analysis]:
+    """Analyse many texts in one call: duplicates are folded, then each distinct text runs the shared matcher.
+
+    There is no vectorised counting; a batch of unique texts costs about the same as
+    calling ``analyze_text`` on each, and only repeated texts are cheaper.
+    """
+    lowered_texts = [text.lower() for text in texts]
+    results: dict[str, Analysis] = {}
+    for lowered in lowered_texts:
+        if lowered not in results:
+            results[lowered] = _analyze_lowered(lowered)
+    return [results[lowered] for lowered in lowered_texts]
+
+
+async def analyze_batch_async(texts: list[str]) -> list[Analysis]:
+    return await run_cpu_bound(analyze_batch, texts)
@@ -1,14 +1,109 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core import database
+from ..core.config import settings
+from ..core.metrics import stage_timer
 from ..models.chat import ChatMessage
 from ..models.mood import MoodEntry
 from ..models.user import User
 from ..schemas.chat import ChatRequest, ChatResponse
-from ..services.language import detect_language, format_reply
-from ..services.sentiment import detect_sentiment, mood_from_sentiment
+from ..services.analysis import analyze_text_async
+from ..services.mood_summary import apply_mood_counts
+from ..services.mood_trends import mood_trends
+from ..services.reply_backends import reply_service
+from ..services.sentiment import mood_from_sentiment
+from ..services.sync import assign_change_seqs
+from ..services.write_behind import chat_writer
+
+
+@dataclass
+class ChatTurn:
+    message: str
+    language: str
+    sentiment: str
+    mood: str
+    timestamp: datetime
+    reply: str = ""
+
+
+async def analyze_chat_turn(payload: ChatRequest) -> ChatTurn:
+    """Detect language, sentiment and mood; the reply is filled in by ``generate_reply``."""
+    with stage_timer("analysis"):
+        analysis = await analyze_text_async(payload.message)
+    language = payload.language or analysis.language
+    sentiment = analysis.sentiment
+    facial_mood = payload.include_facial_mood or ""
+    mood = facial_mood or mood_from_sentiment(sentiment)
+    return ChatTurn(message=payload.message, language=language, sentiment=sentiment, mood=mood, timestamp=datetime.utcnow())
+
+
+async def generate_reply(turn: ChatTurn) -> ChatTurn:
+    with stage_timer("reply"):
+        turn.reply = await reply_service.reply(turn.language, turn.message, turn.sentiment)
+    return turn
+
+
+async def prepare_chat_turn(payload: ChatRequest) -> ChatTurn:
+    """Analyse the message and build the reply without touching the database."""
+    return await generate_reply(await analyze_chat_turn(payload))
+
+
+async def persist_chat_turn(session: AsyncSession, user: User, turn: ChatTurn) -> None:
+    if not user.history_enabled:
+        return
+
+    user_message = ChatMessage(
+        user_id=user.id,
+        sender="user",
+        language=turn.language,
+        sentiment=turn.sentiment,
+        content=turn.message,
+        created_at=turn.timestamp,
+    )
+    ai_message = ChatMessage(
+        user_id=user.id,
+        sender="ai",
+        language=turn.language,
+        sentiment=turn.sentiment,
+        content=turn.reply,
+        created_at=turn.timestamp,
+    )
+    mood_entry = MoodEntry(
+        user_id=user.id, mood=turn.mood, source="chat", mood_date=turn.timestamp.date(), created_at=turn.timestamp
+    )
+    if settings.write_behind_enabled:
+        with stage_timer("db_enqueue"):
+            await chat_writer.submit([user_message, ai_message, mood_entry])
+    else:
+        with stage_timer("db_commit"):
+            # ``user`` may be a cached snapshot; the stored opt-out flag is re-checked under the write lock.
+            rows = await assign_change_seqs(session, [user_message, ai_message, mood_entry], history_only=True)
+            session.add_all(rows)
+            await apply_mood_counts(session, rows, 1)
+            await session.commit()
+        if rows:
+            mood_trends.record(user.id, rows)
+
+
+async def persist_chat_turn_in_new_session(user: User, turn: ChatTurn) -> None:
+    """Persist a turn after its response was sent, when the request session is already closed."""
+    if not turn.reply:
+        # The client went away before a reply was generated; there is no complete turn to store.
+        return
+    async with database.AsyncSessionLocal() as session:
+        await persist_chat_turn(session, user, turn)
+
+
+def reply_chunks(reply: str, words_per_chunk: int = 4) -> Iterator[str]:
+    """Split a reply into word groups (keeping the separators) for incremental delivery."""
+    words = reply.split(" ")
+    for index in range(0, len(words), words_per_chunk):
+        chunk = " ".join(words[index : index + words_per_chunk])
+        yield chunk if index + words_per_chunk >= len(words) else chunk + " "
 
 
 async def handle_chat(
@@ -17,34 +112,6 @@ async def handle_chat(
     user: User,
     payload: ChatRequest,
 ) -> ChatResponse:
-    language = payload.language or detect_language(payload.message)
-    sentiment = detect_sentiment(payload.message)
-    facial_mood = payload.include_facial_mood or ""
-    mood = facial_mood or mood_from_sentiment(sentiment)
-    reply_text = format_reply(language, payload.message, sentiment)
-
-    timestamp = datetime.utcnow()
-
-    if user.history_enabled:
-        user_message = ChatMessage(
-            user_id=user.id,
-            sender="user",
-            language=language,
-            sentiment=sentiment,
-            content=payload.message,
-            created_at=timestamp,
-        )
-        ai_message = ChatMessage(
-            user_id=user.id,
-            sender="ai",
-            language=language,
-            sentiment=sentiment,
-            content=reply_text,
-            created_at=timestamp,
-        )
-        session.add_all([user_message, ai_message])
-        mood_entry = MoodEntry(user_id=user.id, mood=mood, source="chat", mood_date=timestamp.date())
-        session.add(mood_entry)
-        await session.commit()
-
-    return ChatResponse(reply=reply_text, language=language, sentiment=sentiment, mood=mood, timestamp=timestamp)
+    turn = await prepare_chat_turn(payload)
+    await persist_chat_turn(session, user, turn)
+    return ChatResponse(reply=turn.reply, language=turn.language, sentiment=turn.sentiment, mood=turn.mood, timestamp=turn.timestamp)
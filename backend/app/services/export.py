@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from sqlalchemy import select
+
+from ..core import database
+from ..models.chat import ChatMessage
+from ..models.mood import MoodEntry
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_BATCH_ROWS = 1_000
+
+CSV_COLUMNS = ["type", "id", "created_at", "sender", "language", "sentiment", "content", "mood", "source", "mood_date"]
+
+_CHAT_COLUMNS = (
+    ChatMessage.id,
+    ChatMessage.created_at,
+    ChatMessage.sender,
+    ChatMessage.language,
+    ChatMessage.sentiment,
+    ChatMessage.content,
+)
+_MOOD_COLUMNS = (MoodEntry.id, MoodEntry.created_at, MoodEntry.mood, MoodEntry.source, MoodEntry.mood_date)
+
+
+def _isoformat(value: Any) -> Any:
+    return value.isoformat() if value is not None else None
+
+
+async def _export_records(user_id: int) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield the user's messages, then mood entries, a batch at a time from server-side cursors."""
+    async with database.AsyncSessionLocal() as session:
+        chats = await session.stream(
+            select(*_CHAT_COLUMNS)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.created_at, ChatMessage.id)
+            .execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for rows in chats.partitions():
+            yield [
+                {
+                    "type": "chat_message",
+                    "id": row.id,
+                    "created_at": _isoformat(row.created_at),
+                    "sender": row.sender,
+                    "language": row.language,
+                    "sentiment": row.sentiment,
+                    "content": row.content,
+                }
+                for row in rows
+            ]
+
+        moods = await session.stream(
+            select(*_MOOD_COLUMNS)
+            .where(MoodEntry.user_id == user_id)
+            .order_by(MoodEntry.mood_date, MoodEntry.id)
+            .execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for rows in moods.partitions():
+            yield [
+                {
+                    "type": "mood_entry",
+                    "id": row.id,
+                    "created_at": _isoformat(row.created_at),
+                    "mood": row.mood,
+                    "source": row.source,
+                    "mood_date": _isoformat(row.mood_date),
+                }
+                for row in rows
+            ]
+
+
+async def export_ndjson(user_id: int) -> AsyncIterator[bytes]:
+    async for records in _export_records(user_id):
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode()
+
+
+async def export_csv(user_id: int) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    async for records in _export_records(user_id):
+        writer.writerows(records)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_stream(user_id: int, export_format: str) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        return export_csv(user_id)
+    return export_ndjson(user_id)
@@ -1,62 +1,107 @@
 from __future__ import annotations
 
-from collections import Counter
-from typing import Iterable
+import json
+import string
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
 
-COMMON_LANGUAGE_MARKERS = {
-    "en": {"the", "you", "is", "friend", "hello"},
-    "es": {"hola", "gracias", "amigo", "estoy", "buen"},
-    "fr": {"bonjour", "merci", "ami", "bien", "suis"},
-    "hi": {"namaste", "dhanyavad", "dost", "kaise", "hain"},
-}
+from ..core.config import settings
+from .analysis import analyze_text
+from .lexicons import COMMON_LANGUAGE_MARKERS  # noqa: F401  (re-exported)
+
+DEFAULT_TEMPLATES_PATH = Path(__file__).parent / "data" / "reply_templates.json"
+MEMO_MAX_MESSAGE_CHARS = 64
+
+
+class ReplyTemplates:
+    """Reply templates compiled once into ``(language, sentiment) -> (head, tail)`` pairs.
+
+    A reply is ``head + message + tail``; unknown languages or sentiments fall back
+    to the English template and the neutral line, as the original inline tables did.
+    Templates use ``str.format`` syntax: exactly one ``{message}``, any number of
+    ``{sentiment_line}``, and ``{{``/``}}`` for literal braces.
+    """
+
+    def __init__(self, templates: dict[str, str], sentiment_lines: dict[str, dict[str, str]]) -> None:
+        if "en" not in templates or "neutral" not in sentiment_lines or "en" not in sentiment_lines["neutral"]:
+            raise ValueError("Reply templates need an 'en' template and an 'en' neutral sentiment line")
+        for language, template in templates.items():
+            fields = [field for _, field, _, _ in self._parse(language, template) if field is not None]
+            if fields.count("message") != 1 or not set(fields) <= {"message", "sentiment_line"}:
+                raise ValueError(f"Reply template {language!r} needs exactly one {{message}} and no fields but {{sentiment_line}}")
+        self.templates = templates
+        self.sentiment_lines = sentiment_lines
+        self.table: dict[tuple[str, str], tuple[str, str]] = {
+            (language, sentiment): self._compile(language, sentiment) for language in templates for sentiment in sentiment_lines
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "ReplyTemplates":
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        return cls(data["templates"], data["sentiment_lines"])
+
+    @staticmethod
+    def _parse(language: str, template: str) -> list[tuple[str, Optional[str], Optional[str], Optional[str]]]:
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError as exc:
+            raise ValueError(f"Reply template {language!r} is malformed: {exc}") from exc
+        if any(spec or conversion for _, _, spec, conversion in parsed):
+            raise ValueError(f"Reply template {language!r} may not use format specs or conversions")
+        return parsed
+
+    def _compile(self, language: str, sentiment: str) -> tuple[str, str]:
+        template = self.templates.get(language, self.templates["en"])
+        neutral = self.sentiment_lines["neutral"]
+        sentiment_line = self.sentiment_lines.get(sentiment, neutral).get(language, neutral["en"])
+        # ``Formatter.parse`` unescapes doubled braces in the literal text, as ``str.format`` would.
+        head: list[str] = []
+        tail: list[str] = []
+        current = head
+        for literal, field, _, _ in self._parse(language, template):
+            current.append(literal)
+            if field == "sentiment_line":
+                current.append(sentiment_line)
+            elif field == "message":
+                current = tail
+        return "".join(head), "".join(tail)
+
+    def parts(self, language: str, sentiment: str) -> tuple[str, str]:
+        compiled = self.table.get((language, sentiment))
+        if compiled is None:
+            compiled = self._compile(language, sentiment)
+        return compiled
+
+
+def load_reply_templates(path: Optional[str] = None) -> ReplyTemplates:
+    return ReplyTemplates.load(Path(path) if path else DEFAULT_TEMPLATES_PATH)
+
+
+reply_templates = load_reply_templates(settings.reply_templates_path)
 
 
 def detect_language(text: str) -> str:
-    lowered = text.lower()
-    scores = Counter({lang: 0 for lang in COMMON_LANGUAGE_MARKERS})
-    for lang, markers in COMMON_LANGUAGE_MARKERS.items():
-        for marker in markers:
-            if marker in lowered:
-                scores[lang] += 1
-    if any(scores.values()):
-        return scores.most_common(1)[0][0]
-    if any(ch in lowered for ch in {"¿", "¡", "ñ"}):
-        return "es"
-    if any(ch in lowered for ch in {"é", "è", "ç", "à"}):
-        return "fr"
-    if any(ord(ch) > 127 for ch in lowered):
-        return "hi"
-    return "en"
+    return analyze_text(text).language
+
+
+def _render_reply(language: str, message: str, sentiment: str) -> str:
+    head, tail = reply_templates.parts(language, sentiment)
+    return head + message + tail
+
+
+_render_short_reply = lru_cache(maxsize=4096)(_render_reply)
 
 
 def format_reply(language: str, message: str, sentiment: str) -> str:
-    templates: dict[str, str] = {
-        "en": "I hear you. {sentiment_line} You said: '{message}'.",
-        "es": "Te escucho. {sentiment_line} Dijiste: '{message}'.",
-        "fr": "Je t'écoute. {sentiment_line} Tu as dit : '{message}'.",
-        "hi": "मैं सुन रहा हूँ। {sentiment_line} आपने कहा: '{message}'.",
-    }
-    sentiment_lines = {
-        "positive": {
-            "en": "That sounds uplifting!",
-            "es": "¡Eso suena alentador!",
-            "fr": "Cela semble encourageant !",
-            "hi": "यह बहुत अच्छा लग रहा है!",
-        },
-        "negative": {
-            "en": "I'm sorry you're feeling this way.",
-            "es": "Siento que te sientas así.",
-            "fr": "Je suis désolé que tu te sentes ainsi.",
-            "hi": "मुझे अफ़सोस है कि आप ऐसा महसूस कर रहे हैं।",
-        },
-        "neutral": {
-            "en": "Thanks for sharing with me.",
-            "es": "Gracias por compartir conmigo.",
-            "fr": "Merci de partager avec moi.",
-            "hi": "मुझसे साझा करने के लिए धन्यवाद।",
-        },
-    }
-
-    template = templates.get(language, templates["en"])
-    sentiment_line = sentiment_lines.get(sentiment, sentiment_lines["neutral"]).get(language, sentiment_lines["neutral"]["en"])
-    return template.format(sentiment_line=sentiment_line, message=message)
+    if len(message) <= MEMO_MAX_MESSAGE_CHARS:
+        return _render_short_reply(language, message, sentiment)
+    return _render_reply(language, message, sentiment)
+
+
+def use_reply_templates(templates: ReplyTemplates) -> None:
+    """Swap the active templates (e.g. after editing the data file) and drop memoised replies."""
+    global reply_templates
+    reply_templates = templates
+    _render_short_reply.cache_clear()
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+POSITIVE_WORDS = {"happy", "great", "fantastic", "amazing", "love", "उत्साहित", "खुश", "bien", "genial", "merci", "gracias"}
+NEGATIVE_WORDS = {"sad", "tired", "angry", "bad", "hate", "alone", "triste", "mal", "désolé", "दुखी", "थका"}
+
+COMMON_LANGUAGE_MARKERS = {
+    "en": {"the", "you", "is", "friend", "hello"},
+    "es": {"hola", "gracias", "amigo", "estoy", "buen"},
+    "fr": {"bonjour", "merci", "ami", "bien", "suis"},
+    "hi": {"namaste", "dhanyavad", "dost", "kaise", "hain"},
+}
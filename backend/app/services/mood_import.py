@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from collections.abc import AsyncIterator
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.mood import MoodEntry
+from ..schemas.mood import MoodEntryCreate
+from .mood_summary import apply_mood_count_changes
+from .sync import allocate_changes
+
+# 6 bound parameters per row keeps a chunk well under SQLite's 32766-variable limit.
+BULK_INSERT_CHUNK_ROWS = 1_000
+MAX_REPORTED_ERRORS = 50
+
+
+class BulkImportTooLarge(ValueError):
+    pass
+
+
+class BulkImportInvalid(ValueError):
+    def __init__(self, errors: list[dict[str, Any]]) -> None:
+        super().__init__(f"{len(errors)} invalid entries")
+        self.errors = errors
+
+
+def validate_entries(records: Iterable[Any], max_entries: int) -> list[MoodEntryCreate]:
+    """Validate every record in one pass, collecting errors instead of stopping at the first."""
+    entries: list[MoodEntryCreate] = []
+    errors: list[dict[str, Any]] = []
+    for index, record in enumerate(records):
+        if index >= max_entries:
+            raise BulkImportTooLarge(f"At most {max_entries} entries per import")
+        try:
+            entries.append(MoodEntryCreate.parse_obj(record))
+        except ValidationError as exc:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.extend({**error, "loc": ("body", index, *error["loc"])} for error in exc.errors())
+    if errors:
+        raise BulkImportInvalid(errors[:MAX_REPORTED_ERRORS])
+    return entries
+
+
+def parse_json_records(body: bytes) -> list[Any]:
+    try:
+        records = json.loads(body)
+    except ValueError as exc:
+        raise BulkImportInvalid([{"loc": ("body",), "msg": f"Invalid JSON: {exc}", "type": "value_error.json"}]) from exc
+    if not isinstance(records, list):
+        raise BulkImportInvalid([{"loc": ("body",), "msg": "Expected a JSON array of mood entries", "type": "type_error.list"}])
+    return records
+
+
+async def limit_body(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass a streamed body through, raising ``BulkImportTooLarge`` once it exceeds ``max_bytes``."""
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise BulkImportTooLarge(f"At most {max_bytes} bytes per import")
+        yield chunk
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Any]:
+    """Yield one decoded object per non-empty line of a streamed NDJSON body.
+
+    Raises ``BulkImportTooLarge`` for a line longer than ``max_line_bytes``, so a
+    body without newlines cannot make the buffer grow without bound.
+    """
+    buffer = b""
+    line_number = 0
+
+    def check_length(line: bytes) -> None:
+        if len(line) > max_line_bytes:
+            raise BulkImportTooLarge(f"Line {line_number + 1} is longer than {max_line_bytes} bytes")
+
+    def decode(line: bytes) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as exc:
+            raise BulkImportInvalid([{"loc": ("body", line_number), "msg": f"Invalid JSON: {exc}", "type": "value_error.json"}]) from exc
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            check_length(line)
+            if line.strip():
+                yield decode(line)
+                line_number += 1
+        check_length(buffer)
+    if buffer.strip():
+        yield decode(buffer)
+
+
+async def collect_ndjson_records(chunks: AsyncIterator[bytes], max_entries: int, max_line_bytes: int) -> list[Any]:
+    records: list[Any] = []
+    async for record in iter_ndjson_records(chunks, max_line_bytes):
+        if len(records) >= max_entries:
+            raise BulkImportTooLarge(f"At most {max_entries} entries per import")
+        records.append(record)
+    return records
+
+
+async def _existing_keys(session: AsyncSession, user_id: int, entries: list[MoodEntryCreate]) -> set[tuple[date, str]]:
+    first = min(entry.mood_date for entry in entries)
+    last = max(entry.mood_date for entry in entries)
+    rows = await session.execute(
+        select(MoodEntry.mood_date, MoodEntry.source)
+        .where(MoodEntry.user_id == user_id, MoodEntry.mood_date >= first, MoodEntry.mood_date <= last)
+        .distinct()
+    )
+    return {(mood_date, source) for mood_date, source in rows}
+
+
+async def import_mood_entries(session: AsyncSession, user_id: int, entries: list[MoodEntryCreate], dedupe: bool) -> dict[str, int]:
+    """Insert validated entries a chunk at a time and update the daily rollup, in the caller's transaction.
+
+    With ``dedupe``, entries whose ``(mood_date, source)`` the user already has, or
+    that repeat an earlier entry of the same import, are skipped.
+    """
+    rows = entries
+    if dedupe and entries:
+        seen = await _existing_keys(session, user_id, entries)
+        rows = []
+        for entry in entries:
+            key = (entry.mood_date, entry.source)
+            if key not in seen:
+                seen.add(key)
+                rows.append(entry)
+
+    created_at = datetime.utcnow()
+    first_seq = await allocate_changes(session, user_id, len(rows)) if rows else 0
+    for offset in range(0, len(rows), BULK_INSERT_CHUNK_ROWS):
+        chunk = rows[offset : offset + BULK_INSERT_CHUNK_ROWS]
+        await session.execute(
+            insert(MoodEntry).values(
+                [
+                    {
+                        "user_id": user_id,
+                        "mood": entry.mood,
+                        "source": entry.source,
+                        "mood_date": entry.mood_date,
+                        "created_at": created_at,
+                        "change_seq": first_seq + offset + index,
+                    }
+                    for index, entry in enumerate(chunk)
+                ]
+            )
+        )
+    await apply_mood_count_changes(session, Counter((user_id, entry.mood_date, entry.mood, entry.source) for entry in rows), 1)
+    return {"received": len(entries), "inserted": len(rows), "duplicates": len(entries) - len(rows)}
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.mood import MoodDailyCount, MoodEntry
+
+
+def upsert_insert(dialect: str):
+    # Dialect modules are imported on demand; the PostgreSQL one is slow to import.
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+        return postgresql_insert
+    return None
+
+
+def _entry_key(entry: MoodEntry) -> tuple[int, date, str, str]:
+    # Mirror the column defaults, which are only filled in at flush time.
+    return entry.user_id, entry.mood_date or date.today(), entry.mood, entry.source or "chat"
+
+
+async def apply_mood_counts(session: AsyncSession, entries: Iterable[MoodEntry], delta: int) -> None:
+    """Add ``delta`` per entry to the daily rollup inside the caller's transaction."""
+    await apply_mood_count_changes(session, Counter(_entry_key(entry) for entry in entries if isinstance(entry, MoodEntry)), delta)
+
+
+async def apply_mood_count_changes(session: AsyncSession, changes: Counter, delta: int) -> None:
+    """Like ``apply_mood_counts`` for pre-counted ``(user_id, mood_date, mood, source)`` keys."""
+    if not changes:
+        return
+
+    rows = [
+        {"user_id": user_id, "mood_date": mood_date, "mood": mood, "source": source, "count": count * delta}
+        for (user_id, mood_date, mood, source), count in changes.items()
+    ]
+    key_columns = ("user_id", "mood_date", "mood", "source")
+    upsert = upsert_insert(session.sync_session.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(MoodDailyCount)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_columns), set_={"count": MoodDailyCount.count + statement.excluded.count}
+        )
+        # One executemany for every key touched by the batch.
+        await session.execute(statement, rows)
+    else:
+        for row in rows:
+            matches = and_(*(getattr(MoodDailyCount, column) == row[column] for column in key_columns))
+            result = await session.execute(update(MoodDailyCount).where(matches).values(count=MoodDailyCount.count + row["count"]))
+            if result.rowcount == 0:
+                await session.execute(insert(MoodDailyCount).values(**row))
+    if delta < 0:
+        for row in rows:
+            await session.execute(
+                delete(MoodDailyCount).where(
+                    *(getattr(MoodDailyCount, column) == row[column] for column in key_columns), MoodDailyCount.count <= 0
+                )
+            )
+
+
+async def rebuild_mood_counts(session: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recompute the rollup from ``mood_entries`` (all users, or one); returns rollup rows written."""
+    clear = delete(MoodDailyCount)
+    grouped = select(
+        MoodEntry.user_id,
+        MoodEntry.mood_date,
+        MoodEntry.mood,
+        func.coalesce(MoodEntry.source, "chat"),
+        func.count(),
+    ).group_by(MoodEntry.user_id, MoodEntry.mood_date, MoodEntry.mood, func.coalesce(MoodEntry.source, "chat"))
+    if user_id is not None:
+        clear = clear.where(MoodDailyCount.user_id == user_id)
+        grouped = grouped.where(MoodEntry.user_id == user_id)
+
+    await session.execute(clear)
+    rows = (await session.execute(grouped)).all()
+    if rows:
+        await session.execute(
+            insert(MoodDailyCount),
+            [{"user_id": row[0], "mood_date": row[1], "mood": row[2], "source": row[3], "count": row[4]} for row in rows],
+        )
+    return len(rows)
+
+
+async def rebuild_if_missing(session: AsyncSession) -> None:
+    """Backfill the rollup once for databases created before it existed."""
+    has_counts = (await session.execute(select(MoodDailyCount.user_id).limit(1))).first() is not None
+    has_entries = (await session.execute(select(MoodEntry.id).limit(1))).first() is not None
+    if has_entries and not has_counts:
+        await rebuild_mood_counts(session)
+        await session.commit()
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+async def summarize_moods(
+    session: AsyncSession,
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
+) -> list[dict]:
+    query = select(MoodDailyCount.mood_date, MoodDailyCount.mood, MoodDailyCount.source, MoodDailyCount.count).where(
+        MoodDailyCount.user_id == user_id
+    )
+    if start is not None:
+        query = query.where(MoodDailyCount.mood_date >= start)
+    if end is not None:
+        query = query.where(MoodDailyCount.mood_date <= end)
+    rows = (await session.execute(query.order_by(MoodDailyCount.mood_date.asc()))).all()
+
+    buckets: dict[date, dict] = defaultdict(lambda: {"total": 0, "moods": Counter(), "sources": Counter()})
+    for mood_date, mood, source, count in rows:
+        summary = buckets[bucket_start(mood_date, bucket)]
+        summary["total"] += count
+        summary["moods"][mood] += count
+        summary["sources"][source] += count
+    return [
+        {"period_start": period_start, "total": summary["total"], "moods": dict(summary["moods"]), "sources": dict(summary["sources"])}
+        for period_start, summary in sorted(buckets.items())
+    ]
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core import database
+from ..core.config import settings
+from ..models.chat import ChatMessage
+from ..models.mood import MoodDailyCount, MoodEntry, MoodEntryTombstone, MoodTrendSnapshot
+from ..utils.cache import TTLCache
+from .mood_summary import upsert_insert
+from .sync import current_token
+
+logger = logging.getLogger(__name__)
+
+TREND_WINDOWS_DAYS = (7, 30)
+SENTIMENT_SCORES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+# Older chat messages carry less than 2**-10 of the weight of a new one; rebuilds skip them.
+REBUILD_HALF_LIVES = 10
+
+
+@dataclass
+class MoodTrend:
+    """Constant-size running statistics for one user.
+
+    ``days`` holds mood counts for the last ``max(TREND_WINDOWS_DAYS)`` days only,
+    the sentiment score is an exponentially decayed mean of chat sentiment, and
+    the streak counts consecutive days with at least one mood entry.
+    ``change_seq`` is the last position in the user's change sequence reflected.
+    """
+
+    days: dict[date, Counter] = field(default_factory=dict)
+    score: float = 0.0
+    weight: float = 0.0
+    samples: int = 0
+    last_sample_at: Optional[datetime] = None
+    last_active: Optional[date] = None
+    streak: int = 0
+    longest_streak: int = 0
+    as_of: Optional[datetime] = None
+    change_seq: int = 0
+
+    def _prune(self, today: date) -> None:
+        oldest = today - timedelta(days=max(TREND_WINDOWS_DAYS) - 1)
+        for day in [day for day in self.days if day < oldest]:
+            del self.days[day]
+
+    def add_mood(self, mood: str, mood_date: date, at: datetime) -> bool:
+        """Count one mood entry; returns False when the streak can no longer be updated incrementally."""
+        if self.last_active is not None and mood_date < self.last_active:
+            # A back-dated entry may join two streaks; only a rebuild can tell.
+            return False
+        if self.last_active is None or mood_date > self.last_active + timedelta(days=1):
+            self.streak = 1
+        elif mood_date == self.last_active + timedelta(days=1):
+            self.streak += 1
+        self.last_active = mood_date
+        self.longest_streak = max(self.longest_streak, self.streak)
+        self.days.setdefault(mood_date, Counter())[mood] += 1
+        self._prune(max(mood_date, at.date()))
+        self._advance(at)
+        return True
+
+    def add_sentiment(self, sentiment: str, at: datetime, half_life: float) -> None:
+        value = SENTIMENT_SCORES.get(sentiment)
+        if value is None:
+            return
+        if self.last_sample_at is None or at >= self.last_sample_at:
+            decay = _decay(at - self.last_sample_at, half_life) if self.last_sample_at else 1.0
+            self.score = self.score * decay + value
+            self.weight = self.weight * decay + 1.0
+            self.last_sample_at = at
+        else:
+            # Late arrival: weight it by its age relative to the newest sample.
+            decay = _decay(self.last_sample_at - at, half_life)
+            self.score += value * decay
+            self.weight += decay
+        self.samples += 1
+        self._advance(at)
+
+    def _advance(self, at: datetime) -> None:
+        if self.as_of is None or at > self.as_of:
+            self.as_of = at
+
+    def summary(self, today: date, now: datetime, half_life: float) -> dict[str, Any]:
+        windows = {}
+        for length in TREND_WINDOWS_DAYS:
+            oldest = today - timedelta(days=length - 1)
+            moods: Counter = Counter()
+            for day, counts in self.days.items():
+                if oldest <= day <= today:
+                    moods.update(counts)
+            windows[f"{length}d"] = {"days": length, "total": sum(moods.values()), "moods": dict(moods)}
+        current = self.streak if self.last_active is not None and self.last_active >= today - timedelta(days=1) else 0
+        weight_now = self.weight * _decay(now - self.last_sample_at, half_life) if self.last_sample_at else 0.0
+        return {
+            "as_of": self.as_of,
+            "windows": list(windows.values()),
+            "sentiment_score": round(self.score / self.weight, 4) if self.weight else 0.0,
+            "sentiment_weight": round(weight_now, 4),
+            "sentiment_samples": self.samples,
+            "half_life_days": half_life,
+            "current_streak_days": current,
+            "longest_streak_days": self.longest_streak,
+            "last_active_date": self.last_active,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "days": {day.isoformat(): dict(counts) for day, counts in self.days.items()},
+                "score": self.score,
+                "weight": self.weight,
+                "samples": self.samples,
+                "last_sample_at": _iso(self.last_sample_at),
+                "last_active": _iso(self.last_active),
+                "streak": self.streak,
+                "longest_streak": self.longest_streak,
+                "as_of": _iso(self.as_of),
+                "change_seq": self.change_seq,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "MoodTrend":
+        data = json.loads(raw)
+        return cls(
+            days={date.fromisoformat(day): Counter(counts) for day, counts in data["days"].items()},
+            score=data["score"],
+            weight=data["weight"],
+            samples=data["samples"],
+            last_sample_at=datetime.fromisoformat(data["last_sample_at"]) if data["last_sample_at"] else None,
+            last_active=date.fromisoformat(data["last_active"]) if data["last_active"] else None,
+            streak=data["streak"],
+            longest_streak=data["longest_streak"],
+            as_of=datetime.fromisoformat(data["as_of"]) if data["as_of"] else None,
+            change_seq=data.get("change_seq", 0),
+        )
+
+
+def _decay(elapsed: timedelta, half_life_days: float) -> float:
+    return math.pow(0.5, max(0.0, elapsed.total_seconds()) / (half_life_days * 86_400))
+
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class MoodTrendService:
+    """Per-user mood trend statistics kept in memory and updated as events happen.
+
+    Committed chat turns and mood entries update the user's ``MoodTrend`` in O(1)
+    via ``record``, so ``GET /mood/trends`` never scans history. States are evicted
+    after ``idle_seconds`` without use or when more than ``max_users`` are held. A
+    background task snapshots changed states to ``mood_trend_snapshots`` every
+    ``snapshot_interval``. A user who is not in memory is loaded from the snapshot,
+    replaying the rows committed after it, or else rebuilt from the daily rollup
+    and recent messages.
+
+    Everything is keyed on the user's change sequence (``services.sync``): a
+    state covers the rows up to its ``change_seq``, replays stop at the committed
+    token, and ``trends`` catches a state up when the token moved on without it
+    (another worker, or rows ``record`` never saw). A snapshot only replaces one
+    that covers no more changes, so workers cannot roll each other back.
+    """
+
+    def __init__(self, max_users: int, idle_seconds: float, half_life_days: float, snapshot_interval: float) -> None:
+        self.half_life_days = half_life_days
+        self.snapshot_interval = snapshot_interval
+        self._states: TTLCache[MoodTrend] = TTLCache(max_users, idle_seconds, sliding=True)
+        self._dirty: set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.rebuilds = 0
+        self.snapshots_written = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="companionai-mood-trends")
+
+    async def stop(self) -> None:
+        """Stop the snapshot task after writing one last snapshot."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.snapshot()
+            except Exception:
+                logger.exception("Mood trend snapshot failed")
+
+    def record(self, user_id: int, rows: Iterable[Any]) -> None:
+        """Apply one contiguous run of the user's just-committed ``ChatMessage``/``MoodEntry`` rows.
+
+        Called after the commit, with ``change_seq`` assigned. Runs the state already
+        covers are ignored; a run that does not follow on from the state's
+        ``change_seq`` means something else committed in between, so the state is
+        dropped and reloaded on next use.
+        """
+        state = self._states.get(user_id)
+        if state is None:
+            # Not loaded: the rows are in the database and are replayed on load.
+            return
+        rows = sorted(rows, key=lambda row: row.change_seq)
+        if not rows or rows[-1].change_seq <= state.change_seq:
+            return
+        if rows[0].change_seq != state.change_seq + 1:
+            self.forget(user_id)
+            return
+        for row in rows:
+            if isinstance(row, MoodEntry):
+                if not state.add_mood(row.mood, row.mood_date, row.created_at):
+                    self.forget(user_id)
+                    return
+            elif isinstance(row, ChatMessage) and row.sender == "user":
+                state.add_sentiment(row.sentiment, row.created_at, self.half_life_days)
+        state.change_seq = rows[-1].change_seq
+        self._dirty.add(user_id)
+
+    def forget(self, user_id: int) -> None:
+        self._states.pop(user_id)
+        self._dirty.discard(user_id)
+
+    async def invalidate(self, session: AsyncSession, user_id: int) -> None:
+        """Drop the user's state and snapshot (inside the caller's transaction) after history was removed."""
+        self.forget(user_id)
+        await session.execute(delete(MoodTrendSnapshot).where(MoodTrendSnapshot.user_id == user_id))
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._dirty.clear()
+
+    async def trends(self, session: AsyncSession, user_id: int) -> dict[str, Any]:
+        token = await current_token(session, user_id)
+        state = self._states.get(user_id)
+        if state is not None and state.change_seq != token:
+            if state.change_seq < token and await self._replay(session, user_id, state, token):
+                self._dirty.add(user_id)
+            else:
+                self.forget(user_id)
+                state = None
+        if state is None:
+            state = await self.load(session, user_id, token)
+        now = datetime.utcnow()
+        return state.summary(now.date(), now, self.half_life_days)
+
+    async def load(self, session: AsyncSession, user_id: int, token: int) -> MoodTrend:
+        """Load the user's state from its snapshot plus the rows committed up to ``token``, else rebuild it."""
+        snapshot = await session.get(MoodTrendSnapshot, user_id)
+        state = None
+        if snapshot is not None and snapshot.change_seq is not None and snapshot.change_seq <= token:
+            state = MoodTrend.from_json(snapshot.state)
+            state.change_seq = snapshot.change_seq
+            if not await self._replay(session, user_id, state, token):
+                state = None
+        if state is None:
+            return await self.rebuild(session, user_id)
+        self.loads += 1
+        self._states.set(user_id, state)
+        return state
+
+    async def _replay(self, session: AsyncSession, user_id: int, state: MoodTrend, token: int) -> bool:
+        """Apply the rows numbered ``(state.change_seq, token]``; False when only a rebuild can reflect them."""
+        since = state.change_seq
+        if since == token:
+            return True
+        deleted = await session.execute(
+            select(MoodEntryTombstone.id)
+            .where(MoodEntryTombstone.user_id == user_id, MoodEntryTombstone.change_seq > since, MoodEntryTombstone.change_seq <= token)
+            .limit(1)
+        )
+        if deleted.first() is not None:
+            return False
+        moods = await session.execute(
+            select(MoodEntry.change_seq, MoodEntry.mood, MoodEntry.mood_date, MoodEntry.created_at).where(
+                MoodEntry.user_id == user_id, MoodEntry.change_seq > since, MoodEntry.change_seq <= token
+            )
+        )
+        sentiments = await session.execute(
+            select(ChatMessage.change_seq, ChatMessage.sentiment, ChatMessage.created_at).where(
+                ChatMessage.user_id == user_id, ChatMessage.sender == "user", ChatMessage.change_seq > since, ChatMessage.change_seq <= token
+            )
+        )
+        events = sorted([*(("mood", row) for row in moods), *(("sentiment", row) for row in sentiments)], key=lambda event: event[1].change_seq)
+        if state.change_seq != since:
+            # ``record`` moved the state on while the rows were being read.
+            return False
+        for kind, row in events:
+            if kind == "mood":
+                if not state.add_mood(row.mood, row.mood_date, row.created_at):
+                    return False
+            else:
+                state.add_sentiment(row.sentiment, row.created_at, self.half_life_days)
+        state.change_seq = token
+        return True
+
+    async def rebuild(self, session: AsyncSession, user_id: int) -> MoodTrend:
+        """Recompute the user's statistics from the daily rollup and recent chat messages."""
+        now = datetime.utcnow()
+        token = await current_token(session, user_id)
+        state = MoodTrend(as_of=now, change_seq=token)
+
+        oldest = now.date() - timedelta(days=max(TREND_WINDOWS_DAYS) - 1)
+        recent = await session.execute(
+            select(MoodDailyCount.mood_date, MoodDailyCount.mood, func.sum(MoodDailyCount.count))
+            .where(MoodDailyCount.user_id == user_id, MoodDailyCount.mood_date >= oldest)
+            .group_by(MoodDailyCount.mood_date, MoodDailyCount.mood)
+        )
+        for mood_date, mood, count in recent:
+            state.days.setdefault(mood_date, Counter())[mood] += count
+
+        active_days = await session.execute(
+            select(MoodDailyCount.mood_date).where(MoodDailyCount.user_id == user_id).group_by(MoodDailyCount.mood_date).order_by(MoodDailyCount.mood_date)
+        )
+        for (mood_date,) in active_days:
+            if state.last_active is not None and mood_date == state.last_active + timedelta(days=1):
+                state.streak += 1
+            else:
+                state.streak = 1
+            state.last_active = mood_date
+            state.longest_streak = max(state.longest_streak, state.streak)
+
+        horizon = now - timedelta(days=self.half_life_days * REBUILD_HALF_LIVES)
+        sentiments = await session.execute(
+            select(ChatMessage.sentiment, ChatMessage.created_at)
+            .where(ChatMessage.user_id == user_id, ChatMessage.sender == "user", ChatMessage.created_at >= horizon)
+            .order_by(ChatMessage.created_at)
+        )
+        for sentiment, created_at in sentiments:
+            state.add_sentiment(sentiment, created_at, self.half_life_days)
+        state.as_of = now
+
+        self.rebuilds += 1
+        if await current_token(session, user_id) != token:
+            # Rows committed while the history was read may or may not be counted: serve
+            # this result once, but do not keep it as the base for further updates.
+            return state
+        self._states.set(user_id, state)
+        self._dirty.add(user_id)
+        return state
+
+    async def snapshot(self) -> int:
+        """Write the states changed since the last snapshot; returns how many were written."""
+        dirty, self._dirty = self._dirty, set()
+        states = {user_id: state for user_id in dirty if (state := self._states.get(user_id)) is not None and state.as_of}
+        if not states:
+            return 0
+        async with database.AsyncSessionLocal() as session:
+            upsert = upsert_insert(session.sync_session.get_bind().dialect.name)
+            for user_id, state in states.items():
+                values = {"user_id": user_id, "state": state.to_json(), "as_of": state.as_of, "change_seq": state.change_seq}
+                # Never replace a snapshot that covers more changes (written by another worker).
+                covers_less = or_(MoodTrendSnapshot.change_seq.is_(None), MoodTrendSnapshot.change_seq <= state.change_seq)
+                if upsert is not None:
+                    statement = upsert(MoodTrendSnapshot).values(**values)
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=["user_id"],
+                            set_={name: statement.excluded[name] for name in ("state", "as_of", "change_seq")},
+                            where=covers_less,
+                        )
+                    )
+                else:
+                    result = await session.execute(update(MoodTrendSnapshot).where(MoodTrendSnapshot.user_id == user_id, covers_less).values(**values))
+                    if result.rowcount == 0 and await session.get(MoodTrendSnapshot, user_id) is None:
+                        session.add(MoodTrendSnapshot(**values))
+            await session.commit()
+        self.snapshots_written += len(states)
+        return len(states)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "users": len(self._states),
+            "dirty": len(self._dirty),
+            "loads": self.loads,
+            "rebuilds": self.rebuilds,
+            "snapshots_written": self.snapshots_written,
+        }
+
+
+mood_trends = MoodTrendService(
+    max_users=settings.mood_trends_max_users,
+    idle_seconds=settings.mood_trends_idle_seconds,
+    half_life_days=settings.mood_trends_half_life_days,
+    snapshot_interval=settings.mood_trends_snapshot_interval_seconds,
+)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from ..core.config import settings
+from ..utils.histogram import Histogram
+from .language import format_reply
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyBackend(ABC):
+    """Produces the companion's reply text for an analysed message.
+
+    ``inline`` backends are cheap and synchronous at heart; the service calls them
+    directly instead of paying for the semaphore, timeout and coalescing machinery.
+
+    ``generate`` must depend on its arguments only: ``ReplyService`` hands one result
+    to every caller with the same ``(language, message, sentiment)``, whoever they
+    are. A backend that needs per-user context (history, profile) must take it as
+    an argument, so that it becomes part of the coalescing key.
+    """
+
+    name = "base"
+    inline = False
+
+    @abstractmethod
+    async def generate(self, language: str, message: str, sentiment: str) -> str:
+        """The reply text for ``message``."""
+
+
+class TemplateReplyBackend(ReplyBackend):
+    name = "template"
+    inline = True
+
+    async def generate(self, language: str, message: str, sentiment: str) -> str:
+        return format_reply(language, message, sentiment)
+
+
+class StubModelReplyBackend(ReplyBackend):
+    """Local stand-in for a generative model: the template reply after a simulated delay.
+
+    Latency is ``latency`` seconds plus up to ``jitter`` seconds derived from the
+    prompt, so runs are reproducible.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float, jitter: float = 0.0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+
+    async def generate(self, language: str, message: str, sentiment: str) -> str:
+        spread = int.from_bytes(hashlib.blake2b(message.encode(), digest_size=2).digest(), "big") / 0xFFFF
+        await asyncio.sleep(self.latency + self.jitter * spread)
+        return format_reply(language, message, sentiment)
+
+
+class ReplyService:
+    """Runs a reply backend with a concurrency cap, a timeout and in-flight coalescing.
+
+    Identical prompts that arrive while one is being generated share its result.
+    When the backend times out or fails, the template reply is returned instead;
+    timeouts and failures are counted separately and failures are logged.
+    """
+
+    def __init__(self, backend: ReplyBackend, max_concurrency: int, timeout: float) -> None:
+        self.backend = backend
+        self.fallback = TemplateReplyBackend()
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: dict[tuple[str, str, str], asyncio.Task] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.timeouts = 0
+        self.failures = 0
+        self.coalesced = 0
+
+    def _observe(self, backend_name: str, seconds: float) -> None:
+        histogram = self.histograms.get(backend_name)
+        if histogram is None:
+            histogram = self.histograms[backend_name] = Histogram()
+        histogram.observe(seconds)
+
+    async def reply(self, language: str, message: str, sentiment: str) -> str:
+        if self.backend.inline:
+            started = time.perf_counter()
+            text = await self.backend.generate(language, message, sentiment)
+            self._observe(self.backend.name, time.perf_counter() - started)
+            return text
+
+        self._bind_loop()
+        # The key is every argument ``generate`` receives; see ``ReplyBackend``.
+        key = (language, message, sentiment)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate(language, message, sentiment))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller going away does not cancel the shared generation.
+        return await asyncio.shield(task)
+
+    def _bind_loop(self) -> None:
+        # The semaphore and in-flight tasks belong to one event loop; the service
+        # outlives it when the app is restarted (tests, embedded servers).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight.clear()
+
+    async def _call_backend(self, language: str, message: str, sentiment: str) -> str:
+        assert self._semaphore is not None
+        async with self._semaphore:
+            return await self.backend.generate(language, message, sentiment)
+
+    async def _generate(self, language: str, message: str, sentiment: str) -> str:
+        started = time.perf_counter()
+        text: Optional[str] = None
+        # The timeout covers waiting for a concurrency slot as well as generation.
+        try:
+            text = await asyncio.wait_for(self._call_backend(language, message, sentiment), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except Exception:
+            self.failures += 1
+            logger.warning("Reply backend %r failed; using the template reply", self.backend.name, exc_info=True)
+        self._observe(self.backend.name, time.perf_counter() - started)
+        if text is None:
+            return await self.fallback.generate(language, message, sentiment)
+        return text
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "latency": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+
+def build_reply_backend(name: str) -> ReplyBackend:
+    if name == "template":
+        return TemplateReplyBackend()
+    if name == "stub":
+        return StubModelReplyBackend(settings.stub_reply_latency_ms / 1000, settings.stub_reply_jitter_ms / 1000)
+    raise ValueError(f"Unknown reply backend {name!r}")
+
+
+reply_service = ReplyService(
+    build_reply_backend(settings.reply_backend),
+    max_concurrency=settings.reply_backend_concurrency,
+    timeout=settings.reply_backend_timeout_ms / 1000,
+)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core import database
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..models.chat import ChatArchive, ChatMessage
+from ..models.user import User
+from .sync import allocate_changes
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("retention_rows_purged_total", "Chat messages deleted by the retention job.")
+metrics.describe("retention_rows_archived_total", "Chat messages compacted into chat_archives before deletion.")
+metrics.describe("retention_run_duration_seconds", "Wall time of one retention pass over all users.")
+
+_ARCHIVE_COLUMNS = (
+    ChatMessage.id,
+    ChatMessage.created_at,
+    ChatMessage.sender,
+    ChatMessage.language,
+    ChatMessage.sentiment,
+    ChatMessage.content,
+)
+
+
+def compress_messages(rows: list[Any]) -> bytes:
+    records = [
+        {
+            "id": row.id,
+            "created_at": row.created_at.isoformat(),
+            "sender": row.sender,
+            "language": row.language,
+            "sentiment": row.sentiment,
+            "content": row.content,
+        }
+        for row in rows
+    ]
+    return zlib.compress(json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode(), 6)
+
+
+def decompress_messages(payload: bytes) -> list[dict[str, Any]]:
+    return json.loads(zlib.decompress(payload))
+
+
+class RetentionJob:
+    """Periodically removes chat messages older than each user's retention window.
+
+    A user's window is ``User.history_retention_days``, falling back to
+    ``settings.retention_default_days``. Users with neither are skipped. Messages
+    are removed oldest first, ``batch_rows`` per short transaction, with a pause
+    between batches so request writers are never locked out for long. With
+    ``archive`` enabled, each batch is first compacted into one ``ChatArchive``
+    row. After a pass that removed rows, SQLite databases created with
+    ``auto_vacuum=INCREMENTAL`` release up to ``vacuum_pages`` free pages.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_rows: int,
+        batch_pause: float,
+        archive: bool,
+        vacuum_pages: int,
+        default_days: Optional[int] = None,
+    ) -> None:
+        self.interval = interval
+        self.batch_rows = max(1, batch_rows)
+        self.batch_pause = batch_pause
+        self.archive = archive
+        self.vacuum_pages = vacuum_pages
+        self.default_days = default_days
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.rows_purged = 0
+        self.rows_archived = 0
+        self.pages_vacuumed = 0
+        self.last_run_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="companionai-retention")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Retention pass failed")
+            await asyncio.sleep(self.interval)
+
+    async def _windows(self, session: AsyncSession) -> list[tuple[int, int]]:
+        days = func.coalesce(User.history_retention_days, self.default_days) if self.default_days else User.history_retention_days
+        rows = await session.execute(select(User.id, days).where(days.is_not(None)))
+        return [(user_id, window) for user_id, window in rows]
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Apply every user's window once; returns the number of messages removed."""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        async with database.AsyncSessionLocal() as session:
+            windows = await self._windows(session)
+        purged = 0
+        for user_id, days in windows:
+            purged += await self.purge_user(user_id, now - timedelta(days=days))
+        if purged:
+            await self.vacuum()
+        self.runs += 1
+        self.last_run_seconds = time.perf_counter() - started
+        metrics.observe("retention_run_duration_seconds", self.last_run_seconds)
+        return purged
+
+    async def purge_user(self, user_id: int, cutoff: datetime) -> int:
+        purged = 0
+        while True:
+            async with database.AsyncSessionLocal() as session:
+                # Oldest first over ix_chat_messages_user_created_id; each batch is its own short transaction.
+                batch = (
+                    await session.execute(
+                        select(*_ARCHIVE_COLUMNS)
+                        .where(ChatMessage.user_id == user_id, ChatMessage.created_at < cutoff)
+                        .order_by(ChatMessage.created_at, ChatMessage.id)
+                        .limit(self.batch_rows)
+                    )
+                ).all()
+                if not batch:
+                    return purged
+                if self.archive:
+                    await session.execute(
+                        insert(ChatArchive).values(
+                            user_id=user_id,
+                            first_created_at=batch[0].created_at,
+                            last_created_at=batch[-1].created_at,
+                            message_count=len(batch),
+                            payload=compress_messages(batch),
+                        )
+                    )
+                await session.execute(delete(ChatMessage).where(ChatMessage.id.in_([row.id for row in batch])))
+                # Advance the change sequence so history ETags change with the purge.
+                await allocate_changes(session, user_id, 1)
+                await session.commit()
+
+            purged += len(batch)
+            self.rows_purged += len(batch)
+            metrics.inc("retention_rows_purged_total", len(batch))
+            if self.archive:
+                self.rows_archived += len(batch)
+                metrics.inc("retention_rows_archived_total", len(batch))
+            if len(batch) < self.batch_rows:
+                return purged
+            await asyncio.sleep(self.batch_pause)
+
+    async def vacuum(self) -> None:
+        engine = database.get_engine()
+        if engine.dialect.name != "sqlite" or self.vacuum_pages <= 0:
+            return
+        async with engine.connect() as conn:
+            if (await conn.execute(text("PRAGMA auto_vacuum"))).scalar() != 2:
+                # Databases created before incremental auto-vacuum was enabled need a one-off VACUUM first.
+                return
+            before = (await conn.execute(text("PRAGMA freelist_count"))).scalar()
+            await conn.commit()
+            # incremental_vacuum frees one page per step; only executescript steps it to completion.
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            after = (await conn.execute(text("PRAGMA freelist_count"))).scalar()
+            await conn.commit()
+        self.pages_vacuumed += max(0, before - after)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "rows_purged": self.rows_purged,
+            "rows_archived": self.rows_archived,
+            "pages_vacuumed": self.pages_vacuumed,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+retention_job = RetentionJob(
+    interval=settings.retention_interval_seconds,
+    batch_rows=settings.retention_batch_rows,
+    batch_pause=settings.retention_batch_pause_ms / 1000,
+    archive=settings.retention_archive,
+    vacuum_pages=settings.retention_vacuum_pages,
+    default_days=settings.retention_default_days,
+)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, and_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core import database
+from ..models.chat import ChatMessage
+
+FTS_TABLE = "chat_messages_fts"
+SNIPPET_TOKENS = 12
+SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS = "[", "]", "…"
+
+# The index is an external-content FTS5 table over a view that adds an ``owner``
+# token per message, so a search intersects the user's posting list with the query
+# terms instead of matching every user's messages and filtering afterwards. The terms
+# are confined to ``content``, so the owner token itself never matches. Triggers
+# keep it in step with every insert and delete on ``chat_messages`` — chat turns,
+# write-behind batches and retention purges alike.
+_FTS_DDL = (
+    "CREATE VIEW IF NOT EXISTS chat_messages_fts_source AS SELECT id, content, 'u' || user_id AS owner FROM chat_messages",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, owner, content='chat_messages_fts_source', content_rowid='id')",
+    f"""CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, owner) VALUES (new.id, new.content, 'u' || new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, owner) VALUES ('delete', old.id, old.content, 'u' || old.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF content, user_id ON chat_messages BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, owner) VALUES ('delete', old.id, old.content, 'u' || old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, content, owner) VALUES (new.id, new.content, 'u' || new.user_id);
+    END""",
+)
+
+_fts_available: dict[str, bool] = {}
+
+
+def ensure_search_index(connection) -> None:
+    """Create the FTS5 index and its triggers, indexing existing messages; a no-op off SQLite or without FTS5."""
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(f"SELECT 1 FROM sqlite_master WHERE name = '{FTS_TABLE}'").first() is not None
+    try:
+        for statement in _FTS_DDL:
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        # SQLite built without FTS5: searches use the LIKE fallback.
+        return
+    if not exists:
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+database.schema_hooks.append(ensure_search_index)
+
+
+def fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, ``word*`` matches a prefix."""
+    terms = []
+    for word in q.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+async def _has_fts(session: AsyncSession) -> bool:
+    bind = session.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    key = str(bind.url)
+    if key not in _fts_available:
+        row = (await session.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE})).first()
+        _fts_available[key] = row is not None
+    return _fts_available[key]
+
+
+async def search_messages(session: AsyncSession, user_id: int, q: str, limit: int, offset: int = 0) -> list[dict[str, Any]]:
+    """Rank the user's messages matching ``q``; best match first (SQLite FTS5), else newest first."""
+    match = fts_query(q)
+    if not match:
+        return []
+    if await _has_fts(session):
+        rows = await session.execute(
+            text(
+                f"SELECT m.id, m.sender, m.created_at, "
+                f"snippet({FTS_TABLE}, 0, :start, :end, :ellipsis, :tokens) AS snippet, bm25({FTS_TABLE}, 1.0, 0.0) AS score "
+                f"FROM {FTS_TABLE} JOIN chat_messages AS m ON m.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+            ).columns(created_at=DateTime),
+            {
+                "match": f"owner:u{int(user_id)} AND content:({match})",
+                "start": SNIPPET_START,
+                "end": SNIPPET_END,
+                "ellipsis": SNIPPET_ELLIPSIS,
+                "tokens": SNIPPET_TOKENS,
+                "limit": limit,
+                "offset": offset,
+            },
+        )
+        # bm25 is lower-is-better; expose a higher-is-better score.
+        return [{"id": row.id, "sender": row.sender, "created_at": row.created_at, "snippet": row.snippet, "score": -row.score} for row in rows]
+    return await _search_like(session, user_id, q, limit, offset)
+
+
+async def _search_like(session: AsyncSession, user_id: int, q: str, limit: int, offset: int) -> list[dict[str, Any]]:
+    words = [word.rstrip("*") for word in q.split() if word.rstrip("*")]
+    conditions = [ChatMessage.content.ilike(f"%{_escape_like(word)}%", escape="\\") for word in words]
+    rows = await session.execute(
+        select(ChatMessage.id, ChatMessage.sender, ChatMessage.created_at, ChatMessage.content)
+        .where(ChatMessage.user_id == user_id, and_(*conditions))
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [
+        {"id": row.id, "sender": row.sender, "created_at": row.created_at, "snippet": make_snippet(row.content, words), "score": None}
+        for row in rows
+    ]
+
+
+def _escape_like(word: str) -> str:
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def make_snippet(content: str, words: list[str], tokens: int = SNIPPET_TOKENS) -> str:
+    """Python counterpart of FTS5 ``snippet()``: a window of ``tokens`` words around the first hit, hits bracketed."""
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE) if words else None
+    parts = content.split()
+    first: Optional[int] = next((index for index, part in enumerate(parts) if pattern and pattern.search(part)), None)
+    start = max(0, (first or 0) - tokens // 2)
+    window = parts[start : start + tokens]
+    marked = [pattern.sub(lambda hit: f"{SNIPPET_START}{hit.group(0)}{SNIPPET_END}", part) if pattern else part for part in window]
+    return (SNIPPET_ELLIPSIS if start > 0 else "") + " ".join(marked) + (SNIPPET_ELLIPSIS if start + tokens < len(parts) else "")
@@ -1,20 +1,11 @@
 from __future__ import annotations
 
-from typing import Iterable
-
-POSITIVE_WORDS = {"happy", "great", "fantastic", "amazing", "love", "उत्साहित", "खुश", "bien", "genial", "merci", "gracias"}
-NEGATIVE_WORDS = {"sad", "tired", "angry", "bad", "hate", "alone", "triste", "mal", "désolé", "दुखी", "थका"}
+from .analysis import analyze_text
+from .lexicons import NEGATIVE_WORDS, POSITIVE_WORDS  # noqa: F401  (re-exported)
 
 
 def detect_sentiment(text: str) -> str:
-    lowered = text.lower()
-    positive_hits = sum(1 for word in POSITIVE_WORDS if word in lowered)
-    negative_hits = sum(1 for word in NEGATIVE_WORDS if word in lowered)
-    if positive_hits > negative_hits:
-        return "positive"
-    if negative_hits > positive_hits:
-        return "negative"
-    return "neutral"
+    return analyze_text(text).sentiment
 
 
 MOOD_BY_SENTIMENT = {
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.chat import ChatMessage
+from ..models.mood import MoodEntry, MoodEntryTombstone
+from ..models.user import User
+
+
+class SyncTokenAhead(ValueError):
+    """The client's token is newer than anything the server handed out (e.g. the database was reset)."""
+
+
+async def allocate_changes(session: AsyncSession, user_id: int, count: int, history_only: bool = False) -> Optional[int]:
+    """Reserve ``count`` positions in the user's change sequence; returns the first.
+
+    The counter row stays locked until the caller's transaction ends, so a user's
+    changes commit in sequence order and a client never skips one that commits late.
+    With ``history_only`` nothing is reserved, and None returned, unless the stored
+    ``history_enabled`` flag is still set: the check and the lock are one statement.
+    """
+    statement = update(User).where(User.id == user_id)
+    if history_only:
+        statement = statement.where(User.history_enabled.is_(True))
+    result = await session.execute(
+        statement.values(change_seq=func.coalesce(User.change_seq, 0) + count)
+        .returning(User.change_seq)
+        .execution_options(synchronize_session=False)
+    )
+    last = result.scalar_one_or_none() if history_only else result.scalar_one()
+    return None if last is None else last - count + 1
+
+
+async def assign_change_seqs(session: AsyncSession, rows: Iterable[Any], history_only: bool = False) -> list[Any]:
+    """Number new ``ChatMessage``/``MoodEntry`` rows (possibly of several users) before they are added.
+
+    Returns the rows numbered. With ``history_only``, rows of users whose stored
+    ``history_enabled`` flag is off are left out, however stale the caller's copy
+    of the user was.
+    """
+    by_user: dict[int, list[Any]] = defaultdict(list)
+    for row in rows:
+        by_user[row.user_id].append(row)
+    numbered: list[Any] = []
+    for user_id, user_rows in by_user.items():
+        first = await allocate_changes(session, user_id, len(user_rows), history_only)
+        if first is None:
+            continue
+        for offset, row in enumerate(user_rows):
+            row.change_seq = first + offset
+        numbered.extend(user_rows)
+    return numbered
+
+
+async def current_token(session: AsyncSession, user_id: int) -> int:
+    return (await session.execute(select(func.coalesce(User.change_seq, 0)).where(User.id == user_id))).scalar_one()
+
+
+async def snapshot(session: AsyncSession, user: User, message_limit: int) -> dict[str, Any]:
+    """Everything a fresh client needs: the latest messages, every mood entry, and the token to sync from.
+
+    The token is read first, so a change committed while the snapshot is read is at
+    worst delivered again by the next ``changes_since`` (clients merge by id).
+    """
+    token = await current_token(session, user.id)
+    messages: list[Any] = []
+    if user.history_enabled:
+        messages = (
+            await session.execute(
+                select(ChatMessage)
+                .where(ChatMessage.user_id == user.id)
+                .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+                .limit(message_limit)
+            )
+        ).scalars().all()[::-1]
+    entries = (
+        await session.execute(select(MoodEntry).where(MoodEntry.user_id == user.id).order_by(MoodEntry.mood_date, MoodEntry.id))
+    ).scalars().all()
+    return {"token": token, "messages": messages, "mood_entries": entries, "deleted_mood_entries": [], "has_more": False}
+
+
+async def changes_since(session: AsyncSession, user: User, since: int, limit: int) -> dict[str, Any]:
+    """The first ``limit`` changes after ``since`` in sequence order, each source read over its (user_id, change_seq) index.
+
+    The returned token is the last change included, so a client that sees
+    ``has_more`` simply asks again with it. Every source is bounded by the token
+    read first: a change committed while the sources are read belongs to the next
+    response rather than skipping the ones below it in a source already read.
+    """
+    token = await current_token(session, user.id)
+    if since > token:
+        raise SyncTokenAhead(f"Sync token {since} is ahead of the server ({token}); start again without 'since'")
+    if since == token:
+        return {"token": token, "messages": [], "mood_entries": [], "deleted_mood_entries": [], "has_more": False}
+
+    async def read(model: Any) -> list[Any]:
+        query = (
+            select(model)
+            .where(model.user_id == user.id, model.change_seq > since, model.change_seq <= token)
+            .order_by(model.change_seq)
+            .limit(limit + 1)
+        )
+        return (await session.execute(query)).scalars().all()
+
+    # Rows of every source are fetched so their sequence positions are consumed even
+    # when history is off; otherwise the token could never move past them.
+    sources = {"messages": await read(ChatMessage), "mood_entries": await read(MoodEntry), "deleted_mood_entries": await read(MoodEntryTombstone)}
+    merged = heapq.merge(*([(row.change_seq, name, row) for row in rows] for name, rows in sources.items()), key=lambda item: item[0])
+    changes: dict[str, list[Any]] = {name: [] for name in sources}
+    last = since
+    for count, (seq, name, row) in enumerate(merged):
+        if count == limit:
+            break
+        changes[name].append(row)
+        last = seq
+    # One row past ``limit`` per source means the merged changes overflow exactly when more exist up to ``token``.
+    has_more = sum(len(rows) for rows in sources.values()) > limit
+    if not user.history_enabled:
+        changes["messages"] = []
+    return {
+        "token": last if has_more else token,
+        "messages": changes["messages"],
+        "mood_entries": changes["mood_entries"],
+        "deleted_mood_entries": [row.entry_id for row in changes["deleted_mood_entries"]],
+        "has_more": has_more,
+    }
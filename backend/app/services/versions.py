@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import User
+
+HISTORY = "history"
+MOOD = "mood"
+PROFILE = "profile"
+
+
+async def stored_versions(session: AsyncSession, user_id: int) -> Any:
+    """The user's persisted version columns, read through ``session`` before the response body is.
+
+    Reading them from the same session (primary or replica) as the body means a tag
+    is never newer than the data served under it: a change committed in between only
+    makes the next response a full one.
+    """
+    return (
+        await session.execute(
+            select(
+                func.coalesce(User.change_seq, 0).label("change_seq"),
+                func.coalesce(User.profile_version, 0).label("profile_version"),
+                User.history_enabled,
+                User.created_at,
+            ).where(User.id == user_id)
+        )
+    ).one()
+
+
+def etag(resource: str, versions: Any, variant: str = "") -> str:
+    """Weak ETag for ``resource`` from ``stored_versions`` (or a loaded ``User``).
+
+    Chat messages and mood entries (and retention purges) advance the user's change
+    sequence; profile updates advance ``profile_version``, which also decides what
+    the history returns. The user's ``created_at`` keeps tags from colliding after
+    the database is recreated; ``variant`` distinguishes query parameters.
+    """
+    if resource == PROFILE:
+        version = f"{versions.profile_version or 0}"
+    elif resource == HISTORY:
+        version = f"{versions.change_seq or 0}.{versions.profile_version or 0}"
+    else:
+        version = f"{versions.change_seq or 0}"
+    created = versions.created_at.isoformat() if versions.created_at else ""
+    digest = hashlib.blake2b(f"{created}|{variant}".encode(), digest_size=6).hexdigest()
+    return f'W/"{resource}-{version}-{digest}"'
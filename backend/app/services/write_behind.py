@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+
+from ..core import database
+from ..core.config import settings
+from .mood_summary import apply_mood_counts
+from .mood_trends import mood_trends
+from .sync import assign_change_seqs
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_BACKOFF = 5.0
+# Assigned by the flush itself, so a retried row must not carry the failed attempt's values.
+_FLUSH_ASSIGNED = ("change_seq",)
+
+
+def _fresh_copy(row: Any) -> Any:
+    """A new transient instance with ``row``'s column values, minus its primary key and change sequence.
+
+    A rolled-back insert leaves the autoincrement id on the object; another writer
+    may take that id before the retry, which would then fail on every attempt.
+    """
+    mapper = inspect(row).mapper
+    primary_keys = {column.key for column in mapper.primary_key}
+    values = {
+        attr.key: getattr(row, attr.key)
+        for attr in mapper.column_attrs
+        if attr.key not in primary_keys and attr.key not in _FLUSH_ASSIGNED
+    }
+    return mapper.class_(**values)
+
+
+class WriteBehindWriter:
+    """Groups ORM inserts from many requests into one transaction.
+
+    Requests hand their new rows to ``submit`` and return immediately; a single
+    background task commits everything queued within ``interval`` seconds (or as
+    soon as ``max_batch_rows`` rows are waiting) in one transaction, so SQLite
+    pays one fsync per batch instead of one per chat turn.  The queue is bounded
+    by ``max_queue_rows``: once full, ``submit`` waits for the writer to catch up.
+
+    A failed batch goes back to the head of the queue (as fresh copies, see
+    ``_fresh_copy``) and is retried with exponential backoff, so rows already
+    acknowledged to clients are not lost to a locked or briefly unavailable
+    database. Operational errors are retried
+    until they clear (the bounded queue pushes back on new requests meanwhile);
+    any other error is retried ``max_retries`` times, then the batch is halved
+    until the rows the database keeps rejecting are isolated and dropped one by
+    one. Rows still queued when the process dies are lost: this trades
+    durability of the last ``interval`` of turns for throughput.
+    """
+
+    def __init__(self, interval: float, max_batch_rows: int, max_queue_rows: int, max_retries: int = 5, retry_backoff: float = 0.1) -> None:
+        self.interval = interval
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.max_queue_rows = max(self.max_batch_rows, max_queue_rows)
+        self.max_retries = max(1, max_retries)
+        self.retry_backoff = retry_backoff
+        self._batch_rows = self.max_batch_rows
+        self._attempts = 0
+        self._pending: list[Any] = []
+        self._space = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.batches = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.rows_discarded = 0
+        self.retries = 0
+        self.backpressure_waits = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # Recreate loop-bound primitives: the writer may be restarted on a new event loop.
+        self._space = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="companionai-write-behind")
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, rows: Sequence[Any]) -> None:
+        if not self.running:
+            raise RuntimeError("Write-behind writer is not running")
+        async with self._space:
+            if len(self._pending) + len(rows) > self.max_queue_rows:
+                self.backpressure_waits += 1
+                self._wakeup.set()
+                await self._space.wait_for(lambda: not self._pending or len(self._pending) + len(rows) <= self.max_queue_rows)
+            self._pending.extend(rows)
+        if len(self._pending) >= self.max_batch_rows:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                if not await self._flush_batch():
+                    await asyncio.sleep(min(self.retry_backoff * 2 ** (self._attempts - 1), MAX_RETRY_BACKOFF))
+                    continue
+                if not self._stopping and len(self._pending) < self.max_batch_rows:
+                    break
+            if self._stopping and not self._pending:
+                return
+
+    async def _flush_batch(self) -> bool:
+        """Commit the next batch; on failure put it back (or drop it, see ``_retry``) and return False."""
+        batch = self._pending[: self._batch_rows]
+        del self._pending[: self._batch_rows]
+        async with self._space:
+            self._space.notify_all()
+
+        started = time.perf_counter()
+        try:
+            async with database.AsyncSessionLocal() as session:
+                try:
+                    # Users who turned history off since their turns were queued keep nothing.
+                    stored = await assign_change_seqs(session, batch, history_only=True)
+                    session.add_all(stored)
+                    await apply_mood_counts(session, stored, 1)
+                    await session.commit()
+                except Exception:
+                    # An explicit rollback turns rows the failed flush already inserted back into
+                    # transient objects; merely closing the session would leave them detached.
+                    await session.rollback()
+                    raise
+        except Exception as exc:
+            self._retry(batch, exc)
+            return False
+        finally:
+            self.last_flush_seconds = time.perf_counter() - started
+        self._attempts = 0
+        self._batch_rows = min(self.max_batch_rows, self._batch_rows * 2)
+        self.batches += 1
+        self.rows_written += len(stored)
+        self.rows_discarded += len(batch) - len(stored)
+        by_user: dict[int, list[Any]] = defaultdict(list)
+        for row in stored:
+            by_user[row.user_id].append(row)
+        for user_id, rows in by_user.items():
+            database.mark_written(user_id)
+            mood_trends.record(user_id, rows)
+        return True
+
+    def _retry(self, batch: list[Any], exc: Exception) -> None:
+        self._attempts += 1
+        transient = isinstance(exc, OperationalError) and not self._stopping
+        if transient or self._attempts < self.max_retries:
+            self.retries += 1
+            logger.warning("Write-behind flush of %d rows failed (attempt %d), retrying: %s", len(batch), self._attempts, exc)
+            self._pending[:0] = [_fresh_copy(row) for row in batch]
+            return
+        self._attempts = 0
+        if len(batch) > 1:
+            # Halve the batch until the rows the database keeps rejecting are on their own.
+            self.retries += 1
+            self._batch_rows = max(1, len(batch) // 2)
+            self._pending[:0] = [_fresh_copy(row) for row in batch]
+            return
+        self.rows_failed += len(batch)
+        logger.error("Write-behind dropped %r after %d failed attempts", batch[0], self.max_retries, exc_info=exc)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending_rows": self.pending,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "rows_discarded": self.rows_discarded,
+            "retries": self.retries,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+chat_writer = WriteBehindWriter(
+    interval=settings.write_behind_interval_ms / 1000,
+    max_batch_rows=settings.write_behind_batch_rows,
+    max_queue_rows=settings.write_behind_queue_rows,
+    max_retries=settings.write_behind_max_retries,
+    retry_backoff=settings.write_behind_retry_backoff_ms / 1000,
+)
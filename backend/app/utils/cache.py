@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded in-process LRU cache whose entries also expire after a TTL.
+
+    With ``sliding``, a successful ``get`` restarts the entry's TTL, so entries
+    expire after ``ttl`` seconds without use rather than ``ttl`` after being set.
+    Not thread-safe; it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic, sliding: bool = False) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        now = self._clock()
+        if expires_at <= now:
+            del self._data[key]
+            self.misses += 1
+            return None
+        if self.sliding:
+            self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0:
+            return
+        self._data[key] = (self._clock() + lifetime, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
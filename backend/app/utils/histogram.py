@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import bisect
+from typing import Any, Sequence
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative on export, Prometheus style)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """``[(upper_bound, count <= bound), ...]`` ending with ``+Inf``."""
+        total = 0
+        result = []
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"count": self.count, "sum": self.sum, "buckets": dict(self.cumulative())}
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Hashable, Iterable, Mapping
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton that finds every known pattern in a single scan.
+
+    Patterns are attached to one or more labels.  ``count`` walks the text once
+    and returns, per label, how many *distinct* patterns occurred anywhere in the
+    text (substring semantics, matching the historical ``marker in text`` checks).
+    Cost is linear in the text length plus the number of matches, independent of
+    how many patterns were compiled.
+    """
+
+    def __init__(self, lexicons: Mapping[Hashable, Iterable[str]]) -> None:
+        self.labels: tuple[Hashable, ...] = tuple(lexicons)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Pattern id emitted at each state (or -1) and the nearest suffix state that emits one.
+        self._pattern_at: list[int] = [-1]
+        self._output_link: list[int] = [0]
+        self.patterns: list[str] = []
+        self._pattern_labels: list[tuple[int, ...]] = []
+
+        label_index = {label: position for position, label in enumerate(self.labels)}
+        pattern_ids: dict[str, int] = {}
+        for label, words in lexicons.items():
+            for word in words:
+                word = word.lower()
+                if not word:
+                    continue
+                pattern_id = pattern_ids.get(word)
+                if pattern_id is None:
+                    pattern_id = pattern_ids[word] = len(self.patterns)
+                    self.patterns.append(word)
+                    self._pattern_labels.append(())
+                    self._insert(word, pattern_id)
+                if label_index[label] not in self._pattern_labels[pattern_id]:
+                    self._pattern_labels[pattern_id] += (label_index[label],)
+        self._link()
+
+    def _insert(self, word: str, pattern_id: int) -> None:
+        state = 0
+        for ch in word:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._pattern_at.append(-1)
+                self._output_link.append(0)
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._pattern_at[state] = pattern_id
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                suffix = self._fail[child]
+                self._output_link[child] = suffix if self._pattern_at[suffix] >= 0 else self._output_link[suffix]
+
+    def find(self, text: str) -> set[int]:
+        """Return the ids of all distinct patterns occurring in ``text`` (already lowercased)."""
+        goto, fail, pattern_at, output_link = self._goto, self._fail, self._pattern_at, self._output_link
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            emit = state if pattern_at[state] >= 0 else output_link[state]
+            while emit and pattern_at[emit] not in found:
+                found.add(pattern_at[emit])
+                emit = output_link[emit]
+        return found
+
+    def count(self, text: str) -> dict[Hashable, int]:
+        """Return ``{label: distinct pattern hits}`` for every label, including zeros."""
+        totals = [0] * len(self.labels)
+        for pattern_id in self.find(text):
+            for position in self._pattern_labels[pattern_id]:
+                totals[position] += 1
+        return dict(zip(self.labels, totals))
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson for faster list responses
+    orjson = None
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_rows(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode row tuples as a JSON array of objects keyed by ``fields``.
+
+    The output matches what FastAPI produces for the same values through a
+    ``response_model`` (ISO 8601 dates, compact separators, UTF-8), without building
+    a Pydantic model per row. Uses orjson when installed, else the standard library.
+    """
+    records = [dict(zip(fields, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(records)
+    return json.dumps(records, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode()
+
+
+class RowsJSONResponse(Response):
+    """Pre-encoded JSON list response for endpoints that bypass ``response_model`` validation.
+
+    The route keeps its ``response_model`` for the OpenAPI schema; returning this
+    response directly makes FastAPI skip validating and re-encoding every row.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self, fields: Sequence[str], rows: Iterable[Sequence[Any]], status_code: int = 200, headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        super().__init__(content=dumps_rows(fields, rows), status_code=status_code, headers=headers)
@@ -5,8 +5,14 @@ const state = {
   moodChart: null,
   recognition: null,
   speaking: false,
+  syncToken: null,
+  syncTimer: null,
+  messageIds: new Set(),
+  pendingEcho: [],
 };
 
+const SYNC_INTERVAL_MS = 30000;
+
 const selectors = {
   authSection: document.getElementById("auth"),
   dashboard: document.getElementById("dashboard"),
@@ -111,7 +117,9 @@ async function api(path, options = {}) {
   const response = await fetch(`${API_URL}${path}`, { ...options, headers });
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: response.statusText }));
-    throw new Error(error.detail || "Request failed");
+    const failure = new Error(error.detail || "Request failed");
+    failure.status = response.status;
+    throw failure;
   }
   if (response.status === 204) return null;
   return response.json();
@@ -133,18 +141,64 @@ function setUser(user) {
   selectors.historyToggle.checked = user.history_enabled;
 }
 
-async function refreshHistory() {
+function resetChatWindow() {
   selectors.chatWindow.innerHTML = "";
-  if (!state.user || !state.user.history_enabled) return;
-  const history = await api("/chat/history");
-  history.forEach(appendMessage);
+  state.messageIds = new Set();
+  state.pendingEcho = [];
+}
+
+function showMessages(messages) {
+  messages.forEach((message) => {
+    if (state.messageIds.has(message.id)) return;
+    state.messageIds.add(message.id);
+    // Our own streamed turn comes back once the server has stored it; it is already on screen.
+    const echo = state.pendingEcho.findIndex((pending) => pending.sender === message.sender && pending.content === message.content);
+    if (echo !== -1) {
+      state.pendingEcho.splice(echo, 1);
+      return;
+    }
+    appendMessage(message);
+  });
+}
+
+async function syncChanges() {
+  // The first call loads a snapshot; later calls only fetch what changed since the last token.
+  if (!state.user) return;
+  if (state.syncToken === null) {
+    const snapshot = await api("/sync?limit=50");
+    resetChatWindow();
+    showMessages(snapshot.messages);
+    state.syncToken = snapshot.token;
+    return;
+  }
+  let moodChanged = false;
+  let changes;
+  do {
+    try {
+      changes = await api(`/sync?since=${state.syncToken}`);
+    } catch (error) {
+      if (error.status !== 410) throw error;
+      state.syncToken = null;
+      await syncChanges();
+      await refreshMood();
+      return;
+    }
+    showMessages(changes.messages);
+    moodChanged = moodChanged || changes.mood_entries.length > 0 || changes.deleted_mood_entries.length > 0;
+    state.syncToken = changes.token;
+  } while (changes.has_more);
+  if (moodChanged) await refreshMood();
 }
 
 async function refreshMood() {
-  const entries = await api("/mood/entries");
-  const sorted = entries.sort((a, b) => new Date(a.mood_date) - new Date(b.mood_date));
-  const labels = sorted.map((item) => new Date(item.mood_date).toLocaleDateString());
-  const data = sorted.map((item) => (item.mood === "uplifted" ? 2 : item.mood === "calm" ? 1 : 0));
+  // Daily rollups from the server: one point per day instead of one per stored entry.
+  const buckets = await api("/mood/summary?bucket=day");
+  const labels = buckets.map((item) => new Date(item.period_start).toLocaleDateString());
+  const data = buckets.map((item) => {
+    const uplifted = item.moods.uplifted || 0;
+    const calm = item.moods.calm || 0;
+    return item.total ? (2 * uplifted + calm) / item.total : 0;
+  });
 
   if (state.moodChart) {
     state.moodChart.data.labels = labels;
@@ -222,8 +276,11 @@ async function bootstrapDashboard() {
   setUser(user);
   selectors.authSection.classList.add("hidden");
   selectors.dashboard.classList.remove("hidden");
-  await refreshHistory();
+  state.syncToken = null;
+  await syncChanges();
   await refreshMood();
+  clearInterval(state.syncTimer);
+  state.syncTimer = setInterval(() => syncChanges().catch(() => {}), SYNC_INTERVAL_MS);
 }
 
 async function sendMessage(event) {
@@ -233,32 +290,77 @@ async function sendMessage(event) {
   if (!message.trim()) return;
 
   const payload = { message };
-  const response = await api("/chat/respond", { method: "POST", body: JSON.stringify(payload) });
-  const now = new Date().toISOString();
-  appendMessage({ sender: "user", content: message, language: response.language, sentiment: response.sentiment, created_at: now });
-  appendMessage({ sender: "ai", content: response.reply, language: response.language, sentiment: response.sentiment, created_at: response.timestamp });
-  updateAvatarMood(response.mood);
   event.target.reset();
+  const now = new Date().toISOString();
+  let aiBubble = null;
+  await streamChat(payload, {
+    meta(meta) {
+      appendMessage({ sender: "user", content: message, language: meta.language, sentiment: meta.sentiment, created_at: now });
+      appendMessage({ sender: "ai", content: "", language: meta.language, sentiment: meta.sentiment, created_at: meta.timestamp });
+      aiBubble = selectors.chatWindow.lastElementChild.querySelector(".bubble");
+      updateAvatarMood(meta.mood);
+      if (state.user.history_enabled) state.pendingEcho.push({ sender: "user", content: message });
+    },
+    delta({ text }) {
+      aiBubble.textContent += text;
+      selectors.chatWindow.scrollTop = selectors.chatWindow.scrollHeight;
+    },
+    done({ reply }) {
+      if (state.user.history_enabled) state.pendingEcho.push({ sender: "ai", content: reply });
+    },
+  });
   await refreshMood();
 }
 
+async function streamChat(payload, handlers) {
+  // Reads the server-sent events from /chat/respond/stream as they arrive.
+  const response = await fetch(`${API_URL}/chat/respond/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Authorization: `Bearer ${state.token}` },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({ detail: response.statusText }));
+    throw new Error(error.detail || "Request failed");
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const eventName = block.match(/^event: (.*)$/m)?.[1];
+      const data = block.match(/^data: (.*)$/m)?.[1];
+      if (eventName && data && handlers[eventName]) handlers[eventName](JSON.parse(data));
+    }
+  }
+}
+
 async function toggleHistory(event) {
   const history_enabled = event.target.checked;
   const updated = await api("/users/me", { method: "PATCH", body: JSON.stringify({ history_enabled }) });
   setUser(updated);
   if (!history_enabled) {
-    selectors.chatWindow.innerHTML = "";
+    resetChatWindow();
   } else {
-    await refreshHistory();
+    state.syncToken = null;
+    await syncChanges();
   }
 }
 
 function logout() {
   setToken(null);
   state.user = null;
+  state.syncToken = null;
+  clearInterval(state.syncTimer);
   selectors.dashboard.classList.add("hidden");
   selectors.authSection.classList.remove("hidden");
-  selectors.chatWindow.innerHTML = "";
+  resetChatWindow();
 }
 
 function initSpeechRecognition() {
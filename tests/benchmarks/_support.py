@@ -0,0 +1,65 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Sequence
+
+_DB_DIR = tempfile.mkdtemp(prefix="companionai-bench-")
+DB_PATH = Path(_DB_DIR) / "bench.db"
+# Must happen before the application modules read their settings.
+os.environ.setdefault("COMPANIONAI_DATABASE_URL", f"sqlite+aiosqlite:///{DB_PATH}")
+
+
+@asynccontextmanager
+async def running_app() -> AsyncIterator["httpx.AsyncClient"]:  # noqa: F821
+    """Boot the FastAPI app (including lifespan) on a fresh SQLite file and yield a client."""
+    import httpx
+
+    from backend.app.main import app
+
+    if DB_PATH.exists():
+        DB_PATH.unlink()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+async def register_and_login(client, email: str, password: str = "Secret123!") -> dict[str, str]:
+    response = await client.post("/auth/register", json={"email": email, "password": password})
+    response.raise_for_status()
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(samples: Sequence[float]) -> dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+    }
+
+
+def compare_to_baseline(results: dict[str, float], baseline: dict[str, float], tolerance: float, higher_is_better: bool) -> list[str]:
+    """Return one message per metric that regressed by more than ``tolerance`` (a fraction)."""
+    regressions = []
+    for name, expected in baseline.items():
+        actual = results.get(name)
+        if actual is None or not expected:
+            continue
+        change = (actual - expected) / expected
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{name}: {actual:g} vs baseline {expected:g} ({change:+.0%})")
+    return regressions
@@ -0,0 +1,124 @@
+"""Latency of well-behaved chat users while one abusive client floods the API.
+
+Runs the same scenario twice on a fresh database, with admission control off and
+then on: ``--users`` clients each send one ``/chat/respond`` every
+``--interval`` seconds, while a single account fires ``--abuser-rps`` requests
+per second at the same route without waiting for replies (an open loop, so the
+offered load is the same whether or not it is being refused). Reports
+per-group latency percentiles and status counts as JSON::
+
+    python -m tests.benchmarks.bench_admission
+    python -m tests.benchmarks.bench_admission --users 20 --abuser-rps 2000 --seconds 10
+
+With admission on, the abuser should mostly see fast 429s (and 503s once the
+global concurrency limit is reached) while the well-behaved users' p95/p99 stay
+close to an idle server's, where without it the flood queues ahead of them.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+from ._support import latency_summary, register_and_login, running_app
+
+MESSAGE = {"message": "Hello friend, I am feeling great today!"}
+
+
+async def _timed_post(client, headers, samples: list[float], statuses: Counter) -> None:
+    started = time.perf_counter()
+    response = await client.post("/chat/respond", json=MESSAGE, headers=headers)
+    samples.append(time.perf_counter() - started)
+    statuses[response.status_code] += 1
+
+
+async def well_behaved(client, headers, interval: float, deadline: float, samples: list[float], statuses: Counter) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await _timed_post(client, headers, samples, statuses)
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+async def abusive(client, headers, rps: float, deadline: float, samples: list[float], statuses: Counter) -> None:
+    pending = set()
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        task = asyncio.create_task(_timed_post(client, headers, samples, statuses))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        next_at += 1 / rps
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    await asyncio.gather(*pending)
+
+
+async def scenario(users: int, interval: float, abuser_rps: float, seconds: float, enabled: bool) -> dict[str, object]:
+    from backend.app.api.deps import clear_auth_caches
+    from backend.app.core.admission import admission
+    from backend.app.services.mood_trends import mood_trends
+
+    clear_auth_caches()
+    mood_trends.clear()
+    admission.reset()
+    admission.enabled = enabled
+    async with running_app() as client:
+        good_headers = [await register_and_login(client, f"good{index}@example.com") for index in range(users)]
+        abuser_headers = await register_and_login(client, "abuser@example.com")
+        # Warm up analysis and reply generation so first-call costs are not counted.
+        await asyncio.gather(*(client.post("/chat/respond", json=MESSAGE, headers=headers) for headers in good_headers))
+        admission.reset()
+
+        good_samples: list[float] = []
+        abuser_samples: list[float] = []
+        good_statuses: Counter = Counter()
+        abuser_statuses: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(well_behaved(client, headers, interval, deadline, good_samples, good_statuses) for headers in good_headers),
+            abusive(client, abuser_headers, abuser_rps, deadline, abuser_samples, abuser_statuses),
+        )
+        rejected = dict(admission.rejected)
+
+    return {
+        "admission": enabled,
+        "well_behaved": {**latency_summary(good_samples), "statuses": dict(sorted(good_statuses.items()))},
+        "abuser": {**latency_summary(abuser_samples), "statuses": dict(sorted(abuser_statuses.items()))},
+        "rejected": rejected,
+    }
+
+
+async def run(users: int, interval: float, abuser_rps: float, seconds: float) -> dict[str, object]:
+    from backend.app.core.config import settings
+
+    results = [await scenario(users, interval, abuser_rps, seconds, enabled) for enabled in (False, True)]
+    return {
+        "config": {
+            "users": users,
+            "interval_seconds": interval,
+            "abuser_rps": abuser_rps,
+            "seconds": seconds,
+            "rate_limit_per_second": settings.rate_limit_per_second,
+            "rate_limit_burst": settings.rate_limit_burst,
+            "concurrency_limit": settings.concurrency_limit,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between a well-behaved user's messages")
+    parser.add_argument("--abuser-rps", type=float, default=1000.0, help="requests per second offered by the abusive client")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # Settings are read at import time, which running_app() defers until here.
+    os.environ.setdefault("COMPANIONAI_DATABASE_PROFILE", "performance")
+    os.environ.setdefault("COMPANIONAI_WRITE_BEHIND_ENABLED", "true")
+    print(json.dumps(asyncio.run(run(args.users, args.interval, args.abuser_rps, args.seconds)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Messages/second for the single-message and batch analysis paths, plus matcher scaling.
+
+The corpus is mostly unique free text; ``--duplicate-ratio`` sets the share of
+repeated short acknowledgements, the only rows the batch path scores more cheaply.
+
+Run from the repository root::
+
+    python -m tests.benchmarks.bench_analysis --messages 200000 --lexicon-words 30000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from backend.app.services.analysis import analyze_batch, analyze_text
+from backend.app.utils.matcher import MultiPatternMatcher
+
+SAMPLES = [
+    "Hello friend, I am feeling great today!",
+    "Estoy muy triste, no sé qué hacer.",
+    "Merci, je suis bien aujourd'hui.",
+    "Namaste dost, kaise hain aap?",
+    "I am so tired and alone tonight",
+    "This is a neutral update.",
+]
+ACKNOWLEDGEMENTS = ["ok", "thanks", "yes", "good night"]
+
+
+def build_corpus(count: int, duplicate_ratio: float = 0.1, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    words = " ".join(SAMPLES).split()
+    corpus = []
+    for index in range(count):
+        if rng.random() < duplicate_ratio:
+            corpus.append(rng.choice(ACKNOWLEDGEMENTS))
+            continue
+        # Free text mixing words from every language, unique per row.
+        corpus.append(f"{' '.join(rng.choice(words) for _ in range(rng.randint(4, 16)))} #{index}")
+    return corpus
+
+
+def run(count: int, batch_size: int, duplicate_ratio: float) -> dict[str, float]:
+    corpus = build_corpus(count, duplicate_ratio)
+
+    started = time.perf_counter()
+    for text in corpus:
+        analyze_text(text)
+    single_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        analyze_batch(corpus[offset : offset + batch_size])
+    batch_elapsed = time.perf_counter() - started
+
+    return {
+        "messages": count,
+        "batch_size": batch_size,
+        "duplicate_ratio": duplicate_ratio,
+        "single_msgs_per_sec": round(count / single_elapsed),
+        "batch_msgs_per_sec": round(count / batch_elapsed),
+    }
+
+
+def run_matcher(word_count: int, seed: int = 7) -> dict[str, float]:
+    """Build and scan time of a matcher over ``word_count`` random words; scanning should not grow with the lexicon."""
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choice(alphabet) for _ in range(rng.randint(4, 10))) for _ in range(word_count)}
+    text = " ".join(["needle"] + sorted(words)[:50]) * 20
+
+    started = time.perf_counter()
+    matcher = MultiPatternMatcher({"big": words, "marker": {"needle"}})
+    build_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matcher.count(text)
+    count_elapsed = time.perf_counter() - started
+
+    return {"lexicon_words": len(words), "matcher_build_ms": round(build_elapsed * 1000, 1), "matcher_count_ms": round(count_elapsed * 1000, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--lexicon-words", type=int, default=30_000)
+    args = parser.parse_args()
+    print(json.dumps({**run(args.messages, args.batch_size, args.duplicate_ratio), **run_matcher(args.lexicon_words)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
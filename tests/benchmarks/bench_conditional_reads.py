@@ -0,0 +1,110 @@
+"""Bytes and database queries saved by ETag revalidation and gzip on polled list reads.
+
+Each of ``--users`` clients first sends ``--messages`` chat messages, then polls
+``/chat/history``, ``/mood/entries`` and ``/users/me`` for ``--polls`` rounds,
+sending one new chat message every ``--write-every`` rounds. The same workload
+runs twice on a fresh database: as plain GETs, and as a browser would with an
+HTTP cache (``If-None-Match`` with the last ``ETag``, ``Accept-Encoding: gzip``)::
+
+    python -m tests.benchmarks.bench_conditional_reads
+    python -m tests.benchmarks.bench_conditional_reads --users 20 --polls 50 --write-every 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+from ._support import latency_summary, register_and_login, running_app
+
+POLLED = ("/chat/history?limit=100", "/mood/entries", "/users/me")
+
+
+async def seed_user(client, index: int, messages: int) -> dict[str, str]:
+    headers = await register_and_login(client, f"poller{index}@example.com")
+    for number in range(messages):
+        await client.post("/chat/respond", json={"message": f"Seed message {number}, feeling pretty good today"}, headers=headers)
+    return headers
+
+
+async def poll(client, headers: dict[str, str], polls: int, write_every: int, conditional: bool, report: dict) -> None:
+    etags: dict[str, str] = {}
+    for round_number in range(polls):
+        if write_every and round_number and round_number % write_every == 0:
+            await client.post("/chat/respond", json={"message": "A new message while polling"}, headers=headers)
+        for path in POLLED:
+            request_headers = {**headers, "Accept-Encoding": "gzip" if conditional else "identity"}
+            if conditional and path in etags:
+                request_headers["If-None-Match"] = etags[path]
+            started = time.perf_counter()
+            response = await client.get(path, headers=request_headers)
+            report["samples"].append(time.perf_counter() - started)
+            report["statuses"][response.status_code] += 1
+            report["wire_bytes"] += response.num_bytes_downloaded
+            if response.status_code == 200:
+                etags[path] = response.headers["ETag"]
+
+
+async def scenario(users: int, messages: int, polls: int, write_every: int, conditional: bool) -> dict[str, object]:
+    from sqlalchemy import event
+
+    from backend.app.api.deps import clear_auth_caches
+    from backend.app.core.database import get_engine
+
+    clear_auth_caches()
+    report: dict = {"samples": [], "statuses": Counter(), "wire_bytes": 0, "queries": 0}
+
+    def count_query(*args) -> None:
+        report["queries"] += 1
+
+    async with running_app() as client:
+        all_headers = [await seed_user(client, index, messages) for index in range(users)]
+        # Counts every statement while polling, including the chat writes interleaved with the reads.
+        event.listen(get_engine().sync_engine, "before_cursor_execute", count_query)
+        started = time.perf_counter()
+        await asyncio.gather(*(poll(client, headers, polls, write_every, conditional, report) for headers in all_headers))
+        elapsed = time.perf_counter() - started
+        event.remove(get_engine().sync_engine, "before_cursor_execute", count_query)
+
+    return {
+        "conditional": conditional,
+        "seconds": round(elapsed, 3),
+        "reads": latency_summary(report["samples"]),
+        "statuses": dict(sorted(report["statuses"].items())),
+        "wire_bytes": report["wire_bytes"],
+        "queries": report["queries"],
+    }
+
+
+async def run(users: int, messages: int, polls: int, write_every: int) -> dict[str, object]:
+    plain = await scenario(users, messages, polls, write_every, conditional=False)
+    conditional = await scenario(users, messages, polls, write_every, conditional=True)
+    return {
+        "config": {"users": users, "messages": messages, "polls": polls, "write_every": write_every},
+        "results": [plain, conditional],
+        "saved": {
+            "wire_bytes": plain["wire_bytes"] - conditional["wire_bytes"],
+            "wire_bytes_fraction": round(1 - conditional["wire_bytes"] / plain["wire_bytes"], 3),
+            "queries": plain["queries"] - conditional["queries"],
+            "queries_fraction": round(1 - conditional["queries"] / plain["queries"], 3) if plain["queries"] else 0.0,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=50, help="chat messages sent by each user before polling")
+    parser.add_argument("--polls", type=int, default=30)
+    parser.add_argument("--write-every", type=int, default=10, help="send a chat message every N polling rounds (0 = never)")
+    args = parser.parse_args()
+
+    # Settings are read at import time, which running_app() defers until here.
+    os.environ.setdefault("COMPANIONAI_ADMISSION_ENABLED", "false")
+    print(json.dumps(asyncio.run(run(args.users, args.messages, args.polls, args.write_every)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
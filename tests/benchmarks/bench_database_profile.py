@@ -0,0 +1,95 @@
+"""Mixed /chat/history-style reads and /chat/respond-style writes per database profile.
+
+Runs against a local SQLite file for the ``default`` and ``performance`` profiles::
+
+    python -m tests.benchmarks.bench_database_profile --seconds 5 --readers 16 --writers 4
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ._support import DB_PATH, latency_summary
+
+
+async def run(profile: str, seconds: float, readers: int, writers: int) -> dict[str, object]:
+    from backend.app.core.config import Settings
+    from backend.app.core.database import Base, build_engine
+    from backend.app.models import ChatMessage, User
+
+    for suffix in ("", "-wal", "-shm"):
+        DB_PATH.with_name(DB_PATH.name + suffix).unlink(missing_ok=True)
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{DB_PATH}", database_profile=profile))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as session:
+        user = User(email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.flush()
+        session.add_all(
+            ChatMessage(user_id=user.id, sender="user", content=f"seed {index}", created_at=datetime.utcnow()) for index in range(5_000)
+        )
+        await session.commit()
+
+    deadline = time.perf_counter() + seconds
+    read_samples: list[float] = []
+    write_samples: list[float] = []
+    errors = {"read": 0, "write": 0}
+
+    async def reader() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with sessions() as session:
+                    result = await session.execute(
+                        select(ChatMessage).where(ChatMessage.user_id == user.id).order_by(ChatMessage.created_at.desc()).limit(50)
+                    )
+                    result.scalars().all()
+            except OperationalError:
+                errors["read"] += 1
+                continue
+            read_samples.append(time.perf_counter() - started)
+
+    async def writer() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with sessions() as session:
+                    session.add(ChatMessage(user_id=user.id, sender="user", content="hello", created_at=datetime.utcnow()))
+                    await session.commit()
+            except OperationalError:
+                errors["write"] += 1
+                continue
+            write_samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(reader() for _ in range(readers)), *(writer() for _ in range(writers)))
+    await engine.dispose()
+    return {
+        "profile": profile,
+        "reads_per_sec": round(len(read_samples) / seconds, 1),
+        "writes_per_sec": round(len(write_samples) / seconds, 1),
+        "read_latency": latency_summary(read_samples),
+        "write_latency": latency_summary(write_samples),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+    results = [asyncio.run(run(profile, args.seconds, args.readers, args.writers)) for profile in ("default", "performance")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Stream GET /users/me/export over a large history and check peak RSS stays bounded.
+
+Seeds ``--rows`` chat messages for one user, streams the export through the ASGI
+app without buffering it, and exits non-zero if resident memory grows by more
+than ``--rss-budget-mb`` while streaming::
+
+    python -m tests.benchmarks.bench_export --rows 1000000 --rss-budget-mb 64
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from ._support import register_and_login, running_app
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+async def stream_export(app, headers: dict[str, str], export_format: str, on_chunk) -> None:
+    # Drive the ASGI app directly: httpx's ASGITransport buffers whole bodies, which would hide streaming.
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/users/me/export",
+        "raw_path": b"/users/me/export",
+        "query_string": f"format={export_format}".encode(),
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        "client": ("bench", 0),
+        "server": ("bench", 80),
+    }
+
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"export failed with status {message['status']}")
+        if message["type"] == "http.response.body":
+            on_chunk(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+
+
+async def run(rows: int, export_format: str) -> dict[str, object]:
+    from backend.app.core.database import get_engine
+    from backend.app.main import app
+    from backend.app.models import ChatMessage, User
+
+    async with running_app() as client:
+        headers = await register_and_login(client, "export@example.com")
+        async with get_engine().begin() as conn:
+            user_id = (await conn.execute(select(User.id))).scalar_one()
+            start = datetime(2020, 1, 1)
+            for offset in range(0, rows, 50_000):
+                await conn.execute(
+                    insert(ChatMessage),
+                    [
+                        {"user_id": user_id, "sender": "user", "content": f"message number {index}", "created_at": start + timedelta(seconds=index)}
+                        for index in range(offset, min(rows, offset + 50_000))
+                    ],
+                )
+
+        stats = {"bytes": 0, "lines": 0, "baseline_rss": current_rss_mb(), "peak_rss": 0.0}
+
+        def on_chunk(chunk: bytes) -> None:
+            stats["bytes"] += len(chunk)
+            stats["lines"] += chunk.count(b"\n")
+            stats["peak_rss"] = max(stats["peak_rss"], current_rss_mb())
+
+        started = time.perf_counter()
+        await stream_export(app, headers, export_format, on_chunk)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rows": rows,
+        "format": export_format,
+        "lines": stats["lines"],
+        "megabytes": round(stats["bytes"] / (1024 * 1024), 1),
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed),
+        "rss_growth_mb": round(max(0.0, stats["peak_rss"] - stats["baseline_rss"]), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--rss-budget-mb", type=float, default=64.0)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.rows, args.format))
+    result["rss_budget_mb"] = args.rss_budget_mb
+    print(json.dumps(result, indent=2))
+    if result["rss_growth_mb"] > args.rss_budget_mb:
+        sys.exit(f"export grew RSS by {result['rss_growth_mb']} MB, budget is {args.rss_budget_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Page latency of /chat/history by depth: keyset cursors versus LIMIT/OFFSET.
+
+Seeds a SQLite file with many messages spread over several users, then times
+fetching a page at increasing depths for the target user::
+
+    python -m tests.benchmarks.bench_history_paging --rows 1000000 --page-size 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from ._support import DB_PATH
+
+
+async def seed(engine, rows: int, users: int) -> None:
+    from backend.app.core.database import Base
+    from backend.app.models import ChatMessage, User
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": index + 1, "email": f"u{index}@example.com", "password_hash": "x"} for index in range(users)])
+        start = datetime(2020, 1, 1)
+        chunk = 50_000
+        for offset in range(0, rows, chunk):
+            await conn.execute(
+                insert(ChatMessage),
+                [
+                    {
+                        "user_id": index % users + 1,
+                        "sender": "user" if index % 2 == 0 else "ai",
+                        "content": f"message {index}",
+                        "created_at": start + timedelta(seconds=index // 2),
+                    }
+                    for index in range(offset, min(rows, offset + chunk))
+                ],
+            )
+
+
+async def timed(session, query) -> tuple[float, list]:
+    started = time.perf_counter()
+    rows = (await session.execute(query)).scalars().all()
+    return time.perf_counter() - started, rows
+
+
+async def run(rows: int, users: int, page_size: int, depths: list[int]) -> list[dict[str, object]]:
+    from backend.app.api.chat import history_query
+    from backend.app.core.config import Settings
+    from backend.app.core.database import build_engine
+    from backend.app.models import ChatMessage
+    from backend.app.utils.pagination import encode_cursor
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    DB_PATH.unlink(missing_ok=True)
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{DB_PATH}"))
+    await seed(engine, rows, users)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    results = []
+    async with sessions() as session:
+        for depth in depths:
+            offset_query = (
+                select(ChatMessage)
+                .where(ChatMessage.user_id == 1)
+                .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+                .offset(depth)
+                .limit(page_size)
+            )
+            offset_seconds, page = await timed(session, offset_query)
+            if not page:
+                break
+            # Cursor pointing just above the page the OFFSET query returned.
+            anchor = (await session.execute(offset_query.offset(max(0, depth - 1)).limit(1))).scalar_one()
+            cursor = encode_cursor(anchor.created_at, anchor.id) if depth else None
+            keyset_seconds, _ = await timed(session, history_query(1, page_size, before=cursor))
+            results.append({"depth": depth, "offset_ms": round(offset_seconds * 1000, 3), "keyset_ms": round(keyset_seconds * 1000, 3)})
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    per_user = args.rows // args.users
+    depths = [0] + [depth for depth in (1_000, 10_000, 100_000, 1_000_000) if depth < per_user] + [per_user - args.page_size]
+    print(json.dumps({"rows": args.rows, "pages": asyncio.run(run(args.rows, args.users, args.page_size, depths))}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
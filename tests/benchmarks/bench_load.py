@@ -0,0 +1,179 @@
+"""Reproducible load test for the whole API with per-endpoint throughput and latency.
+
+Boots ``backend.app.main`` against a temporary SQLite file and drives it with
+many concurrent simulated users (register/login, chat bursts, history paging,
+mood listing, profile reads) over ``httpx.AsyncClient``. Prints a JSON report::
+
+    python -m tests.benchmarks.bench_load --users 20 --rounds 5
+    python -m tests.benchmarks.bench_load --save-baseline            # record baselines/api.json
+    python -m tests.benchmarks.bench_load --compare                  # exit 1 on regression
+
+By default it runs the shipped configuration (``default`` database profile,
+no write-behind). The report includes each endpoint's error count and rate:
+with enough concurrent chat writers the default profile fails some turns with
+``database is locked`` (about 2% of them at ``--users 50``), which
+``--profile performance --write-behind`` avoids.
+
+A run regresses when an endpoint's p95 latency rises, or total throughput
+drops, by more than ``--tolerance`` relative to the baseline, or when any
+request fails. Baselines record the run configuration and are only compared
+against runs with the same one.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from ._support import compare_to_baseline, latency_summary, running_app
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "api.json"
+
+MESSAGES = [
+    "Hello friend, I am feeling great today!",
+    "Estoy muy cansado y triste.",
+    "Merci, je suis bien.",
+    "Namaste dost, kaise hain?",
+    "Just a neutral update about my day.",
+]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.failures: Counter[str] = Counter()
+
+    async def call(self, client, name: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except Exception as exc:
+            # ASGITransport re-raises unhandled app errors (e.g. "database is locked").
+            self.errors[name] += 1
+            self.failures[f"{name}: {str(getattr(exc, 'orig', exc))[:120]}"] += 1
+            return None
+        finally:
+            self.samples[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            self.failures[f"{name}: HTTP {response.status_code}"] += 1
+        return response
+
+
+async def simulated_user(client, recorder: Recorder, index: int, rounds: int, burst: int, seed: int) -> None:
+    rng = random.Random(seed + index)
+    email = f"load{index}@example.com"
+    password = "Secret123!"
+    await recorder.call(client, "POST /auth/register", "POST", "/auth/register", json={"email": email, "password": password})
+    login = await recorder.call(client, "POST /auth/login", "POST", "/auth/login", data={"username": email, "password": password})
+    if login is None or login.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for _ in range(rounds):
+        for _ in range(burst):
+            await recorder.call(client, "POST /chat/respond", "POST", "/chat/respond", json={"message": rng.choice(MESSAGES)}, headers=headers)
+
+        response = await recorder.call(client, "GET /chat/history", "GET", "/chat/history", params={"limit": 10}, headers=headers)
+        for _ in range(2):
+            cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+            if not cursor:
+                break
+            response = await recorder.call(
+                client, "GET /chat/history", "GET", "/chat/history", params={"limit": 10, "before": cursor}, headers=headers
+            )
+
+        await recorder.call(client, "GET /mood/entries", "GET", "/mood/entries", headers=headers)
+        await recorder.call(client, "GET /mood/summary", "GET", "/mood/summary", params={"bucket": "week"}, headers=headers)
+        await recorder.call(client, "GET /users/me", "GET", "/users/me", headers=headers)
+
+
+async def run(users: int, rounds: int, burst: int, seed: int, profile: str, write_behind: bool) -> dict[str, object]:
+    recorder = Recorder()
+    async with running_app() as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(simulated_user(client, recorder, index, rounds, burst, seed) for index in range(users)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in recorder.samples.values())
+    endpoints = {}
+    for name, samples in sorted(recorder.samples.items()):
+        errors = recorder.errors.get(name, 0)
+        endpoints[name] = {
+            **latency_summary(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4),
+        }
+    return {
+        "config": {"users": users, "rounds": rounds, "burst": burst, "seed": seed, "profile": profile, "write_behind": write_behind},
+        "seconds": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "error_rate": round(sum(recorder.errors.values()) / total, 4) if total else 0.0,
+        "endpoints": endpoints,
+        "failures": dict(recorder.failures),
+    }
+
+
+def regressions_against(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = compare_to_baseline(
+        {"throughput_rps": report["throughput_rps"]}, {"throughput_rps": baseline["throughput_rps"]}, tolerance, higher_is_better=True
+    )
+    problems += compare_to_baseline(
+        {f"{name} p95_ms": stats["p95_ms"] for name, stats in report["endpoints"].items()},
+        {f"{name} p95_ms": stats["p95_ms"] for name, stats in baseline["endpoints"].items()},
+        tolerance,
+        higher_is_better=False,
+    )
+    problems += [
+        f"{name}: {stats['errors']} errors ({stats['error_rate']:.2%})" for name, stats in report["endpoints"].items() if stats["errors"]
+    ]
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=5, help="chat messages per round")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--profile", choices=["default", "performance"], default="default", help="database profile")
+    parser.add_argument("--write-behind", action=argparse.BooleanOptionalAction, default=False, help="batch chat-turn inserts")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction (0.25 = 25%%)")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--compare", action="store_true", help="fail when the run regresses against --baseline")
+    mode.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    args = parser.parse_args()
+
+    # Settings are read at import time, which running_app() defers until here.
+    os.environ["COMPANIONAI_DATABASE_PROFILE"] = args.profile
+    os.environ["COMPANIONAI_WRITE_BEHIND_ENABLED"] = "true" if args.write_behind else "false"
+    # This measures capacity; per-user rate limits would turn the chat bursts into 429s.
+    os.environ["COMPANIONAI_ADMISSION_ENABLED"] = "false"
+    report = asyncio.run(run(args.users, args.rounds, args.burst, args.seed, args.profile, args.write_behind))
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        args.output.write_text(rendered + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(rendered + "\n")
+    elif args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != report["config"]:
+            sys.exit(f"Baseline was recorded with {baseline.get('config')}, this run used {report['config']}")
+        problems = regressions_against(report, baseline, args.tolerance)
+        if problems:
+            sys.exit("Regressions against baseline:\n" + "\n".join(problems))
+
+
+if __name__ == "__main__":
+    main()
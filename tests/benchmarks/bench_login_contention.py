@@ -0,0 +1,62 @@
+"""p99 latency of /chat/respond while bcrypt logins run in parallel.
+
+Compares running bcrypt inline on the event loop with the CPU executor::
+
+    python -m tests.benchmarks.bench_login_contention --chats 300 --logins 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from ._support import latency_summary, register_and_login, running_app
+
+
+async def chat_worker(client, headers, count: int, samples: list[float]) -> None:
+    for index in range(count):
+        started = time.perf_counter()
+        response = await client.post("/chat/respond", json={"message": f"Hello friend, turn {index}"}, headers=headers)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def login_worker(client, email: str, count: int) -> None:
+    for _ in range(count):
+        response = await client.post("/auth/login", data={"username": email, "password": "Secret123!"})
+        response.raise_for_status()
+
+
+async def run(kind: str, chats: int, logins: int, chatters: int) -> dict[str, object]:
+    from backend.app.core.executor import cpu_executor
+
+    cpu_executor.kind = kind
+    async with running_app() as client:
+        headers = await register_and_login(client, "chatter@example.com")
+        await register_and_login(client, "login@example.com")
+
+        quiet: list[float] = []
+        await asyncio.gather(*(chat_worker(client, headers, chats // chatters, quiet) for _ in range(chatters)))
+
+        contended: list[float] = []
+        await asyncio.gather(
+            *(chat_worker(client, headers, chats // chatters, contended) for _ in range(chatters)),
+            *(login_worker(client, "login@example.com", 1) for _ in range(logins)),
+        )
+        stats = cpu_executor.stats()
+    return {"executor": kind, "chat_alone": latency_summary(quiet), "chat_with_logins": latency_summary(contended), "executor_stats": stats}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--chatters", type=int, default=4)
+    parser.add_argument("--executor", choices=["inline", "thread", "process"], nargs="*", default=["inline", "thread"])
+    args = parser.parse_args()
+    results = [asyncio.run(run(kind, args.chats, args.logins, args.chatters)) for kind in args.executor]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-request cost of the metrics middleware and stage timers.
+
+Alternates batches with metrics on and off against the same app and reports the
+mean latency difference::
+
+    python -m tests.benchmarks.bench_metrics_overhead --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from ._support import register_and_login, running_app
+
+
+async def timed_batch(client, headers, path: str, count: int) -> float:
+    started = time.perf_counter()
+    for index in range(count):
+        if path == "/chat/respond":
+            response = await client.post(path, json={"message": f"Hello friend {index}"}, headers=headers)
+        else:
+            response = await client.get(path, headers=headers)
+        response.raise_for_status()
+    return (time.perf_counter() - started) / count
+
+
+async def run(requests: int, rounds: int) -> list[dict[str, object]]:
+    from backend.app.core.metrics import metrics
+
+    results = []
+    async with running_app() as client:
+        headers = await register_and_login(client, "metrics-bench@example.com")
+        for path in ("/health", "/users/me", "/chat/respond"):
+            timings = {True: [], False: []}
+            await timed_batch(client, headers, path, 50)  # warm-up
+            for _ in range(rounds):
+                for enabled in (False, True):
+                    metrics.enabled = enabled
+                    timings[enabled].append(await timed_batch(client, headers, path, requests // rounds))
+            metrics.enabled = True
+            off, on = min(timings[False]), min(timings[True])
+            results.append(
+                {
+                    "path": path,
+                    "metrics_off_us": round(off * 1e6, 1),
+                    "metrics_on_us": round(on * 1e6, 1),
+                    "overhead_us": round((on - off) * 1e6, 1),
+                    "overhead_pct": round((on - off) / off * 100, 2),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests, args.rounds)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
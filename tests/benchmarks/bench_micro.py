@@ -0,0 +1,67 @@
+"""Microbenchmarks for the per-message text pipeline, checked against a tracked baseline.
+
+    python -m tests.benchmarks.bench_micro                    # run and compare
+    python -m tests.benchmarks.bench_micro --update-baseline  # record new numbers
+
+Results are nanoseconds per call (lower is better). The comparison fails when a
+case is slower than its baseline by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from backend.app.services.language import _render_reply, detect_language, format_reply
+from backend.app.services.sentiment import detect_sentiment
+
+from ._support import compare_to_baseline
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+
+SHORT = "Hello friend, I am feeling great today!"
+LONG = " ".join(["Estoy muy cansado y triste porque el día fue largo"] * 40)
+
+CASES = {
+    "format_reply_short_memoized": lambda: format_reply("en", SHORT, "positive"),
+    "format_reply_short_uncached": lambda: _render_reply("en", SHORT, "positive"),
+    "format_reply_long": lambda: format_reply("es", LONG, "negative"),
+    "detect_language_short": lambda: detect_language(SHORT),
+    "detect_language_long": lambda: detect_language(LONG),
+    "detect_sentiment_short": lambda: detect_sentiment(SHORT),
+    "detect_sentiment_long": lambda: detect_sentiment(LONG),
+}
+
+
+def run(repeat: int) -> dict[str, float]:
+    results = {}
+    for name, case in CASES.items():
+        timer = timeit.Timer(case)
+        loops, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=loops)) / loops
+        results[name] = round(best * 1e9, 1)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction (0.5 = 50%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps({"ns_per_call": results}, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        return
+    if args.baseline.exists():
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance, higher_is_better=False)
+        if regressions:
+            sys.exit("Regressions against baseline:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
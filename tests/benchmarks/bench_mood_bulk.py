@@ -0,0 +1,57 @@
+"""Mood import throughput: one POST /mood/entries per row versus POST /mood/entries/bulk.
+
+    python -m tests.benchmarks.bench_mood_bulk --rows 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+
+from ._support import register_and_login, running_app
+
+
+def entries(rows: int, source: str) -> list[dict[str, str]]:
+    start = date(2020, 1, 1)
+    moods = ("calm", "uplifted", "concerned")
+    return [{"mood": moods[index % 3], "source": source, "mood_date": (start + timedelta(days=index)).isoformat()} for index in range(rows)]
+
+
+async def run(rows: int) -> list[dict[str, object]]:
+    results = []
+    async with running_app() as client:
+        headers = await register_and_login(client, "bulk@example.com")
+
+        started = time.perf_counter()
+        for entry in entries(rows, "single"):
+            (await client.post("/mood/entries", json=entry, headers=headers)).raise_for_status()
+        results.append(("per_entry", time.perf_counter() - started))
+
+        started = time.perf_counter()
+        (await client.post("/mood/entries/bulk", json=entries(rows, "json"), headers=headers)).raise_for_status()
+        results.append(("bulk_json", time.perf_counter() - started))
+
+        body = "".join(json.dumps(entry) + "\n" for entry in entries(rows, "ndjson"))
+        ndjson_headers = {**headers, "Content-Type": "application/x-ndjson"}
+        started = time.perf_counter()
+        (await client.post("/mood/entries/bulk", content=body, headers=ndjson_headers)).raise_for_status()
+        results.append(("bulk_ndjson", time.perf_counter() - started))
+
+        started = time.perf_counter()
+        response = await client.post("/mood/entries/bulk", params={"dedupe": "true"}, content=body, headers=ndjson_headers)
+        results.append(("bulk_ndjson_all_duplicates", time.perf_counter() - started))
+        assert response.json()["inserted"] == 0
+
+    return [{"path": path, "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1)} for path, elapsed in results]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Latency of /mood/trends as history grows, against a 30-day /mood/summary scan.
+
+Seeds one user with mood entries and chat messages spread over years, then times
+the first (rebuilding) and warm trend reads::
+
+    python -m tests.benchmarks.bench_mood_trends --rows 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from ._support import latency_summary, register_and_login, running_app
+
+
+async def seed(user_email: str, rows: int) -> None:
+    from backend.app.core.database import AsyncSessionLocal
+    from backend.app.models import ChatMessage, MoodEntry, User
+    from backend.app.services.mood_summary import rebuild_mood_counts
+
+    moods = ("calm", "uplifted", "concerned")
+    sentiments = ("neutral", "positive", "negative")
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        user_id = (await session.execute(select(User.id).where(User.email == user_email))).scalar_one()
+        for offset in range(0, rows, 50_000):
+            batch = range(offset, min(rows, offset + 50_000))
+            # Spread rows over ~3 years, a few per day, newest first.
+            stamps = [now - timedelta(hours=index * 6) for index in batch]
+            await session.execute(
+                insert(MoodEntry),
+                [{"user_id": user_id, "mood": moods[index % 3], "source": "chat", "mood_date": stamp.date(), "created_at": stamp} for index, stamp in zip(batch, stamps)],
+            )
+            await session.execute(
+                insert(ChatMessage),
+                [
+                    {"user_id": user_id, "sender": "user", "sentiment": sentiments[index % 3], "content": "x", "created_at": stamp}
+                    for index, stamp in zip(batch, stamps)
+                ],
+            )
+        await rebuild_mood_counts(session, user_id)
+        await session.commit()
+
+
+async def timed_gets(client, path: str, headers: dict, requests: int, **params) -> list[float]:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        (await client.get(path, headers=headers, params=params)).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(rows: int, requests: int) -> dict[str, object]:
+    from backend.app.services.mood_trends import mood_trends
+
+    mood_trends.clear()
+    async with running_app() as client:
+        headers = await register_and_login(client, "trends@example.com")
+        await seed("trends@example.com", rows)
+
+        started = time.perf_counter()
+        (await client.get("/mood/trends", headers=headers)).raise_for_status()
+        first = time.perf_counter() - started
+        warm = await timed_gets(client, "/mood/trends", headers, requests)
+        scan = await timed_gets(client, "/mood/summary", headers, requests, start=(date.today() - timedelta(days=29)).isoformat())
+    return {
+        "rows": rows,
+        "first_read_ms": round(first * 1000, 3),
+        "trends": latency_summary(warm),
+        "summary_30d_scan": latency_summary(scan),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps([asyncio.run(run(rows, args.requests)) for rows in args.rows], indent=2))
+
+
+if __name__ == "__main__":
+    main()
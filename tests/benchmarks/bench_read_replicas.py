@@ -0,0 +1,97 @@
+"""Read throughput of the list routes by number of read engines, with a concurrent chat writer.
+
+Runs the app on a WAL SQLite file (``performance`` profile) with 0, 1, 2 and 4
+entries in ``database_read_urls``, each a read-only connection (``mode=ro``) to
+the same file. ``--readers`` clients poll ``/chat/history`` and ``/mood/entries``
+while one writer keeps posting chat turns, for ``--seconds`` per configuration::
+
+    python -m tests.benchmarks.bench_read_replicas
+    python -m tests.benchmarks.bench_read_replicas --readers 64 --seconds 10 --replicas 0 2 8
+
+Zero read engines is the old behaviour: every read shares the primary's pool
+with the writer. The readers' own writes happened more than
+``read_your_writes_seconds`` earlier, so their reads go to the replicas.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from ._support import DB_PATH, latency_summary, register_and_login, running_app
+
+
+async def reader(client, headers: dict, deadline: float, samples: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        for path in ("/chat/history?limit=100", "/mood/entries"):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            samples.append(time.perf_counter() - started)
+
+
+async def writer(client, headers: dict, deadline: float, samples: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/chat/respond", json={"message": "Still writing, feeling fine"}, headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+
+
+async def scenario(replicas: int, readers: int, seconds: float, seed_messages: int) -> dict[str, object]:
+    from backend.app.api.deps import clear_auth_caches
+    from backend.app.core import database
+    from backend.app.core.config import settings
+
+    clear_auth_caches()
+    settings.database_read_urls = [f"sqlite+aiosqlite:///file:{DB_PATH}?mode=ro&uri=true"] * replicas
+    async with running_app() as client:
+        reader_headers = []
+        for index in range(readers):
+            headers = await register_and_login(client, f"reader{index}@example.com")
+            for number in range(seed_messages):
+                await client.post("/chat/respond", json={"message": f"Seed {number}"}, headers=headers)
+            reader_headers.append(headers)
+        writer_headers = await register_and_login(client, "writer@example.com")
+        database.recent_writers.clear()
+
+        read_samples: list[float] = []
+        write_samples: list[float] = []
+        deadline = time.perf_counter() + seconds
+        started = time.perf_counter()
+        await asyncio.gather(
+            writer(client, writer_headers, deadline, write_samples),
+            *(reader(client, headers, deadline, read_samples) for headers in reader_headers),
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "read_engines": replicas,
+        "reads_per_s": round(len(read_samples) / elapsed, 1),
+        "reads": latency_summary(read_samples),
+        "writes_per_s": round(len(write_samples) / elapsed, 1),
+        "writes": latency_summary(write_samples),
+    }
+
+
+async def run(replica_counts: list[int], readers: int, seconds: float, seed_messages: int) -> list[dict[str, object]]:
+    return [await scenario(count, readers, seconds, seed_messages) for count in replica_counts]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed-messages", type=int, default=20, help="chat turns per reader before measuring")
+    args = parser.parse_args()
+
+    # Settings are read at import time, which running_app() defers until here.
+    os.environ.setdefault("COMPANIONAI_DATABASE_PROFILE", "performance")
+    os.environ.setdefault("COMPANIONAI_ADMISSION_ENABLED", "false")
+    results = asyncio.run(run(args.replicas, args.readers, args.seconds, args.seed_messages))
+    print(json.dumps({"readers": args.readers, "seconds": args.seconds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
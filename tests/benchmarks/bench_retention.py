@@ -0,0 +1,83 @@
+"""Retention job throughput, and chat latency while it runs.
+
+Seeds expired messages for many users, then runs one retention pass while a
+writer keeps posting chat turns, and reports the purge rate, the chat p95/p99
+during the pass, and the database size before and after incremental vacuum::
+
+    python -m tests.benchmarks.bench_retention --rows 200000 --batch-rows 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from ._support import DB_PATH, latency_summary, register_and_login, running_app
+
+
+async def seed(rows: int, users: int) -> None:
+    from backend.app.core.database import AsyncSessionLocal
+    from backend.app.models import ChatMessage, User
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [{"email": f"old{index}@example.com", "password_hash": "x"} for index in range(users)])
+        await session.execute(update(User).values(history_retention_days=30))
+        start = datetime.utcnow() - timedelta(days=365)
+        for offset in range(0, rows, 50_000):
+            await session.execute(
+                insert(ChatMessage),
+                [
+                    {"user_id": index % users + 1, "sender": "user", "content": f"expired message {index} " * 4, "created_at": start + timedelta(seconds=index)}
+                    for index in range(offset, min(rows, offset + 50_000))
+                ],
+            )
+        await session.commit()
+
+
+async def run(rows: int, users: int, batch_rows: int, archive: bool) -> dict[str, object]:
+    from backend.app.services.retention import retention_job
+
+    retention_job.batch_rows = batch_rows
+    retention_job.archive = archive
+    async with running_app() as client:
+        await seed(rows, users)
+        headers = await register_and_login(client, "writer@example.com")
+        size_before = DB_PATH.stat().st_size
+
+        latencies: list[float] = []
+        purge = asyncio.create_task(retention_job.run_once())
+        while not purge.done():
+            started = time.perf_counter()
+            (await client.post("/chat/respond", json={"message": "Still here"}, headers=headers)).raise_for_status()
+            latencies.append(time.perf_counter() - started)
+        purged = await purge
+
+    return {
+        "rows": rows,
+        "batch_rows": batch_rows,
+        "archive": archive,
+        "purged": purged,
+        "seconds": round(retention_job.last_run_seconds, 3),
+        "rows_per_sec": round(purged / retention_job.last_run_seconds, 1),
+        "chat_during_purge": latency_summary(latencies),
+        "pages_vacuumed": retention_job.pages_vacuumed,
+        "db_mb_before": round(size_before / 1e6, 1),
+        "db_mb_after": round(DB_PATH.stat().st_size / 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--batch-rows", type=int, default=500)
+    parser.add_argument("--archive", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows, args.users, args.batch_rows, args.archive)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
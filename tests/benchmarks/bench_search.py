@@ -0,0 +1,84 @@
+"""/chat/search query latency over a large history: FTS5 index versus the LIKE fallback.
+
+Seeds a SQLite file with messages built from a fixed vocabulary, spread over
+many users, then times ranked searches for one user::
+
+    python -m tests.benchmarks.bench_search --rows 2000000 --users 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import insert, text
+
+from ._support import DB_PATH, latency_summary
+
+VOCABULARY = [f"word{index}" for index in range(5_000)] + ["dog", "park", "happy", "tired", "coffee", "rain"]
+
+
+async def seed(engine, rows: int, users: int) -> None:
+    from backend.app.core.database import ensure_schema
+    from backend.app.models import ChatMessage, User
+
+    rng = random.Random(7)
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_schema)
+        await conn.execute(insert(User), [{"id": index + 1, "email": f"u{index}@example.com", "password_hash": "x"} for index in range(users)])
+        for offset in range(0, rows, 50_000):
+            await conn.execute(
+                insert(ChatMessage),
+                [
+                    {"user_id": index % users + 1, "sender": "user", "content": " ".join(rng.choices(VOCABULARY, k=12))}
+                    for index in range(offset, min(rows, offset + 50_000))
+                ],
+            )
+
+
+async def run(rows: int, users: int, queries: int) -> dict[str, object]:
+    from backend.app.core.config import Settings
+    from backend.app.core.database import build_engine
+    from backend.app.services import search
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    DB_PATH.unlink(missing_ok=True)
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{DB_PATH}", database_profile="performance"))
+    started = time.perf_counter()
+    await seed(engine, rows, users)
+    seeded = time.perf_counter() - started
+
+    sessions = async_sessionmaker(engine)
+    results: dict[str, object] = {"rows": rows, "users": users, "seed_seconds": round(seeded, 1)}
+    for label, q in (("common_term", "dog"), ("two_terms", "happy coffee"), ("prefix", "word12*"), ("rare_term", "word4999")):
+        for mode in ("fts", "like"):
+            samples = []
+            async with sessions() as session:
+                for _ in range(queries):
+                    begin = time.perf_counter()
+                    if mode == "fts":
+                        await search.search_messages(session, 1, q, limit=20)
+                    else:
+                        await search._search_like(session, 1, q, 20, 0)
+                    samples.append(time.perf_counter() - begin)
+            results[f"{label}_{mode}"] = latency_summary(samples)
+    async with engine.connect() as conn:
+        results["fts_index_mb"] = round(
+            (await conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'chat_messages_fts%'"))).scalar() / 1e6, 1
+        ) if (await conn.execute(text("SELECT 1 FROM pragma_module_list WHERE name = 'dbstat'"))).first() else None
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows, args.users, args.queries)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
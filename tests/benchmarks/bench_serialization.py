@@ -0,0 +1,144 @@
+"""Rows per second served by the list endpoints: ORM + ``response_model`` versus column tuples + direct JSON.
+
+Seeds one user's chat messages and mood entries, then for each page size times
+what ``/chat/history`` and ``/mood/entries`` do per request, query included:
+
+* ``orm``: load ORM objects, then FastAPI's ``serialize_response`` (per-row
+  Pydantic validation and ``jsonable_encoder``) and ``JSONResponse`` rendering.
+* ``rows``: select only the schema's columns and encode the tuples with
+  ``RowsJSONResponse`` (orjson when installed, else the standard library).
+
+::
+
+    python -m tests.benchmarks.bench_serialization
+    python -m tests.benchmarks.bench_serialization --sizes 50 1000 10000 --repeats 20 --stdlib
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from ._support import DB_PATH
+
+
+async def seed(engine, rows: int) -> None:
+    from backend.app.core.database import Base
+    from backend.app.models import ChatMessage, MoodEntry, User
+
+    start = datetime(2020, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": 1, "email": "rows@example.com", "password_hash": "x"}])
+        for offset in range(0, rows, 10_000):
+            chunk = range(offset, min(rows, offset + 10_000))
+            await conn.execute(
+                insert(ChatMessage),
+                [
+                    {
+                        "user_id": 1,
+                        "sender": "user" if index % 2 == 0 else "ai",
+                        "language": "en",
+                        "sentiment": "neutral",
+                        "content": f"Message number {index}: I went for a walk and feel a bit better now.",
+                        "created_at": start + timedelta(minutes=index),
+                    }
+                    for index in chunk
+                ],
+            )
+            await conn.execute(
+                insert(MoodEntry),
+                [
+                    {"user_id": 1, "mood": "calm", "source": "chat", "mood_date": (start + timedelta(days=index)).date(), "created_at": start}
+                    for index in chunk
+                ],
+            )
+
+
+async def best_of(repeats: int, call) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = await call()
+        timings.append(time.perf_counter() - started)
+    assert body
+    return min(timings)
+
+
+async def run(sizes: list[int], repeats: int) -> list[dict[str, object]]:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from backend.app.api.chat import HISTORY_FIELDS
+    from backend.app.api.chat import router as chat_router
+    from backend.app.api.mood import ENTRY_FIELDS
+    from backend.app.api.mood import router as mood_router
+    from backend.app.core.config import Settings
+    from backend.app.core.database import build_engine
+    from backend.app.models import ChatMessage, MoodEntry
+    from backend.app.utils.serialization import RowsJSONResponse
+
+    def response_field(router, path):
+        return next(route for route in router.routes if route.path == path).response_field
+
+    endpoints = (
+        ("/chat/history", ChatMessage, HISTORY_FIELDS, response_field(chat_router, "/chat/history")),
+        ("/mood/entries", MoodEntry, ENTRY_FIELDS, response_field(mood_router, "/mood/entries")),
+    )
+
+    DB_PATH.unlink(missing_ok=True)
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{DB_PATH}"))
+    await seed(engine, max(sizes))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    results = []
+    async with sessions() as session:
+        for path, model, fields, field in endpoints:
+            for size in sizes:
+
+                async def orm_path() -> bytes:
+                    objects = (await session.execute(select(model).where(model.user_id == 1).order_by(model.id).limit(size))).scalars().all()
+                    return JSONResponse(await serialize_response(field=field, response_content=objects)).body
+
+                async def rows_path() -> bytes:
+                    columns = (getattr(model, name) for name in fields)
+                    rows = (await session.execute(select(*columns).where(model.user_id == 1).order_by(model.id).limit(size))).all()
+                    return RowsJSONResponse(fields, rows).body
+
+                assert json.loads(await orm_path()) == json.loads(await rows_path())
+                orm_seconds = await best_of(repeats, orm_path)
+                rows_seconds = await best_of(repeats, rows_path)
+                results.append(
+                    {
+                        "endpoint": path,
+                        "rows": size,
+                        "orm_rows_per_s": round(size / orm_seconds),
+                        "rows_rows_per_s": round(size / rows_seconds),
+                        "speedup": round(orm_seconds / rows_seconds, 2),
+                    }
+                )
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 1_000, 5_000, 10_000])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--stdlib", action="store_true", help="encode with the json module even if orjson is installed")
+    args = parser.parse_args()
+
+    from backend.app.utils import serialization
+
+    if args.stdlib:
+        serialization.orjson = None
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(json.dumps({"encoder": encoder, "results": asyncio.run(run(args.sizes, args.repeats))}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
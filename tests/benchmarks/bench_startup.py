@@ -0,0 +1,67 @@
+"""Cold-start latency: process start to the first served request, on a fresh and an existing database.
+
+Each sample is a new interpreter, so import costs are measured from scratch::
+
+    python -m tests.benchmarks.bench_startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CHILD = """
+import asyncio, json, time
+import httpx  # harness only; not part of the app's import cost
+started = time.perf_counter()
+from backend.app.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/health")).raise_for_status()
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(first_request())
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000, "first_request_ms": (served - started) * 1000}))
+"""
+
+
+def sample(database_url: str) -> dict[str, float]:
+    env = {**os.environ, "COMPANIONAI_DATABASE_URL": database_url}
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def summarize(samples: list[dict[str, float]]) -> dict[str, float]:
+    return {key: round(statistics.median(run[key] for run in samples), 1) for key in samples[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp(prefix="companionai-startup-")) / "startup.db"
+    database_url = f"sqlite+aiosqlite:///{db_path}"
+    fresh, existing = [], []
+    for _ in range(args.runs):
+        db_path.unlink(missing_ok=True)
+        fresh.append(sample(database_url))
+        existing.append(sample(database_url))
+    print(json.dumps({"runs": args.runs, "fresh_database": summarize(fresh), "existing_database": summarize(existing)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cost of a client refresh via ``/sync?since=`` versus re-fetching the full lists, by history size.
+
+For each history size, seeds one user with that many chat messages (and a mood
+entry per five messages) numbered in the change sequence, then times a refresh
+that re-downloads the chat window and every mood entry (``/chat/history`` plus
+``/mood/entries``, what the frontend used to do) against a ``/sync`` delta of
+``--delta`` changes::
+
+    python -m tests.benchmarks.bench_sync
+    python -m tests.benchmarks.bench_sync --sizes 1000 100000 --delta 20 --repeats 50
+
+A delta reads only its own rows over the ``(user_id, change_seq)`` indexes, so its
+latency should stay flat as the history grows.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from ._support import latency_summary, register_and_login, running_app
+
+SEED_CHUNK = 20_000
+
+
+async def seed(user_id: int, messages: int) -> int:
+    from backend.app.core.database import get_engine
+    from backend.app.models import ChatMessage, MoodEntry, User
+
+    start = datetime(2023, 1, 1)
+    seq = 0
+    async with get_engine().begin() as conn:
+        for offset in range(0, messages, SEED_CHUNK):
+            chat_rows, mood_rows = [], []
+            for index in range(offset, min(messages, offset + SEED_CHUNK)):
+                seq += 1
+                created_at = start + timedelta(minutes=index)
+                chat_rows.append(
+                    {"user_id": user_id, "sender": "user" if index % 2 == 0 else "ai", "content": f"message {index}", "created_at": created_at, "change_seq": seq}
+                )
+                if index % 5 == 0:
+                    seq += 1
+                    mood_rows.append(
+                        {"user_id": user_id, "mood": "calm", "source": "chat", "mood_date": created_at.date(), "created_at": created_at, "change_seq": seq}
+                    )
+            await conn.execute(insert(ChatMessage), chat_rows)
+            await conn.execute(insert(MoodEntry), mood_rows)
+        await conn.execute(update(User).where(User.id == user_id).values(change_seq=seq))
+    return seq
+
+
+async def timed_refresh(client, paths: list[str], headers: dict, samples: list[float]) -> int:
+    received = 0
+    started = time.perf_counter()
+    for path in paths:
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        received += len(response.content)
+    samples.append(time.perf_counter() - started)
+    return received
+
+
+async def measure(size: int, delta: int, repeats: int) -> dict[str, object]:
+    from backend.app.api.deps import clear_auth_caches
+    from backend.app.services.mood_trends import mood_trends
+
+    clear_auth_caches()
+    mood_trends.clear()
+    async with running_app() as client:
+        headers = await register_and_login(client, f"sync{size}@example.com")
+        token = await seed(1, size)
+        full_samples: list[float] = []
+        sync_samples: list[float] = []
+        for _ in range(repeats):
+            full_bytes = await timed_refresh(client, ["/chat/history", "/mood/entries"], headers, full_samples)
+            sync_bytes = await timed_refresh(client, [f"/sync?since={max(0, token - delta)}"], headers, sync_samples)
+    return {
+        "messages": size,
+        "full_refresh": {**latency_summary(full_samples), "bytes": full_bytes},
+        "sync_delta": {**latency_summary(sync_samples), "bytes": sync_bytes},
+    }
+
+
+async def run(sizes: list[int], delta: int, repeats: int) -> list[dict[str, object]]:
+    return [await measure(size, delta, repeats) for size in sizes]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--delta", type=int, default=10, help="changes since the client's token")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    # Settings are read at import time, which running_app() defers until here.
+    os.environ.setdefault("COMPANIONAI_ADMISSION_ENABLED", "false")
+    results = asyncio.run(run(args.sizes, args.delta, args.repeats))
+    print(json.dumps({"delta": args.delta, "repeats": args.repeats, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Sustained chat messages/second over POST /chat/respond versus the /chat/ws channel.
+
+Boots the app under uvicorn on a local port so both paths pay real HTTP and
+WebSocket framing::
+
+    python -m tests.benchmarks.bench_websocket --clients 8 --messages 200
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+
+from ._support import DB_PATH
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def post_client(base_url: str, headers: dict[str, str], messages: int) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers) as client:
+        for index in range(messages):
+            response = await client.post("/chat/respond", json={"message": f"Hello friend {index}"})
+            response.raise_for_status()
+
+
+async def socket_client(base_url: str, token: str, messages: int) -> None:
+    import websockets
+
+    async with websockets.connect(f"{base_url.replace('http', 'ws')}/chat/ws?token={token}") as websocket:
+        for index in range(messages):
+            await websocket.send(json.dumps({"message": f"Hello friend {index}"}))
+            json.loads(await websocket.recv())
+
+
+async def run(clients: int, messages: int) -> list[dict[str, object]]:
+    import httpx
+    import uvicorn
+
+    from backend.app.main import app
+
+    DB_PATH.unlink(missing_ok=True)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        await client.post("/auth/register", json={"email": "ws@example.com", "password": "Secret123!"})
+        login = await client.post("/auth/login", data={"username": "ws@example.com", "password": "Secret123!"})
+        token = login.json()["access_token"]
+
+    results = []
+    for path, worker in (
+        ("POST /chat/respond", lambda: post_client(base_url, {"Authorization": f"Bearer {token}"}, messages)),
+        ("WS /chat/ws", lambda: socket_client(base_url, token, messages)),
+    ):
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        results.append({"path": path, "messages": clients * messages, "seconds": round(elapsed, 3), "msgs_per_sec": round(clients * messages / elapsed, 1)})
+
+    server.should_exit = True
+    await serve_task
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.clients, args.messages)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Chat-turn throughput with per-turn commits versus the write-behind writer.
+
+    python -m tests.benchmarks.bench_write_behind --turns 2000 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from ._support import DB_PATH
+
+
+async def run(mode: str, turns: int, concurrency: int) -> dict[str, object]:
+    from backend.app.core.config import settings
+    from backend.app.core.database import AsyncSessionLocal, Base, dispose_engine, get_engine
+    from backend.app.models.user import User
+    from backend.app.schemas.chat import ChatRequest
+    from backend.app.services.conversation import handle_chat
+    from backend.app.services.write_behind import chat_writer
+
+    await dispose_engine()
+    if DB_PATH.exists():
+        DB_PATH.unlink()
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        users = [User(email=f"bench{index}@example.com", password_hash="x") for index in range(concurrency)]
+        session.add_all(users)
+        await session.commit()
+
+    settings.write_behind_enabled = mode == "batched"
+    if settings.write_behind_enabled:
+        chat_writer.start()
+
+    async def simulated_user(user: User) -> None:
+        for index in range(turns // concurrency):
+            async with AsyncSessionLocal() as session:
+                await handle_chat(session=session, user=user, payload=ChatRequest(message=f"Hello friend, turn {index}"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(simulated_user(user) for user in users))
+    await chat_writer.stop()
+    elapsed = time.perf_counter() - started
+
+    completed = (turns // concurrency) * concurrency
+    return {"mode": mode, "turns": completed, "seconds": round(elapsed, 3), "turns_per_sec": round(completed / elapsed, 1), "writer": chat_writer.stats()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    results = [asyncio.run(run(mode, args.turns, args.concurrency)) for mode in ("sync", "batched")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+
+# Point the application to an isolated test database before any test module imports
+# ``backend.app`` (settings are read once, at import time).
+os.environ.setdefault("COMPANIONAI_DATABASE_URL", "sqlite+aiosqlite:///./test_companionai.db")
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from backend.app.core.admission import AdmissionController, AdmissionRejected, ConcurrencyLimiter, RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter_allows_bursts_then_refills_at_the_sustained_rate() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2.0, burst=3, max_keys=10, clock=clock)
+
+    assert [limiter.acquire("alice") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("alice") == pytest.approx(0.5)
+    assert limiter.acquire("bob") == 0.0  # buckets are per key
+
+    clock.now = 0.5
+    assert limiter.acquire("alice") == 0.0
+    assert limiter.acquire("alice") == pytest.approx(0.5)
+
+    clock.now = 60.0  # idle long enough for the bucket to expire: it starts over full
+    assert [limiter.acquire("alice") for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_concurrency_limiter_hands_slots_over_in_order_and_refuses_after_max_wait() -> None:
+    limiter = ConcurrencyLimiter(limit=1, max_wait=0.05)
+
+    async def scenario() -> list:
+        assert await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        limiter.release()
+        handed_over = await waiter
+        refused = await limiter.acquire()  # the slot is still held by the waiter
+        limiter.release()
+        return [handed_over, refused, limiter.in_flight, limiter.waiting]
+
+    assert asyncio.run(scenario()) == [True, False, 0, 0]
+
+
+def test_concurrency_limiter_keeps_a_slot_handed_to_a_cancelled_waiter() -> None:
+    limiter = ConcurrencyLimiter(limit=1, max_wait=1.0)
+
+    async def scenario() -> list:
+        assert await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()  # hands the slot to the waiter...
+        waiter.cancel()  # ...which is cancelled before it resumes
+        try:
+            handed_over = await waiter
+        except asyncio.CancelledError:
+            handed_over = False
+        if handed_over:
+            # Before Python 3.12, ``wait_for`` returns a result that arrived with the cancellation.
+            limiter.release()
+        return [limiter.in_flight, limiter.waiting, await limiter.acquire()]
+
+    assert asyncio.run(scenario()) == [0, 0, True]
+
+
+def test_admission_controller_rejects_with_status_and_retry_after() -> None:
+    controller = AdmissionController(enabled=True, rate=1.0, burst=1, max_users=10, concurrency=1, max_wait=0.0)
+
+    async def scenario() -> AdmissionRejected:
+        async with controller.slot():
+            with pytest.raises(AdmissionRejected) as overload:
+                await controller.acquire()
+        await controller.acquire()
+        controller.release()
+        return overload.value
+
+    overload = asyncio.run(scenario())
+    assert (overload.status_code, overload.retry_after) == (503, 1.0)
+
+    controller.check_rate(7)
+    with pytest.raises(AdmissionRejected) as limited:
+        controller.check_rate(7)
+    assert limited.value.status_code == 429
+    assert 0 < limited.value.retry_after <= 1.0
+    assert controller.stats()["rejected_rate"] == controller.stats()["rejected_overload"] == 1
+
+    disabled = AdmissionController(enabled=False, rate=1.0, burst=1, max_users=10, concurrency=1, max_wait=0.0)
+    for _ in range(5):
+        disabled.check_rate(7)
@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+
+from backend.app.services.analysis import analyze_text
+from backend.app.services.language import COMMON_LANGUAGE_MARKERS, detect_language
+from backend.app.services.sentiment import NEGATIVE_WORDS, POSITIVE_WORDS, detect_sentiment
+from backend.app.utils.matcher import MultiPatternMatcher
+
+
+def naive_language(text: str) -> str:
+    lowered = text.lower()
+    scores = Counter({lang: 0 for lang in COMMON_LANGUAGE_MARKERS})
+    for lang, markers in COMMON_LANGUAGE_MARKERS.items():
+        for marker in markers:
+            if marker in lowered:
+                scores[lang] += 1
+    if any(scores.values()):
+        return scores.most_common(1)[0][0]
+    if any(ch in lowered for ch in {"¿", "¡", "ñ"}):
+        return "es"
+    if any(ch in lowered for ch in {"é", "è", "ç", "à"}):
+        return "fr"
+    if any(ord(ch) > 127 for ch in lowered):
+        return "hi"
+    return "en"
+
+
+def naive_sentiment(text: str) -> str:
+    lowered = text.lower()
+    positive_hits = sum(1 for word in POSITIVE_WORDS if word in lowered)
+    negative_hits = sum(1 for word in NEGATIVE_WORDS if word in lowered)
+    if positive_hits > negative_hits:
+        return "positive"
+    if negative_hits > positive_hits:
+        return "negative"
+    return "neutral"
+
+
+def test_single_pass_analysis_matches_substring_scan() -> None:
+    rng = random.Random(1234)
+    vocabulary = sorted(POSITIVE_WORDS | NEGATIVE_WORDS | set().union(*COMMON_LANGUAGE_MARKERS.values()))
+    vocabulary += ["ok", "the", "¿qué?", "très", "नमस्ते", "Merci!", "xyz", "Hello"]
+    for _ in range(2000):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(0, 8))]
+        text = rng.choice(["", " ", "-"]).join(words)
+        analysis = analyze_text(text)
+        assert analysis.language == naive_language(text) == detect_language(text), text
+        assert analysis.sentiment == naive_sentiment(text) == detect_sentiment(text), text
+
+
+def test_matcher_counts_distinct_overlapping_patterns() -> None:
+    matcher = MultiPatternMatcher({"a": {"he", "she", "hers"}, "b": {"his", "he"}})
+    assert matcher.count("ushers") == {"a": 3, "b": 1}
+    assert matcher.count("he he he") == {"a": 1, "b": 1}
+    assert matcher.count("") == {"a": 0, "b": 0}
+
+
+def test_matcher_handles_large_lexicons() -> None:
+    rng = random.Random(7)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choice(alphabet) for _ in range(rng.randint(4, 10))) for _ in range(30000)}
+    matcher = MultiPatternMatcher({"big": words, "marker": {"needle"}})
+    text = " ".join(["needle"] + sorted(words)[:50]) * 20
+    counts = matcher.count(text)
+
+    assert counts["marker"] == 1
+    assert counts["big"] >= 50
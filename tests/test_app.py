@@ -1,15 +1,28 @@
+import asyncio
+import csv
+import io
+import json
 import os
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
 
 fastapi = pytest.importorskip("fastapi")
+from fastapi import WebSocketDisconnect  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 
 # Point the application to an isolated test database before importing the app.
 os.environ.setdefault("COMPANIONAI_DATABASE_URL", "sqlite+aiosqlite:///./test_companionai.db")
 
+from backend.app.api.deps import clear_auth_caches, user_cache  # noqa: E402
+from backend.app.core.admission import RateLimiter, admission  # noqa: E402
+from backend.app.core import database  # noqa: E402
+from backend.app.core.config import settings  # noqa: E402
 from backend.app.main import app  # noqa: E402  (import after env var set)
+from backend.app.services.mood_trends import mood_trends  # noqa: E402
+from backend.app.services.retention import decompress_messages, retention_job  # noqa: E402
+from backend.app.services.write_behind import chat_writer  # noqa: E402
 
 TEST_DB_PATH = Path("test_companionai.db")
 
@@ -18,12 +31,32 @@ TEST_DB_PATH = Path("test_companionai.db")
 def client():
     if TEST_DB_PATH.exists():
         TEST_DB_PATH.unlink()
+    # Each test starts from an empty database, so cached users from earlier tests are stale.
+    clear_auth_caches()
+    mood_trends.clear()
+    admission.reset()
     with TestClient(app) as client:
         yield client
     if TEST_DB_PATH.exists():
         TEST_DB_PATH.unlink()
 
 
+@pytest.fixture
+def write_behind(monkeypatch):
+    monkeypatch.setattr(settings, "write_behind_enabled", True)
+    monkeypatch.setattr(chat_writer, "interval", 60.0)
+    yield chat_writer
+
+
+@pytest.fixture
+def read_replica(monkeypatch):
+    # A read-only connection to the same file stands in for a replica.
+    monkeypatch.setattr(settings, "database_read_urls", [f"sqlite+aiosqlite:///file:{TEST_DB_PATH.resolve()}?mode=ro&uri=true"])
+    database.recent_writers.clear()
+    yield
+    database.recent_writers.clear()
+
+
 def register_and_login(client: TestClient, email: str = "user@example.com", password: str = "Secret123!") -> str:
     response = client.post(
         "/auth/register",
@@ -95,3 +128,834 @@ def test_chat_when_history_disabled(client: TestClient) -> None:
     mood_response = client.get("/mood/entries", headers=auth_header)
     assert mood_response.status_code == 200
     assert mood_response.json() == []
+
+
+def test_analyze_batch_scores_texts_in_order(client: TestClient) -> None:
+    token = register_and_login(client, email="batch@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+
+    texts = ["Hello friend, I am feeling great today!", "Hola amigo, estoy triste", "ok", "Hello friend, I am feeling great today!"]
+    response = client.post("/chat/analyze-batch", json={"texts": texts}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"language": "en", "sentiment": "positive"},
+        {"language": "es", "sentiment": "negative"},
+        {"language": "en", "sentiment": "neutral"},
+        {"language": "en", "sentiment": "positive"},
+    ]
+
+    unauthenticated = client.post("/chat/analyze-batch", json={"texts": texts})
+    assert unauthenticated.status_code == 401
+
+
+def test_profile_updates_invalidate_cached_user(client: TestClient) -> None:
+    token = register_and_login(client, email="cache@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/users/me", headers=auth_header).json()["display_name"] == "Test User"
+    hits_before = user_cache.hits
+    assert client.get("/users/me", headers=auth_header).status_code == 200
+    assert user_cache.hits == hits_before + 1
+
+    response = client.patch("/users/me", json={"display_name": "Renamed", "history_enabled": False}, headers=auth_header)
+    assert response.status_code == 200
+
+    profile = client.get("/users/me", headers=auth_header).json()
+    assert profile["display_name"] == "Renamed"
+    assert profile["history_enabled"] is False
+
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+    assert client.get("/mood/entries", headers=auth_header).json() == []
+
+
+def test_write_behind_batches_chat_turns_until_flush(write_behind, client: TestClient) -> None:
+    token = register_and_login(client, email="batched@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    batches_before = write_behind.batches
+
+    for index in range(5):
+        response = client.post("/chat/respond", json={"message": f"Hello friend {index}"}, headers=auth_header)
+        assert response.status_code == 200
+
+    # Nothing is committed until the writer flushes (the interval is far in the future).
+    assert write_behind.pending == 15
+    assert client.get("/chat/history", headers=auth_header).json() == []
+
+    client.portal.call(write_behind.stop)
+    assert write_behind.pending == 0
+    assert write_behind.batches == batches_before + 1
+    assert len(client.get("/chat/history", headers=auth_header).json()) == 10
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 5
+    # The writer numbers rows in the change sequence when it commits them.
+    changes = client.get("/sync", params={"since": 0}, headers=auth_header).json()
+    assert (len(changes["messages"]), len(changes["mood_entries"]), changes["token"]) == (10, 5, 15)
+
+
+def test_write_behind_retries_a_failed_flush_without_losing_rows(write_behind, client: TestClient, monkeypatch) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from backend.app.services import write_behind as write_behind_module
+
+    token = register_and_login(client, email="retried@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    for index in range(3):
+        client.post("/chat/respond", json={"message": f"Hello friend {index}"}, headers=auth_header)
+
+    failures = [OperationalError("INSERT", {}, Exception("database is locked")), ValueError("boom")]
+    apply_mood_counts = write_behind_module.apply_mood_counts
+
+    async def flaky_apply_mood_counts(session, rows, sign):
+        # Rows are already flushed by the time this fails, so the retry starts from a rolled-back session.
+        await session.flush()
+        if failures:
+            raise failures.pop(0)
+        await apply_mood_counts(session, rows, sign)
+
+    monkeypatch.setattr(write_behind_module, "apply_mood_counts", flaky_apply_mood_counts)
+    monkeypatch.setattr(write_behind, "retry_backoff", 0.01)
+    retries_before, failed_before = write_behind.retries, write_behind.rows_failed
+
+    client.portal.call(write_behind.stop)
+    assert failures == []
+    assert write_behind.retries == retries_before + 2
+    assert write_behind.rows_failed == failed_before
+    history = client.get("/chat/history", headers=auth_header).json()
+    assert [message["content"] for message in history if message["sender"] == "user"] == [f"Hello friend {index}" for index in range(3)]
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 3
+    assert client.get("/sync", params={"since": 0}, headers=auth_header).json()["token"] == 9
+
+
+def test_write_behind_retry_does_not_reuse_ids_taken_during_the_backoff(write_behind, client: TestClient, monkeypatch) -> None:
+    from backend.app.models.mood import MoodEntry
+    from backend.app.services import write_behind as write_behind_module
+
+    token = register_and_login(client, email="collide@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+
+    failures = [ValueError("boom")]
+    apply_mood_counts = write_behind_module.apply_mood_counts
+
+    async def flaky_apply_mood_counts(session, rows, sign):
+        # The failed flush hands out ids before it is rolled back.
+        await session.flush()
+        if failures:
+            raise failures.pop(0)
+        await apply_mood_counts(session, rows, sign)
+
+    flush_batch = write_behind._flush_batch
+    direct_ids = []
+
+    async def flush_batch_with_a_write_in_between():
+        flushed = await flush_batch()
+        if not flushed and not direct_ids:
+            # Another writer takes the rolled-back ids before the retry.
+            async with database.AsyncSessionLocal() as session:
+                entry = MoodEntry(user_id=write_behind._pending[0].user_id, mood="calm", source="manual")
+                session.add(entry)
+                await session.commit()
+                direct_ids.append(entry.id)
+        return flushed
+
+    monkeypatch.setattr(write_behind_module, "apply_mood_counts", flaky_apply_mood_counts)
+    monkeypatch.setattr(write_behind, "_flush_batch", flush_batch_with_a_write_in_between)
+    monkeypatch.setattr(write_behind, "retry_backoff", 0.01)
+    failed_before = write_behind.rows_failed
+
+    client.portal.call(write_behind.stop)
+    assert failures == [] and direct_ids == [1]
+    assert write_behind.rows_failed == failed_before
+    entries = client.get("/mood/entries", headers=auth_header).json()
+    assert sorted(entry["source"] for entry in entries) == ["chat", "manual"]
+    assert len(client.get("/chat/history", headers=auth_header).json()) == 2
+
+
+def test_history_opt_out_elsewhere_applies_despite_a_cached_user(write_behind, client: TestClient, monkeypatch) -> None:
+    from sqlalchemy import update
+
+    from backend.app.models.user import User
+
+    token = register_and_login(client, email="opt-out@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Queued before the opt-out"}, headers=auth_header)
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+
+    async def disable_history() -> None:
+        # As another worker would: this worker's cached user still says history is on.
+        async with database.AsyncSessionLocal() as session:
+            await session.execute(update(User).where(User.id == user_id).values(history_enabled=False))
+            await session.commit()
+
+    client.portal.call(disable_history)
+    discarded_before = write_behind.rows_discarded
+    client.portal.call(write_behind.stop)
+    assert write_behind.rows_discarded == discarded_before + 3
+
+    monkeypatch.setattr(settings, "write_behind_enabled", False)
+    assert client.post("/chat/respond", json={"message": "Sent after the opt-out"}, headers=auth_header).status_code == 200
+
+    async def stored_rows() -> tuple:
+        from sqlalchemy import func, select
+
+        from backend.app.models import ChatMessage, MoodEntry
+
+        async with database.AsyncSessionLocal() as session:
+            messages = (await session.execute(select(func.count()).select_from(ChatMessage))).scalar_one()
+            entries = (await session.execute(select(func.count()).select_from(MoodEntry))).scalar_one()
+        return messages, entries
+
+    assert client.portal.call(stored_rows) == (0, 0)
+
+
+def test_sync_returns_changes_and_tombstones_since_a_token(client: TestClient) -> None:
+    token = register_and_login(client, email="sync@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Before the snapshot"}, headers=auth_header)
+
+    snapshot = client.get("/sync", headers=auth_header).json()
+    assert [message["sender"] for message in snapshot["messages"]] == ["user", "ai"]
+    assert len(snapshot["mood_entries"]) == 1
+    assert snapshot["token"] == 3 and not snapshot["has_more"]
+    assert client.get("/sync", params={"since": snapshot["token"]}, headers=auth_header).json()["messages"] == []
+
+    client.post("/chat/respond", json={"message": "After the snapshot"}, headers=auth_header)
+    created = client.post("/mood/entries", json={"mood": "calm", "source": "manual", "mood_date": "2024-01-01"}, headers=auth_header).json()
+    client.delete(f"/mood/entries/{snapshot['mood_entries'][0]['id']}", headers=auth_header)
+    bulk = [{"mood": "calm", "source": "import", "mood_date": f"2023-12-{day:02d}"} for day in range(1, 4)]
+    client.post("/mood/entries/bulk", json=bulk, headers=auth_header)
+
+    delta = client.get("/sync", params={"since": snapshot["token"]}, headers=auth_header).json()
+    assert [message["content"] for message in delta["messages"]][0] == "After the snapshot"
+    assert created["id"] in [entry["id"] for entry in delta["mood_entries"]]
+    assert len(delta["mood_entries"]) == 5  # chat turn, manual entry, three imported
+    assert delta["deleted_mood_entries"] == [snapshot["mood_entries"][0]["id"]]
+    assert delta["token"] == snapshot["token"] + 8
+
+    # Small pages walk the same changes in order.
+    since, pages = snapshot["token"], []
+    while True:
+        page = client.get("/sync", params={"since": since, "limit": 4}, headers=auth_header).json()
+        pages.append(page)
+        since = page["token"]
+        if not page["has_more"]:
+            break
+    assert since == delta["token"]
+    assert sum(len(page["messages"]) + len(page["mood_entries"]) + len(page["deleted_mood_entries"]) for page in pages) == 8
+
+    assert client.get("/sync", params={"since": delta["token"] + 100}, headers=auth_header).status_code == 410
+
+
+def test_sync_never_skips_a_change_committed_between_its_reads(client: TestClient) -> None:
+    from datetime import date
+
+    from backend.app.models import ChatMessage, MoodEntry, User
+    from backend.app.services.sync import assign_change_seqs, changes_since
+
+    token = register_and_login(client, email="sync-race@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+    since = client.get("/sync", headers=auth_header).json()["token"]
+    client.post("/mood/entries", json={"mood": "sad", "source": "manual", "mood_date": "2024-01-01"}, headers=auth_header)
+
+    async def commit_elsewhere() -> None:
+        async with database.AsyncSessionLocal() as session:
+            rows = [
+                ChatMessage(user_id=user_id, sender="user", content="Raced in"),
+                MoodEntry(user_id=user_id, mood="calm", source="manual", mood_date=date(2024, 1, 1)),
+            ]
+            await assign_change_seqs(session, rows)
+            session.add_all(rows)
+            await session.commit()
+
+    class Interleaved:
+        """Commits a message and a mood entry right after the messages have been read."""
+
+        def __init__(self, session) -> None:
+            self.session, self.calls = session, 0
+
+        async def execute(self, *args, **kwargs):
+            result = await self.session.execute(*args, **kwargs)
+            self.calls += 1
+            if self.calls == 2:  # the token, then the messages
+                await commit_elsewhere()
+            return result
+
+    async def sync(since: int, interleave: bool) -> dict:
+        async with database.AsyncSessionLocal() as session:
+            user = await session.get(User, user_id)
+            return await changes_since(Interleaved(session) if interleave else session, user, since, limit=10)
+
+    # Unbounded, the mood read would also return the raced entry and move the token past the raced message.
+    raced = client.portal.call(sync, since, True)
+    assert [entry.mood for entry in raced["mood_entries"]] == ["sad"] and raced["messages"] == []
+    assert raced["token"] == since + 1 and not raced["has_more"]
+    following = client.portal.call(sync, raced["token"], False)
+    assert [message.content for message in following["messages"]] == ["Raced in"]
+    assert [entry.mood for entry in following["mood_entries"]] == ["calm"] and following["token"] == since + 3
+
+
+def test_read_routes_use_replicas_except_right_after_the_users_own_write(read_replica, client: TestClient) -> None:
+    token = register_and_login(client, email="replica@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+    [replica] = database.read_engines
+
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+    assert database.read_engine_for(user_id) is database.get_engine()  # sticky after the write
+    assert len(client.get("/chat/history", headers=auth_header).json()) == 2
+
+    database.recent_writers.clear()
+    assert database.read_engine_for(user_id) is replica
+    assert database.read_engine_for(None) is replica
+    assert len(client.get("/chat/history", headers=auth_header).json()) == 2
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 1
+    assert client.get("/sync", headers=auth_header).json()["token"] == 3
+    # Reads alone never make a user sticky.
+    assert database.read_engine_for(user_id) is replica
+
+    async def write_through_replica() -> None:
+        async with replica.begin() as conn:
+            await conn.exec_driver_sql("DELETE FROM chat_messages")
+
+    with pytest.raises(Exception, match="readonly"):
+        client.portal.call(write_through_replica)
+
+
+@pytest.fixture
+def stale_replica(read_replica, monkeypatch, client: TestClient):
+    """Returns a function that freezes a copy of the database and makes it the only replica; it never catches up."""
+    import itertools
+    import sqlite3
+
+    stale_path = TEST_DB_PATH.with_name("test_companionai_stale.db")
+    engines = []
+
+    def freeze() -> None:
+        with sqlite3.connect(TEST_DB_PATH) as source, sqlite3.connect(stale_path) as stale:
+            source.backup(stale)
+        engines.append(database.build_engine(url=f"sqlite+aiosqlite:///file:{stale_path.resolve()}?mode=ro&uri=true", read_only=True))
+        monkeypatch.setattr(database, "_next_read_engine", itertools.cycle(engines))
+
+    yield freeze
+    for engine in engines:
+        client.portal.call(engine.dispose)
+    stale_path.unlink(missing_ok=True)
+
+
+def test_sync_ignores_a_lagging_replica(stale_replica, client: TestClient) -> None:
+    token = register_and_login(client, email="lagging@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    stale_replica()
+
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+    database.recent_writers.clear()
+    assert client.get("/chat/history", headers=auth_header).json() == []  # served by the stale replica
+    snapshot = client.get("/sync", headers=auth_header).json()
+    assert snapshot["token"] == 3 and len(snapshot["messages"]) == 2
+    delta = client.get("/sync", params={"since": snapshot["token"]}, headers=auth_header)
+    assert delta.status_code == 200 and delta.json()["token"] == 3
+
+
+def test_new_users_are_found_despite_a_lagging_replica(stale_replica, client: TestClient) -> None:
+    stale_replica()  # frozen before anyone registers
+    token = register_and_login(client, email="lagging-new@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    for path in ("/users/me", "/chat/history", "/mood/entries"):
+        assert client.get(path, headers=auth_header).status_code == 200, path
+
+    # Without the read-your-writes mark or a cached user, the lookup falls back to the primary.
+    database.recent_writers.clear()
+    clear_auth_caches()
+    assert client.get("/chat/history", headers=auth_header).status_code == 200
+    assert database.recent_writers.get(client.get("/users/me", headers=auth_header).json()["id"])
+
+
+def test_socket_turns_route_the_users_reads_to_the_primary(stale_replica, client: TestClient) -> None:
+    token = register_and_login(client, email="lagging-socket@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    stale_replica()
+    database.recent_writers.clear()
+    assert client.get("/chat/history", headers=auth_header).json() == []  # reads go to the stale replica
+
+    with client.websocket_connect(f"/chat/ws?token={token}") as websocket:
+        websocket.send_json({"message": "Hello over the socket"})
+        websocket.receive_json()
+    assert [message["sender"] for message in client.get("/chat/history", headers=auth_header).json()] == ["user", "ai"]
+
+
+def test_replica_etags_describe_the_rows_the_replica_served(stale_replica, client: TestClient) -> None:
+    token = register_and_login(client, email="lagging-etag@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    stale_replica()
+
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+    database.recent_writers.clear()
+    stale = client.get("/chat/history", headers=auth_header)
+    assert stale.json() == []
+    stale_mood = client.get("/mood/entries", headers=auth_header)
+    assert stale_mood.json() == []
+
+    # Once reads reach data that has the turn, the stale tags no longer match.
+    database.mark_written(client.get("/users/me", headers=auth_header).json()["id"])
+    fresh = client.get("/chat/history", headers={**auth_header, "If-None-Match": stale.headers["ETag"]})
+    assert fresh.status_code == 200 and len(fresh.json()) == 2
+    fresh_mood = client.get("/mood/entries", headers={**auth_header, "If-None-Match": stale_mood.headers["ETag"]})
+    assert fresh_mood.status_code == 200 and len(fresh_mood.json()) == 1
+
+
+def test_history_keyset_pagination(client: TestClient) -> None:
+    token = register_and_login(client, email="pager@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    for index in range(3):
+        client.post("/chat/respond", json={"message": f"message {index}"}, headers=auth_header)
+
+    everything = client.get("/chat/history", headers=auth_header).json()
+    assert len(everything) == 6
+
+    pages = []
+    response = client.get("/chat/history", params={"limit": 4}, headers=auth_header)
+    pages.append(response.json())
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/chat/history", params={"limit": 4, "before": cursor}, headers=auth_header)
+    pages.append(response.json())
+    assert "X-Next-Cursor" not in response.headers
+    assert [message["id"] for message in pages[1] + pages[0]] == [message["id"] for message in everything]
+
+    oldest_page = client.get("/chat/history", params={"limit": 2, "before": cursor}, headers=auth_header)
+    newer = client.get("/chat/history", params={"limit": 10, "after": oldest_page.headers["X-Next-Cursor"]}, headers=auth_header).json()
+    assert [message["id"] for message in newer] == [message["id"] for message in everything[1:]]
+
+    assert client.get("/chat/history", params={"before": "not-a-cursor"}, headers=auth_header).status_code == 400
+
+
+def test_export_streams_chat_and_mood_history(client: TestClient) -> None:
+    token = register_and_login(client, email="export@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Hello friend, great day"}, headers=auth_header)
+    client.post("/mood/entries", json={"mood": "calm", "source": "manual", "mood_date": "2024-01-02"}, headers=auth_header)
+
+    response = client.get("/users/me/export", headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["chat_message", "chat_message", "mood_entry", "mood_entry"]
+    assert records[0]["content"] == "Hello friend, great day"
+
+    response = client.get("/users/me/export", params={"format": "csv"}, headers=auth_header)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 4
+    assert rows[2]["mood_date"] == "2024-01-02"
+
+
+def test_mood_summary_rolls_up_entries(client: TestClient) -> None:
+    token = register_and_login(client, email="summary@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "I feel great"}, headers=auth_header)
+    client.post("/chat/respond", json={"message": "So tired and sad"}, headers=auth_header)
+    for mood_date in ("2024-03-04", "2024-03-05", "2024-03-05"):
+        client.post("/mood/entries", json={"mood": "calm", "source": "face", "mood_date": mood_date}, headers=auth_header)
+
+    daily = client.get("/mood/summary", params={"end": "2024-12-31"}, headers=auth_header).json()
+    assert daily == [
+        {"period_start": "2024-03-04", "total": 1, "moods": {"calm": 1}, "sources": {"face": 1}},
+        {"period_start": "2024-03-05", "total": 2, "moods": {"calm": 2}, "sources": {"face": 2}},
+    ]
+
+    weekly = client.get("/mood/summary", params={"bucket": "week", "end": "2024-12-31"}, headers=auth_header).json()
+    assert weekly == [{"period_start": "2024-03-04", "total": 3, "moods": {"calm": 3}, "sources": {"face": 3}}]
+
+    today = client.get("/mood/summary", params={"start": "2025-01-01"}, headers=auth_header).json()
+    assert len(today) == 1
+    assert today[0]["moods"] == {"uplifted": 1, "concerned": 1}
+    assert today[0]["sources"] == {"chat": 2}
+
+    entry_id = next(entry["id"] for entry in client.get("/mood/entries", headers=auth_header).json() if entry["mood_date"] == "2024-03-04")
+    assert client.delete(f"/mood/entries/{entry_id}", headers=auth_header).status_code == 204
+    daily = client.get("/mood/summary", params={"end": "2024-12-31"}, headers=auth_header).json()
+    assert [bucket["period_start"] for bucket in daily] == ["2024-03-05"]
+
+
+def test_mood_trends_follow_events_and_survive_a_restart(client: TestClient) -> None:
+    token = register_and_login(client, email="trends@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    assert client.get("/mood/trends", headers=auth_header).json()["current_streak_days"] == 0
+
+    client.post("/chat/respond", json={"message": "I feel great"}, headers=auth_header)
+    client.post("/chat/respond", json={"message": "So tired and sad"}, headers=auth_header)
+    client.post("/chat/respond", json={"message": "Happy and grateful"}, headers=auth_header)
+    trends = client.get("/mood/trends", headers=auth_header).json()
+    assert trends["windows"][0] == {"days": 7, "total": 3, "moods": {"uplifted": 2, "concerned": 1}}
+    assert trends["sentiment_samples"] == 3
+    assert 0 < trends["sentiment_score"] < 1
+    assert (trends["current_streak_days"], trends["longest_streak_days"]) == (1, 1)
+
+    # Snapshot, then lose the in-memory state: the snapshot plus newer rows must match a rebuild.
+    asyncio.run(mood_trends.snapshot())
+    mood_trends.clear()
+    client.post("/chat/respond", json={"message": "Feeling great again"}, headers=auth_header)
+    reloaded = client.get("/mood/trends", headers=auth_header).json()
+    assert mood_trends.stats()["loads"] == 1
+    rebuilt = client.post("/mood/trends/rebuild", headers=auth_header).json()
+    assert reloaded["windows"] == rebuilt["windows"]
+    assert reloaded["sentiment_samples"] == rebuilt["sentiment_samples"] == 4
+    assert reloaded["sentiment_score"] == pytest.approx(rebuilt["sentiment_score"])
+
+    # Deleting an entry invalidates the state and its snapshot.
+    entry_id = client.get("/mood/entries", headers=auth_header).json()[0]["id"]
+    client.delete(f"/mood/entries/{entry_id}", headers=auth_header)
+    assert client.get("/mood/trends", headers=auth_header).json()["windows"][0]["total"] == 3
+
+
+def test_mood_trends_wait_for_queued_rows_and_keep_the_newest_snapshot(write_behind, client: TestClient) -> None:
+    from backend.app.models import MoodTrendSnapshot
+    from backend.app.services.mood_trends import MoodTrendService
+
+    token = register_and_login(client, email="trend-workers@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+    other_worker = MoodTrendService(max_users=10, idle_seconds=60, half_life_days=7, snapshot_interval=60)
+
+    async def flush() -> None:
+        await write_behind.stop()
+        write_behind.start()
+
+    async def trends_on(service: MoodTrendService) -> dict:
+        async with database.AsyncSessionLocal() as session:
+            return await service.trends(session, user_id)
+
+    # Loaded while the turn is still queued: the flush, not the load, must account for it.
+    client.post("/chat/respond", json={"message": "I feel great"}, headers=auth_header)
+    assert client.get("/mood/trends", headers=auth_header).json()["windows"][0]["total"] == 0
+    assert client.portal.call(trends_on, other_worker)["windows"][0]["total"] == 0
+    client.portal.call(flush)
+    assert client.get("/mood/trends", headers=auth_header).json()["windows"][0]["total"] == 1
+
+    # The other worker never saw that turn; it catches up from the change sequence.
+    assert client.portal.call(trends_on, other_worker)["windows"][0]["total"] == 1
+    client.post("/chat/respond", json={"message": "Still great"}, headers=auth_header)
+    client.portal.call(flush)
+    assert client.get("/mood/trends", headers=auth_header).json()["sentiment_samples"] == 2
+    client.portal.call(mood_trends.snapshot)
+    # A worker that is behind must not overwrite the newer snapshot.
+    client.portal.call(other_worker.snapshot)
+
+    async def stored_change_seq() -> int:
+        async with database.AsyncSessionLocal() as session:
+            return (await session.get(MoodTrendSnapshot, user_id)).change_seq
+
+    assert client.portal.call(stored_change_seq) == 6
+    mood_trends.clear()
+    loads_before = mood_trends.stats()["loads"]
+    assert client.get("/mood/trends", headers=auth_header).json()["sentiment_samples"] == 2
+    assert mood_trends.stats()["loads"] == loads_before + 1
+
+
+def test_bulk_mood_import_accepts_json_and_ndjson_with_dedupe(client: TestClient) -> None:
+    token = register_and_login(client, email="bulk@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    entries = [{"mood": "calm", "source": "import", "mood_date": f"2024-01-{day:02d}"} for day in range(1, 11)]
+
+    response = client.post("/mood/entries/bulk", json=entries, headers=auth_header)
+    assert response.status_code == 201
+    assert response.json() == {"received": 10, "inserted": 10, "duplicates": 0}
+
+    # Days 9-12 as NDJSON: 9 and 10 already exist, and day 12 is repeated within the upload.
+    lines = [{"mood": "uplifted", "source": "import", "mood_date": f"2024-01-{day:02d}"} for day in (9, 10, 11, 12, 12)]
+    response = client.post(
+        "/mood/entries/bulk",
+        params={"dedupe": "true"},
+        content="\n".join(json.dumps(line) for line in lines) + "\n",
+        headers={**auth_header, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.json() == {"received": 5, "inserted": 2, "duplicates": 3}
+
+    summary = client.get("/mood/summary", params={"bucket": "month", "end": "2024-12-31"}, headers=auth_header).json()
+    assert summary == [{"period_start": "2024-01-01", "total": 12, "moods": {"calm": 10, "uplifted": 2}, "sources": {"import": 12}}]
+
+    invalid = client.post("/mood/entries/bulk", json=[entries[0], {"mood": "calm", "source": "import", "mood_date": "not-a-date"}], headers=auth_header)
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"] == ["body", 1, "mood_date"]
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 12
+
+
+def test_bulk_mood_import_caps_body_and_line_size(client: TestClient, monkeypatch) -> None:
+    token = register_and_login(client, email="bulk-limits@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(settings, "mood_bulk_max_bytes", 1024)
+    monkeypatch.setattr(settings, "mood_bulk_max_line_bytes", 128)
+    entries = [{"mood": "calm", "source": "import", "mood_date": f"2024-01-{day:02d}"} for day in range(1, 31)]
+    ndjson = {**auth_header, "Content-Type": "application/x-ndjson"}
+
+    assert client.post("/mood/entries/bulk", json=entries, headers=auth_header).status_code == 413
+
+    def chunked(body: bytes):
+        # No Content-Length: only the running count can catch it.
+        for offset in range(0, len(body), 100):
+            yield body[offset : offset + 100]
+
+    body = "\n".join(json.dumps(entry) for entry in entries).encode()
+    assert client.post("/mood/entries/bulk", content=chunked(body), headers=ndjson).status_code == 413
+    assert client.post("/mood/entries/bulk", content=chunked(b"[" + b" " * 200), headers=ndjson).status_code == 413
+    small = "\n".join(json.dumps(entry) for entry in entries[:4]).encode()
+    assert client.post("/mood/entries/bulk", content=chunked(small), headers=ndjson).json()["inserted"] == 4
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 4
+
+
+def test_retention_purges_expired_messages_in_batches_and_archives_them(client: TestClient, monkeypatch) -> None:
+    from sqlalchemy import insert, select
+
+    from backend.app.core import database
+    from backend.app.models import ChatArchive, ChatMessage
+
+    token = register_and_login(client, email="retention@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+    client.post("/chat/respond", json={"message": "Still fresh"}, headers=auth_header)
+
+    async def seed_old_messages() -> None:
+        async with database.AsyncSessionLocal() as session:
+            old = datetime.utcnow() - timedelta(days=40)
+            await session.execute(
+                insert(ChatMessage),
+                [{"user_id": user_id, "sender": "user", "content": f"old {index}", "created_at": old + timedelta(minutes=index)} for index in range(25)],
+            )
+            await session.commit()
+
+    async def archives() -> list:
+        async with database.AsyncSessionLocal() as session:
+            return (await session.execute(select(ChatArchive).order_by(ChatArchive.id))).scalars().all()
+
+    asyncio.run(seed_old_messages())
+    assert asyncio.run(retention_job.run_once()) == 0  # no window configured yet
+
+    profile = client.patch("/users/me", json={"history_retention_days": 30}, headers=auth_header).json()
+    assert profile["history_retention_days"] == 30
+    monkeypatch.setattr(retention_job, "batch_rows", 10)
+    monkeypatch.setattr(retention_job, "archive", True)
+    assert asyncio.run(retention_job.run_once()) == 25
+
+    history = client.get("/chat/history", headers=auth_header).json()
+    assert [message["content"] for message in history] == ["Still fresh", history[1]["content"]]
+    stored = asyncio.run(archives())
+    assert [archive.message_count for archive in stored] == [10, 10, 5]
+    assert [message["content"] for message in decompress_messages(stored[0].payload)][:2] == ["old 0", "old 1"]
+    assert "retention_rows_purged_total 25" in client.get("/metrics").text
+
+    client.patch("/users/me", json={"history_retention_days": None}, headers=auth_header)
+    assert client.get("/users/me", headers=auth_header).json()["history_retention_days"] is None
+
+
+def test_search_ranks_the_callers_messages_and_follows_deletes(client: TestClient) -> None:
+    token = register_and_login(client, email="search@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    other_header = {"Authorization": f"Bearer {register_and_login(client, email='other@example.com')}"}
+    for message in ("I walked the dog in the park", "The dog and the other dog played", "Cooking pasta tonight"):
+        client.post("/chat/respond", json={"message": message}, headers=auth_header)
+    client.post("/chat/respond", json={"message": "My dog is asleep"}, headers=other_header)
+
+    hits = client.get("/chat/search", params={"q": "dog"}, headers=auth_header).json()
+    # Replies quote the message, so each user message has a matching AI message.
+    assert [hit["snippet"] for hit in hits if hit["sender"] == "user"] == ["The [dog] and the other [dog] played", "I walked the [dog] in the park"]
+    assert len(hits) == 4 and hits[0]["score"] >= hits[-1]["score"]
+    assert client.get("/chat/search", params={"q": "dog", "limit": 1, "offset": 1}, headers=auth_header).json() == hits[1:2]
+    assert [hit["snippet"] for hit in client.get("/chat/search", params={"q": "past*"}, headers=auth_header).json() if hit["sender"] == "user"] == [
+        "Cooking [pasta] tonight"
+    ]
+    assert client.get("/chat/search", params={"q": 'dog" OR "pasta'}, headers=auth_header).json() == []
+    # The per-user owner token is not searchable text.
+    user_id = client.get("/users/me", headers=auth_header).json()["id"]
+    assert client.get("/chat/search", params={"q": f"u{user_id}"}, headers=auth_header).json() == []
+    assert client.get("/chat/search", params={"q": f"u{user_id} dog"}, headers=auth_header).json() == []
+
+    asyncio.run(retention_job.purge_user(user_id, datetime.utcnow() + timedelta(days=1)))
+    assert client.get("/chat/search", params={"q": "dog"}, headers=auth_header).json() == []
+    assert client.get("/chat/search", params={"q": "asleep"}, headers=other_header).json()
+
+
+def test_streaming_reply_emits_meta_first_and_persists_after(client: TestClient) -> None:
+    token = register_and_login(client, email="stream@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/chat/respond/stream", json={"message": "Hello friend, I am feeling great today!"}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    assert events[0][0] == "meta"
+    assert events[0][1]["sentiment"] == "positive"
+    assert events[-1][0] == "done"
+    streamed = "".join(data["text"] for name, data in events if name == "delta")
+    assert streamed == events[-1][1]["reply"]
+
+    history = client.get("/chat/history", headers=auth_header).json()
+    assert [message["sender"] for message in history] == ["user", "ai"]
+    assert history[1]["content"] == streamed
+
+
+def test_websocket_chat_keeps_order_and_honours_profile_changes(client: TestClient) -> None:
+    token = register_and_login(client, email="socket@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+
+    with client.websocket_connect(f"/chat/ws?token={token}") as websocket:
+        for index in range(3):
+            websocket.send_json({"message": f"Hello friend number {index}"})
+        replies = [websocket.receive_json() for _ in range(3)]
+        assert [reply["reply"].endswith(f"number {index}'.") for index, reply in enumerate(replies)] == [True] * 3
+
+        websocket.send_text("not json")
+        assert websocket.receive_json()["error"] == "invalid_request"
+
+        client.patch("/users/me", json={"history_enabled": False}, headers=auth_header)
+        client.get("/users/me", headers=auth_header)  # caches the new profile again
+        websocket.send_json({"message": "Should not be stored"})
+        assert websocket.receive_json()["mood"] == "calm"
+
+    assert len(client.get("/mood/entries", headers=auth_header).json()) == 3
+
+    async def stored_contents() -> list:
+        from sqlalchemy import select
+
+        from backend.app.models import ChatMessage
+
+        async with database.AsyncSessionLocal() as session:
+            return (await session.execute(select(ChatMessage.content))).scalars().all()
+
+    assert "Should not be stored" not in client.portal.call(stored_contents)
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/chat/ws?token=bogus") as websocket:
+            websocket.receive_json()
+
+
+def test_websocket_survives_a_failing_frame(client: TestClient, monkeypatch) -> None:
+    from backend.app.api import chat
+
+    token = register_and_login(client, email="socket-error@example.com")
+    handle_chat = chat.handle_chat
+    calls = []
+
+    async def failing_once(**kwargs):
+        calls.append(kwargs["payload"].message)
+        if len(calls) == 1:
+            raise RuntimeError("backend down")
+        return await handle_chat(**kwargs)
+
+    monkeypatch.setattr(chat, "handle_chat", failing_once)
+    with client.websocket_connect(f"/chat/ws?token={token}") as websocket:
+        websocket.send_json({"message": "First try"})
+        assert websocket.receive_json() == {"error": "internal"}
+        websocket.send_json({"message": "Second try"})
+        assert websocket.receive_json()["reply"]
+    assert calls == ["First try", "Second try"]
+
+
+def test_idle_websocket_holds_no_open_transaction(client: TestClient, monkeypatch) -> None:
+    token = register_and_login(client, email="socket-idle@example.com")
+    client.patch("/users/me", json={"history_enabled": False}, headers={"Authorization": f"Bearer {token}"})
+    session_factory = database.AsyncSessionLocal
+    sessions = []
+
+    def recording_session_factory():
+        session = session_factory()
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", recording_session_factory)
+    with client.websocket_connect(f"/chat/ws?token={token}") as websocket:
+        websocket.send_json({"message": "Nothing here is stored"})
+        assert websocket.receive_json()["reply"]
+        # The socket now waits for its next frame; its session must not sit in a transaction.
+        assert sessions and not any(session.in_transaction() for session in sessions)
+
+
+def test_list_reads_revalidate_with_etags_and_large_lists_are_gzipped(client: TestClient) -> None:
+    token = register_and_login(client, email="etag@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+
+    for path in ("/chat/history", "/mood/entries", "/users/me"):
+        first = client.get(path, headers=auth_header)
+        etag = first.headers["ETag"]
+        again = client.get(path, headers={**auth_header, "If-None-Match": etag})
+        assert again.status_code == 304, path
+        assert again.content == b"" and again.headers["ETag"] == etag
+
+    history_etag = client.get("/chat/history", headers=auth_header).headers["ETag"]
+    assert client.get("/chat/history", params={"limit": 1}, headers={**auth_header, "If-None-Match": history_etag}).status_code == 200
+    mood_etag = client.get("/mood/entries", headers=auth_header).headers["ETag"]
+    profile_etag = client.get("/users/me", headers=auth_header).headers["ETag"]
+
+    client.post("/mood/entries", json={"mood": "calm", "source": "manual", "mood_date": "2024-01-01"}, headers=auth_header)
+    assert client.get("/mood/entries", headers={**auth_header, "If-None-Match": mood_etag}).status_code == 200
+    # History and mood share the user's change sequence, so any write revalidates both.
+    history_etag = client.get("/chat/history", headers=auth_header).headers["ETag"]
+
+    client.patch("/users/me", json={"display_name": "Renamed"}, headers=auth_header)
+    assert client.get("/users/me", headers={**auth_header, "If-None-Match": profile_etag}).json()["display_name"] == "Renamed"
+    assert client.get("/chat/history", headers={**auth_header, "If-None-Match": history_etag}).status_code == 200
+
+    # A write committed by another worker (nothing in this process is told) still changes the tags.
+    from sqlalchemy import update
+
+    from backend.app.models import User
+
+    profile_etag = client.get("/users/me", headers=auth_header).headers["ETag"]
+    history_etag = client.get("/chat/history", headers=auth_header).headers["ETag"]
+
+    async def update_elsewhere() -> None:
+        async with database.get_engine().begin() as conn:
+            await conn.execute(update(User).values(display_name="Elsewhere", profile_version=User.profile_version + 1, change_seq=User.change_seq + 1))
+
+    client.portal.call(update_elsewhere)
+    assert client.get("/users/me", headers={**auth_header, "If-None-Match": profile_etag}).json()["display_name"] == "Elsewhere"
+    assert client.get("/chat/history", headers={**auth_header, "If-None-Match": history_etag}).status_code == 200
+
+    client.post("/chat/respond", json={"message": "Hello again " + "words " * 200}, headers=auth_header)
+    response = client.get("/chat/history", headers={**auth_header, "If-None-Match": history_etag, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()) == 4  # the client decompresses transparently
+    assert "Content-Encoding" not in client.get("/users/me", headers={**auth_header, "Accept-Encoding": "gzip"}).headers
+
+
+def test_expensive_routes_are_rate_limited_per_user(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(admission, "rate_limiter", RateLimiter(rate=0.5, burst=2, max_keys=100))
+    noisy = {"Authorization": f"Bearer {register_and_login(client, email='noisy@example.com')}"}
+    quiet = {"Authorization": f"Bearer {register_and_login(client, email='quiet@example.com')}"}
+
+    statuses = [client.post("/chat/respond", json={"message": "Hello"}, headers=noisy).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    refused = client.post("/chat/analyze-batch", json={"texts": ["hi"]}, headers=noisy)
+    assert refused.status_code == 429
+    assert 1 <= int(refused.headers["Retry-After"]) <= 2
+
+    # Cheap reads are not charged, and other users keep their own budget.
+    assert client.get("/chat/history", headers=noisy).status_code == 200
+    assert client.post("/chat/respond", json={"message": "Hello"}, headers=quiet).status_code == 200
+
+    with client.websocket_connect(f"/chat/ws?token={noisy['Authorization'][7:]}") as websocket:
+        websocket.send_json({"message": "Hello again"})
+        frame = websocket.receive_json()
+        assert frame["error"] == "rate_limited" and frame["retry_after"] > 0
+
+    assert 'admission_rejected_total{reason="rate"}' in client.get("/metrics").text
+
+
+def test_metrics_endpoint_reports_routes_stages_and_queries(client: TestClient) -> None:
+    token = register_and_login(client, email="metrics@example.com")
+    auth_header = {"Authorization": f"Bearer {token}"}
+    client.post("/chat/respond", json={"message": "Hello friend"}, headers=auth_header)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/chat/respond",status="200"}' in body
+    assert 'chat_stage_duration_seconds_count{stage="analysis"}' in body
+    assert 'chat_stage_duration_seconds_count{stage="db_commit"}' in body
+    assert 'http_request_db_queries_bucket{route="/chat/respond",le="+Inf"}' in body
+    assert 'reply_backend_duration_seconds_count{backend="template"}' in body
+    assert "auth_cache_hits" in body
@@ -0,0 +1,55 @@
+import asyncio
+import subprocess
+import sys
+
+from sqlalchemy import text
+
+from backend.app.core.config import Settings
+from backend.app.core.database import SCHEMA_VERSION, build_engine, engine_options, ensure_schema, stored_schema_version
+
+
+def test_performance_profile_applies_sqlite_pragmas_and_pool(tmp_path) -> None:
+    config = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'perf.db'}", database_profile="performance")
+
+    async def read_pragmas() -> dict[str, object]:
+        engine = build_engine(config)
+        try:
+            async with engine.connect() as conn:
+                return {name: (await conn.execute(text(f"PRAGMA {name}"))).scalar() for name in ("journal_mode", "synchronous", "busy_timeout")}
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(read_pragmas()) == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": config.sqlite_busy_timeout_ms}
+    assert engine_options(config)["pool_size"] == config.database_pool_size
+
+
+def test_default_profile_keeps_engine_defaults() -> None:
+    config = Settings(database_url="sqlite+aiosqlite:///./default.db")
+    assert engine_options(config) == {"future": True, "echo": False}
+
+
+def test_ensure_schema_skips_databases_at_current_version(tmp_path) -> None:
+    config = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+
+    async def boot_twice() -> tuple[bool, bool, object]:
+        engine = build_engine(config)
+        try:
+            async with engine.begin() as conn:
+                first = await conn.run_sync(ensure_schema)
+            async with engine.begin() as conn:
+                second = await conn.run_sync(ensure_schema)
+                version = await conn.run_sync(stored_schema_version)
+            return first, second, version
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(boot_twice()) == (True, False, SCHEMA_VERSION)
+
+
+def test_importing_the_app_defers_engine_and_crypto() -> None:
+    script = (
+        "import sys; import backend.app.main; from backend.app.core import database; "
+        "print(database.engine is None, any(name.split('.')[0] in ('passlib', 'jose', 'aiosqlite') for name in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["True", "False"]
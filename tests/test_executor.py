@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from backend.app.core.executor import CPUExecutor
+
+
+def test_executor_runs_calls_and_tracks_wait_metrics() -> None:
+    executor = CPUExecutor("thread", max_workers=2)
+
+    async def scenario() -> list[int]:
+        return await asyncio.gather(*(executor.run(pow, 2, exponent) for exponent in range(8)))
+
+    try:
+        assert asyncio.run(scenario()) == [2**exponent for exponent in range(8)]
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["submitted"] == stats["completed"] == 8
+    assert stats["in_flight"] == 0
+    assert stats["max_queue_depth"] == 6
+    assert stats["max_wait_seconds"] >= stats["avg_wait_seconds"] >= 0.0
+
+
+def test_executor_rejects_unknown_kind() -> None:
+    with pytest.raises(ValueError):
+        CPUExecutor("fiber")
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.app.core import database
+from backend.app.core.config import Settings
+from backend.app.core.database import Base, build_engine
+from backend.app.models import ChatMessage, User
+from backend.app.services.export import EXPORT_BATCH_ROWS, export_stream
+
+EXPORT_ROWS = 40_000
+
+
+def test_export_streams_in_batches_with_bounded_memory(tmp_path, monkeypatch) -> None:
+    # A CI-sized version of tests/benchmarks/bench_export.py: memory must not grow with the history.
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'export.db'}"))
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+
+    async def export() -> dict:
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(insert(User), [{"id": 1, "email": "a@example.com", "password_hash": "x"}])
+                start = datetime(2020, 1, 1)
+                await conn.execute(
+                    insert(ChatMessage),
+                    [
+                        {"user_id": 1, "sender": "user", "content": f"message number {index} " + "x" * 100, "created_at": start + timedelta(seconds=index)}
+                        for index in range(EXPORT_ROWS)
+                    ],
+                )
+            stats = {"chunks": 0, "bytes": 0, "lines": 0, "first_chunk_lines": 0}
+            tracemalloc.start()
+            try:
+                async for chunk in export_stream(1, "ndjson"):
+                    lines = chunk.count(b"\n")
+                    if not stats["chunks"]:
+                        stats["first_chunk_lines"] = lines
+                        stats["first_record"] = json.loads(chunk.split(b"\n", 1)[0])
+                    stats["chunks"] += 1
+                    stats["bytes"] += len(chunk)
+                    stats["lines"] += lines
+                stats["peak"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            return stats
+        finally:
+            await engine.dispose()
+
+    stats = asyncio.run(export())
+    assert stats["lines"] == EXPORT_ROWS
+    assert stats["first_record"]["content"].startswith("message number 0 ")
+    # Rows arrive a server-side batch at a time, never as one buffered body...
+    assert stats["first_chunk_lines"] <= EXPORT_BATCH_ROWS
+    assert stats["chunks"] >= EXPORT_ROWS // EXPORT_BATCH_ROWS
+    # ...so peak allocations (about one batch) stay well below the size of the export.
+    assert stats["peak"] < stats["bytes"] / 2, stats
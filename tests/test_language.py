@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from backend.app.services import language
+from backend.app.services.language import ReplyTemplates, format_reply, load_reply_templates, use_reply_templates
+
+
+def test_format_reply_uses_precompiled_templates_with_fallbacks() -> None:
+    assert format_reply("es", "hola {amigo}", "positive") == "Te escucho. ¡Eso suena alentador! Dijiste: 'hola {amigo}'."
+    # Unknown language -> English template with the neutral English line, as before.
+    assert format_reply("de", "hallo", "positive") == "I hear you. Thanks for sharing with me. You said: 'hallo'."
+    assert format_reply("fr", "x" * 200, "unknown") == f"Je t'écoute. Merci de partager avec moi. Tu as dit : '{'x' * 200}'."
+
+
+def test_reply_templates_load_new_languages_from_a_data_file(tmp_path) -> None:
+    data = json.loads(language.DEFAULT_TEMPLATES_PATH.read_text(encoding="utf-8"))
+    data["templates"]["de"] = "Ich höre dich. {sentiment_line} Du sagtest: '{message}'."
+    for lines in data["sentiment_lines"].values():
+        lines["de"] = "Danke."
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    original = language.reply_templates
+    use_reply_templates(load_reply_templates(str(path)))
+    try:
+        assert format_reply("de", "hallo", "positive") == "Ich höre dich. Danke. Du sagtest: 'hallo'."
+    finally:
+        use_reply_templates(original)
+    assert format_reply("de", "hallo", "positive").startswith("I hear you.")
+
+
+def test_reply_templates_require_english_fallback() -> None:
+    with pytest.raises(ValueError):
+        ReplyTemplates({"es": "{message}"}, {"neutral": {"es": "ok"}})
+
+
+def test_reply_templates_follow_format_syntax() -> None:
+    neutral = {"neutral": {"en": "ok"}}
+    templates = ReplyTemplates({"en": "{{{sentiment_line}}} {message} {{}}"}, neutral)
+    assert templates.parts("en", "neutral") == ("{ok} ", " {}")
+    for broken in ("{message} and {message}", "no placeholder", "{message} {name}", "{message!r}", "{message", "}{message}"):
+        with pytest.raises(ValueError):
+            ReplyTemplates({"en": broken}, neutral)
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend.app.services.mood_trends import MoodTrend
+from backend.app.utils.cache import TTLCache
+
+START = datetime(2024, 3, 1, 12, 0)
+
+
+def test_streaks_extend_on_consecutive_days_and_reset_after_a_gap() -> None:
+    trend = MoodTrend()
+    for offset in (0, 1, 1, 2, 5, 6):
+        assert trend.add_mood("calm", START.date() + timedelta(days=offset), START + timedelta(days=offset))
+    assert (trend.streak, trend.longest_streak, trend.last_active) == (2, 3, date(2024, 3, 7))
+
+    summary = trend.summary(date(2024, 3, 8), START + timedelta(days=7), half_life=7.0)
+    assert summary["current_streak_days"] == 2
+    assert trend.summary(date(2024, 3, 9), START + timedelta(days=8), half_life=7.0)["current_streak_days"] == 0
+
+    # A back-dated entry can merge streaks, so it asks the caller to rebuild.
+    assert not trend.add_mood("calm", date(2024, 3, 4), START + timedelta(days=7))
+
+
+def test_rolling_windows_only_keep_the_longest_window() -> None:
+    trend = MoodTrend()
+    for offset in range(40):
+        trend.add_mood("uplifted" if offset % 2 else "calm", START.date() + timedelta(days=offset), START + timedelta(days=offset))
+    assert len(trend.days) == 30
+
+    windows = trend.summary(START.date() + timedelta(days=39), START + timedelta(days=39), half_life=7.0)["windows"]
+    assert [(window["days"], window["total"]) for window in windows] == [(7, 7), (30, 30)]
+
+
+def test_sentiment_is_exponentially_decayed_and_order_independent() -> None:
+    in_order, reversed_order = MoodTrend(), MoodTrend()
+    events = [("negative", START), ("positive", START + timedelta(days=7))]
+    for sentiment, at in events:
+        in_order.add_sentiment(sentiment, at, half_life=7.0)
+    for sentiment, at in reversed(events):
+        reversed_order.add_sentiment(sentiment, at, half_life=7.0)
+
+    # One half-life later the old negative sample counts half as much: (1 - 0.5) / 1.5.
+    assert in_order.score / in_order.weight == pytest.approx(1 / 3)
+    assert reversed_order.score / reversed_order.weight == pytest.approx(in_order.score / in_order.weight)
+
+
+def test_state_round_trips_through_json() -> None:
+    trend = MoodTrend()
+    trend.add_mood("calm", START.date(), START)
+    trend.add_sentiment("positive", START, half_life=7.0)
+    assert MoodTrend.from_json(trend.to_json()) == trend
+
+
+def test_sliding_cache_expires_idle_entries_not_active_ones() -> None:
+    now = [0.0]
+    states: TTLCache[MoodTrend] = TTLCache(10, 60.0, clock=lambda: now[0], sliding=True)
+    states.set(1, MoodTrend())
+    states.set(2, MoodTrend())
+    for _ in range(3):
+        now[0] += 45.0
+        assert states.get(1) is not None
+    assert states.get(2) is None
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from backend.app.services.language import format_reply
+from backend.app.services.reply_backends import ReplyBackend, ReplyService, StubModelReplyBackend
+
+
+class CountingBackend(ReplyBackend):
+    name = "counting"
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def generate(self, language: str, message: str, sentiment: str) -> str:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return f"model reply to {message}"
+
+
+def test_identical_inflight_prompts_are_coalesced() -> None:
+    backend = CountingBackend(delay=0.05)
+    service = ReplyService(backend, max_concurrency=4, timeout=1.0)
+
+    async def scenario() -> list[str]:
+        return await asyncio.gather(*(service.reply("en", "same", "neutral") for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["model reply to same"] * 5
+    assert backend.calls == 1
+    assert service.coalesced == 4
+    assert service.histograms["counting"].count == 1
+
+
+def test_concurrency_is_capped_per_backend() -> None:
+    backend = CountingBackend(delay=0.02)
+    service = ReplyService(backend, max_concurrency=2, timeout=1.0)
+
+    async def scenario() -> None:
+        await asyncio.gather(*(service.reply("en", f"message {index}", "neutral") for index in range(6)))
+
+    asyncio.run(scenario())
+    assert backend.calls == 6
+    assert backend.peak == 2
+
+
+def test_slow_backend_falls_back_to_template_reply() -> None:
+    service = ReplyService(StubModelReplyBackend(latency=0.5), max_concurrency=1, timeout=0.05)
+    reply = asyncio.run(service.reply("en", "Hello", "positive"))
+    assert reply == format_reply("en", "Hello", "positive")
+    assert service.timeouts == 1
+    assert service.stats()["latency"]["stub"]["count"] == 1
+
+
+class FailingBackend(ReplyBackend):
+    name = "failing"
+
+    async def generate(self, language: str, message: str, sentiment: str) -> str:
+        raise RuntimeError("model unavailable")
+
+
+def test_backend_errors_fall_back_and_are_counted_apart_from_timeouts(caplog) -> None:
+    service = ReplyService(FailingBackend(), max_concurrency=1, timeout=1.0)
+    with caplog.at_level("WARNING"):
+        reply = asyncio.run(service.reply("en", "Hello", "positive"))
+    assert reply == format_reply("en", "Hello", "positive")
+    assert (service.failures, service.timeouts) == (1, 0)
+    assert "Reply backend 'failing' failed" in caplog.text
+
+
+def test_service_can_be_reused_across_event_loops() -> None:
+    backend = CountingBackend(delay=0.01)
+    service = ReplyService(backend, max_concurrency=1, timeout=1.0)
+
+    async def scenario() -> list[str]:
+        # Contention makes the semaphore bind to the running loop.
+        return await asyncio.gather(service.reply("en", "first", "neutral"), service.reply("en", "second", "neutral"))
+
+    assert asyncio.run(scenario()) == asyncio.run(scenario()) == ["model reply to first", "model reply to second"]
+    assert service.timeouts == service.failures == 0
+
+
+def test_a_backend_without_generate_cannot_be_constructed() -> None:
+    class Incomplete(ReplyBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="generate"):
+        Incomplete()
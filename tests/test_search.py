@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.app.core.config import Settings
+from backend.app.core.database import Base, build_engine
+from backend.app.models import ChatMessage, User
+from backend.app.services.search import fts_query, make_snippet, search_messages
+
+
+def test_fts_query_quotes_every_word_and_keeps_prefixes() -> None:
+    assert fts_query('dog "walk" park*') == '"dog" """walk""" "park"*'
+    assert fts_query("NOT OR *") == '"NOT" "OR"'
+    assert fts_query("   ") == ""
+
+
+def test_make_snippet_windows_around_the_first_hit() -> None:
+    content = " ".join(f"w{index}" for index in range(30)) + " Dog end"
+    assert make_snippet(content, ["dog"], tokens=4) == "…w28 w29 [Dog] end"
+    assert make_snippet("short text", ["missing"]) == "short text"
+
+
+def test_like_fallback_without_an_fts_index(tmp_path) -> None:
+    # Metadata alone never creates the FTS table, so this database exercises the fallback.
+    engine = build_engine(Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'plain.db'}"))
+
+    async def search() -> list[dict]:
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(insert(User), [{"id": 1, "email": "a@example.com", "password_hash": "x"}])
+                start = datetime(2024, 1, 1)
+                await conn.execute(
+                    insert(ChatMessage),
+                    [
+                        {"user_id": 1, "sender": "user", "content": content, "created_at": start + timedelta(minutes=index)}
+                        for index, content in enumerate(["100% happy dog", "sad cat", "happy DOG again"])
+                    ],
+                )
+            async with async_sessionmaker(engine)() as session:
+                return await search_messages(session, 1, "happy dog", limit=10)
+        finally:
+            await engine.dispose()
+
+    hits = asyncio.run(search())
+    assert [hit["snippet"] for hit in hits] == ["[happy] [DOG] again", "100% [happy] [dog]"]
+    assert hits[0]["score"] is None
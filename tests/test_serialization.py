@@ -0,0 +1,35 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from backend.app.schemas.chat import ChatMessagePublic  # noqa: E402
+from backend.app.schemas.mood import MoodEntryPublic  # noqa: E402
+from backend.app.utils import serialization  # noqa: E402
+from backend.app.utils.serialization import dumps_rows  # noqa: E402
+
+MESSAGES = [
+    (1, "user", "es", "positive", 'Estoy "muy" bien 😊', datetime(2024, 3, 1, 9, 30, 15, 123456)),
+    (2, "ai", "en", "neutral", "Line one\nline two", datetime(2024, 3, 1, 9, 30, 15)),
+]
+ENTRIES = [(7, "calm", "manual", date(2024, 3, 1), datetime(2024, 3, 1, 10, 0))]
+
+
+def _fastapi_encoding(model, fields, rows) -> list:
+    # What the response_model path produces: validate each row, then jsonable_encoder.
+    return jsonable_encoder([model(**dict(zip(fields, row))) for row in rows])
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_rows_matches_the_response_model_encoding(monkeypatch, use_orjson: bool) -> None:
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    for model, rows in ((ChatMessagePublic, MESSAGES), (MoodEntryPublic, ENTRIES)):
+        fields = tuple(model.__fields__)
+        assert json.loads(dumps_rows(fields, rows)) == _fastapi_encoding(model, fields, rows)
+    assert dumps_rows(("id",), []) == b"[]"